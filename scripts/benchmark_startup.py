@@ -0,0 +1,102 @@
+"""
+Benchmark script to measure CLI cold-start time with `python -X importtime`.
+
+Runs `src/main.py --help` in fresh interpreters, reports the median wall time
+and the slowest imports, and exits non-zero when the median exceeds the
+startup budget or a heavy dependency is imported eagerly.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Cold start budget for `python src/main.py --help`, interpreter start-up included.
+DEFAULT_BUDGET_MS = 750.0
+
+# Dependencies that must only load once a run (or report) actually starts.
+HEAVY_MODULES = (
+    "torch", "sentence_transformers", "pandas", "matplotlib", "seaborn", "ollama", "tqdm",
+)
+
+def run_once() -> Tuple[float, str]:
+    """Runs one cold `--help` and returns (wall ms, importtime log)."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", str(PROJECT_ROOT / "src" / "main.py"), "--help"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    return (time.perf_counter() - start) * 1000, proc.stderr
+
+def parse_importtime(log: str) -> Dict[str, float]:
+    """Maps top-level package -> cumulative import time in ms."""
+    totals: Dict[str, float] = {}
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        totals[package] = max(totals.get(package, 0.0), int(cumulative) / 1000)
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts to measure.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Median wall-time budget.")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to report.")
+    parser.add_argument("--output", type=Path,
+                        default=PROJECT_ROOT / "results" / "startup_benchmark.json",
+                        help="JSON file for the results (git-ignored results/ by default).")
+    args = parser.parse_args()
+
+    logger.info(f"Measuring {args.runs} cold starts of `src/main.py --help`...")
+    run_once()  # Warm the bytecode and filesystem caches.
+    samples: List[float] = []
+    imports: Dict[str, float] = {}
+    for _ in range(args.runs):
+        wall_ms, log = run_once()
+        samples.append(wall_ms)
+        imports = parse_importtime(log)
+
+    median_ms = statistics.median(samples)
+    eager = sorted(set(imports) & set(HEAVY_MODULES))
+    slowest = sorted(imports.items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+
+    logger.info(f"Median cold start: {median_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    for package, ms in slowest:
+        logger.info(f"  {package:<30} {ms:8.1f} ms")
+
+    results = {
+        "median_ms": median_ms,
+        "samples_ms": samples,
+        "budget_ms": args.budget_ms,
+        "slowest_imports_ms": dict(slowest),
+        "eager_heavy_modules": eager,
+    }
+    output_path = args.output
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    logger.info(f"Results saved to {output_path}")
+
+    if eager:
+        logger.error(f"Heavy modules imported at startup: {eager}")
+    if median_ms > args.budget_ms:
+        logger.error(f"Cold start over budget by {median_ms - args.budget_ms:.0f} ms")
+    if eager or median_ms > args.budget_ms:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,275 @@
 """
 Analysis and Visualization Module.
 """
+import argparse
+import hashlib
+import json
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-
-import matplotlib.pyplot as plt
-import pandas as pd
-import seaborn as sns
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from src.config.config import config
+from src.utils.lazy import lazy_imports, resolve
+from src.utils.results_store import ResultStore, results_location
+from src.utils.significance import PAIR_ON, confidence_intervals, pairwise_tests
+from src.utils.stats import StatsAccumulator
+from src.utils.summary import summary_table
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Plotting libraries are imported when a report is generated, not when the CLI starts.
+__getattr__ = lazy_imports(__name__, pd="pandas", plt="matplotlib.pyplot", sns="seaborn")
 
 logger = logging.getLogger(__name__)
 
+# Metrics summarized, with intervals and pairwise tests, in the report; figures show the first.
+REPORT_METRICS = ("vector_distance", "label_distance")
+# Columns the confidence intervals and pairwise tests read; a results store decodes only these.
+REPORT_COLUMNS = PAIR_ON + ("strategy", "status") + REPORT_METRICS
+# Quantiles behind the distribution plot: whiskers at 5%/95%, box at the quartiles.
+PLOT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+REPORT_DPI = 300
+PREVIEW_DPI = 72
+# Bump when the figure code changes, so figures cached by an older version are redrawn.
+FIGURE_VERSION = 1
+FIGURE_MANIFEST = ".figures.json"
+
+# Figure renderers take only aggregates (plain, picklable data),
+# so they can run in worker processes.
+
+def render_mean_plot(data: Dict[str, Any], path: Path, dpi: int) -> None:
+    """Bar plot of mean vector distance with +/- one std error bars."""
+    plt, sns = resolve(__name__, "plt", "sns")
+    sns.set_theme(style="whitegrid", palette="colorblind")
+    plt.figure(figsize=(10, 6))
+    plt.bar(data['strategy'], data['mean'], yerr=data['std'], capsize=4,
+            color=sns.color_palette("colorblind", len(data['strategy'])))
+    plt.title('Mean Vector Distance by Prompt Strategy (Lower is Better)')
+    plt.ylabel('Cosine Distance')
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi)
+    plt.close()
+
+def render_distribution_plot(data: Dict[str, Any], path: Path, dpi: int) -> None:
+    """Box plot drawn from precomputed quantiles, with the mean marked."""
+    plt, sns = resolve(__name__, "plt", "sns")
+    sns.set_theme(style="whitegrid", palette="colorblind")
+    stats = [
+        {"label": label, "whislo": q[0], "q1": q[1], "med": q[2], "q3": q[3], "whishi": q[4],
+         "mean": mean, "fliers": []}
+        for label, q, mean in zip(data['strategy'], data['quantiles'], data['mean'], strict=True)
+    ]
+    plt.figure(figsize=(10, 6))
+    plt.gca().bxp(stats, showmeans=True)
+    plt.title('Distribution of Vector Distances by Strategy (5th-95th percentile)')
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi)
+    plt.close()
+
+FIGURES: Dict[str, Callable[[Dict[str, Any], Path, int], None]] = {
+    "mean_distance_comparison.png": render_mean_plot,
+    "distance_distribution.png": render_distribution_plot,
+}
+
+def _title(metric: str) -> str:
+    return metric.replace('_', ' ').title()
+
+def _render(job: Tuple[str, Dict[str, Any], Path, int]) -> str:
+    name, data, path, dpi = job
+    FIGURES[name](data, path, dpi)
+    return name
+
 class ResultAnalyzer:
     """Analyzes experiment results and generates figures."""
 
-    def __init__(self, results_path: Path = None):
-        self.results_path = results_path or config.paths.results
+    def __init__(self, results_path: Path = None, run_ids: Optional[List[str]] = None,
+                 preview: bool = False, workers: Optional[int] = None,
+                 resamples: Optional[int] = None, significance: Optional[bool] = None):
+        self.results_path = results_path or results_location(config.paths.results,
+                                                             config.experiment.output_format)
+        # Runs to analyze from a results store; None means the latest run.
+        self.run_ids = run_ids
+        # Bootstrap resamples and permutations per interval or test; 0 skips them.
+        self.resamples = config.analysis.bootstrap_resamples if resamples is None else resamples
+        # Intervals and tests read every result row, so the report only adds them on request.
+        self.add_significance = (config.analysis.significance if significance is None
+                                 else significance)
+        # Preview renders quickly at low resolution; a later full report redraws at REPORT_DPI.
+        self.dpi = PREVIEW_DPI if preview else REPORT_DPI
+        # Processes rendering figures. By default a full report uses one per figure (up to the
+        # CPU count); a preview renders in-process, since a worker's plotting imports outweigh it.
+        self.workers = workers if workers is not None else (1 if preview else os.cpu_count() or 1)
         self.output_dir = config.paths.figures
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
-    def load_results(self) -> pd.DataFrame:
-        """Loads results from CSV."""
+    def load_results(self, columns: Optional[Sequence[str]] = None) -> 'pd.DataFrame':
+        """Loads results from a results store directory, or a CSV, JSONL or Parquet file."""
+        pd, = resolve(__name__, "pd")
         if not self.results_path.exists():
             raise FileNotFoundError(f"Results file not found at {self.results_path}")
+        if self.results_path.is_dir():
+            store = ResultStore(self.results_path)
+            latest = store.latest_run()
+            run_ids = self.run_ids or ([latest] if latest else None)
+            logger.info(f"Loading runs {run_ids} from {self.results_path}")
+            return store.load(columns=columns, run_ids=run_ids)
+        if self.results_path.suffix == ".parquet":
+            return pd.read_parquet(self.results_path)
+        if self.results_path.suffix == ".jsonl":
+            return pd.read_json(self.results_path, lines=True)
         return pd.read_csv(self.results_path)
 
+    def load_stats(self, rows: Optional['pd.DataFrame'] = None) -> StatsAccumulator:
+        """
+        Per-strategy statistics of the results.
+
+        A results store keeps them per run, so no rows are read; a results
+        file is folded into a fresh accumulator (from ``rows`` when it was
+        already read).
+        """
+        if self.results_path.is_dir():
+            store = ResultStore(self.results_path)
+            latest = store.latest_run()
+            run_ids = self.run_ids or ([latest] if latest else [])
+            logger.info(f"Reading statistics of runs {run_ids} from {self.results_path}")
+            return store.stats(run_ids=run_ids)
+        return StatsAccumulator().update(rows if rows is not None else self.load_results())
+
+    @staticmethod
+    def figure_data(summary: 'pd.DataFrame',
+                    quantiles: 'pd.DataFrame') -> Dict[str, Dict[str, Any]]:
+        """Aggregates each figure is drawn from, in summary (best-first) order."""
+        order = list(summary.index)
+        mean = [float(v) for v in summary['mean']]
+        return {
+            "mean_distance_comparison.png": {
+                "strategy": order, "mean": mean,
+                "std": [float(v) for v in summary['std'].fillna(0.0)],
+            },
+            "distance_distribution.png": {
+                "strategy": order, "mean": mean,
+                "quantiles": [[float(v) for v in quantiles.loc[name]] for name in order],
+            },
+        }
+
     def generate_report(self):
         """Generates statistical report and plots."""
-        df = self.load_results()
-        
-        # Statistical Summary
-        summary = df.groupby('strategy')['vector_distance'].agg(['mean', 'var', 'std', 'count']).sort_values('mean')
-        print("\n=== Statistical Summary (Vector Distance) ===")
-        print(summary)
-        summary.to_csv(self.output_dir / "summary_stats.csv")
-
-        # Set plot style
-        sns.set_theme(style="whitegrid", palette="colorblind")
-
-        # 1. Bar Plot: Mean Distance by Strategy
-        plt.figure(figsize=(10, 6))
-        ax = sns.barplot(data=df, x='strategy', y='vector_distance', errorbar='sd')
-        ax.set_title('Mean Vector Distance by Prompt Strategy (Lower is Better)')
-        ax.set_ylabel('Cosine Distance')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig(self.output_dir / "mean_distance_comparison.png", dpi=300)
-        plt.close()
-
-        # 2. Violin Plot / Box Plot for Distribution
-        plt.figure(figsize=(10, 6))
-        sns.violinplot(data=df, x='strategy', y='vector_distance', inner="quartile")
-        plt.title('Distribution of Vector Distances by Strategy')
-
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig(self.output_dir / "distance_distribution.png", dpi=300)
-        plt.close()
+        resample = self.add_significance and self.resamples
+        rows = self.load_results(columns=REPORT_COLUMNS) if resample else None
+        stats = self.load_stats(rows)
+        counts = stats.status_counts()
+        failed = int(counts['failed'].sum()) if 'failed' in counts.columns else 0
+        if failed:
+            logger.warning(f"Excluding {failed} failed work units from the report.")
+
+        # Statistical Summary, one table per metric the results carry
+        moments = stats.summary()
+        metrics = [m for m in REPORT_METRICS if m in set(moments.index.get_level_values(1))]
+        summaries = {}
+        for metric in metrics:
+            summary = summary_table(moments, metric)[['mean', 'var', 'std', 'count']]
+            if rows is not None:
+                summary = summary.join(self.significance(rows, metric)[['ci_low', 'ci_high']])
+            print(f"\n=== Statistical Summary ({_title(metric)}) ===")
+            print(summary)
+            summary.to_csv(self.report_path("summary_stats", metric))
+            summaries[metric] = summary
+        if 'label_distance' in metrics:
+            # Tiered scoring: only the hash sample (plus ambiguous rows, kept apart) is embedded.
+            print("Note: tiered scoring embeds a uniform hash sample of the rows, so vector "
+                  "distance statistics cover that sample only; label distance covers every "
+                  "clearly labelled row, and ambiguous rows are in ambiguous_vector_distance.")
 
+        if 'vector_distance' not in summaries:
+            logger.warning("No vector distances to plot; skipping figures.")
+            return
+        quantiles = stats.quantiles('vector_distance', PLOT_QUANTILES)
+        self.render_figures(self.figure_data(summaries['vector_distance'], quantiles))
         logger.info(f"Analysis complete. Figures saved to {self.output_dir}")
 
+    def report_path(self, name: str, metric: str) -> Path:
+        """CSV of a report table; tables of metrics other than vector distance get a suffix."""
+        suffix = "" if metric == "vector_distance" else f"_{metric}"
+        return self.output_dir / f"{name}{suffix}.csv"
+
+    def significance(self, rows: 'pd.DataFrame',
+                     metric: str = 'vector_distance') -> 'pd.DataFrame':
+        """
+        Bootstrap confidence intervals of each strategy's mean of a metric; returns them.
+
+        Strategies are also compared pairwise on the items both answered
+        (paired permutation tests, Holm-corrected), which is printed and
+        saved to pairwise_tests.csv (with a metric suffix, see ``report_path``).
+        """
+        options = dict(confidence=config.analysis.confidence_level, n_resamples=self.resamples,
+                       seed=config.experiment.seed, workers=config.analysis.workers)
+        intervals = confidence_intervals(rows, metric, **options)
+        if not any(column in rows.columns for column in PAIR_ON):
+            logger.warning(f"Results have none of the columns {list(PAIR_ON)}; "
+                           f"skipping pairwise tests.")
+            return intervals
+
+        tests = pairwise_tests(rows, metric, **options)
+        level = f"{config.analysis.confidence_level:.0%}"
+        print(f"\n=== Pairwise Tests ({_title(metric)}, {level} CI of a - b, "
+              f"Holm-corrected p) ===")
+        print(tests.to_string(index=False))
+        tests.to_csv(self.report_path("pairwise_tests", metric), index=False)
+        return intervals
+
+    def render_figures(self, figures: Dict[str, Dict[str, Any]]) -> List[str]:
+        """
+        Draws figures whose aggregates changed since they were last drawn; returns their names.
+
+        Each figure's content hash (its aggregates, the DPI and FIGURE_VERSION)
+        is kept in a manifest next to the figures, and figures whose hash
+        matches are skipped. The rest render in parallel worker processes.
+        """
+        manifest_path = self.output_dir / FIGURE_MANIFEST
+        manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+        hashes = {
+            name: hashlib.sha256(
+                json.dumps([FIGURE_VERSION, self.dpi, data], sort_keys=True).encode()
+            ).hexdigest()
+            for name, data in figures.items()
+        }
+        jobs = [
+            (name, data, self.output_dir / name, self.dpi) for name, data in figures.items()
+            if manifest.get(name) != hashes[name] or not (self.output_dir / name).exists()
+        ]
+        if not jobs:
+            logger.info("Figures are up to date; skipping rendering.")
+            return []
+
+        workers = min(self.workers, len(jobs))
+        if workers > 1:
+            # Spawned workers do not inherit the runner's threads or locks.
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(workers, mp_context=context) as pool:
+                rendered = list(pool.map(_render, jobs))
+        else:
+            rendered = [_render(job) for job in jobs]
+
+        manifest.update({name: hashes[name] for name in rendered})
+        manifest_path.write_text(json.dumps(manifest, indent=2))
+        return rendered
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Generate the analysis report and figures.")
+    parser.add_argument("--preview", action="store_true",
+                        help=f"Render figures quickly at {PREVIEW_DPI} DPI.")
+    parser.add_argument("--significance", action="store_true", default=None,
+                        help="Add confidence intervals and pairwise tests (reads every row).")
+    args = parser.parse_args()
     try:
-        analyzer = ResultAnalyzer()
+        analyzer = ResultAnalyzer(preview=args.preview, significance=args.significance)
         analyzer.generate_report()
     except Exception as e:
         logger.error(f"Analysis failed: {e}")
@@ -3,9 +3,9 @@ Configuration loader module.
 """
 import logging
 from pathlib import Path
+from typing import Any, Callable, List, Optional
 
-import yaml
-from pydantic import BaseModel, Field, ValidationError
+from pydantic import BaseModel, Field, ValidationError, field_validator
 
 logger = logging.getLogger(__name__)
 PROJECT_ROOT = Path(__file__).parent.parent.parent
@@ -14,25 +14,95 @@ class LLMConfig(BaseModel):
     model: str = Field(..., min_length=1)
     temperature: float = Field(..., ge=0.0, le=2.0)
     base_url: str = Field(..., pattern=r"^https?://")
+    # Several hosts to balance requests across; when empty, base_url is the only host
+    base_urls: List[str] = Field(default_factory=list)
+    balancing: str = Field(
+        "round_robin", pattern=r"^(round_robin|least_outstanding|consistent_hash)$"
+    )
+    health_check_interval: float = Field(30.0, gt=0)
+    stream: bool = False
+    keep_alive: Optional[str] = None
+    timeout: Optional[float] = Field(120.0, gt=0)
+    max_retries: int = Field(2, ge=0)
+    retry_backoff: float = Field(0.5, gt=0)
+    circuit_failure_threshold: int = Field(5, gt=0)
+    circuit_reset_seconds: float = Field(30.0, gt=0)
+
+    @field_validator('base_urls')
+    @classmethod
+    def _check_urls(cls, urls: List[str]) -> List[str]:
+        for url in urls:
+            if not url.startswith(("http://", "https://")):
+                raise ValueError(f"Expected an http(s) URL, got '{url}'")
+        return urls
+
+    @property
+    def hosts(self) -> List[str]:
+        return self.base_urls or [self.base_url]
 
 class ExperimentConfig(BaseModel):
     dataset_size: int = Field(..., gt=0)
+    dataset_path: Optional[Path] = None
+    dataset_chunk_size: int = Field(1000, gt=0)
     seed: int = Field(...)
     embedding_model: str = Field(..., min_length=1)
+    embedding_server: Optional[str] = None
+    execution_mode: str = Field("thread", pattern=r"^(thread|async)$")
+    max_workers: int = Field(4, gt=0)
+    adaptive_concurrency: bool = False
+    max_concurrency: int = Field(32, gt=0)
+    latency_tolerance: float = Field(2.0, gt=1.0)
+    max_in_flight: int = Field(64, gt=0)
+    work_order: str = Field("interleaved", pattern=r"^(interleaved|strategy|prefix)$")
+    prefix_lane_size: int = Field(32, gt=0)
+    scoring_batch_size: int = Field(64, gt=0)
+    scoring: str = Field("embedding", pattern=r"^(embedding|tiered)$")
+    embedding_sample: float = Field(0.05, ge=0.0, le=1.0)
+    self_consistency_samples: int = Field(5, gt=0)
+    self_consistency_temperature: float = Field(0.7, gt=0.0, le=2.0)
+    output_format: str = Field("dataset", pattern=r"^(csv|jsonl|parquet|dataset)$")
+    early_stopping: bool = False
+    early_stopping_round_size: int = Field(20, gt=0)
+    early_stopping_min_items: int = Field(30, gt=1)
+    early_stopping_delta: float = Field(0.05, gt=0.0, lt=1.0)
+
+class CacheConfig(BaseModel):
+    backend: str = Field("log", min_length=1)
+    dir: Path = Path(".cache")
+    memory_max_entries: Optional[int] = Field(10000, gt=0)
+    memory_max_bytes: Optional[int] = Field(64 * 1024 * 1024, gt=0)
+    memory_ttl_seconds: Optional[float] = Field(None, gt=0)
+    embedding_max_entries: int = Field(50000, gt=0)
+    embedding_persist: bool = True
+
+    @property
+    def embedding_dir(self) -> Optional[Path]:
+        return self.dir / "embeddings" if self.embedding_persist else None
+
+class AnalysisConfig(BaseModel):
+    significance: bool = False
+    bootstrap_resamples: int = Field(10000, ge=0)
+    confidence_level: float = Field(0.95, gt=0.0, lt=1.0)
+    workers: Optional[int] = Field(None, gt=0)
 
 class PathsConfig(BaseModel):
     data: Path
     results: Path
     figures: Path
+    checkpoints: Path = Path("results/runs")
 
 class Config(BaseModel):
     llm: LLMConfig
     experiment: ExperimentConfig
     paths: PathsConfig
+    cache: CacheConfig = CacheConfig()
+    analysis: AnalysisConfig = AnalysisConfig()
 
     @classmethod
     def load(cls, config_path: str = "config/settings.yaml") -> 'Config':
         """Load configuration from a YAML file."""
+        import yaml
+
         path = PROJECT_ROOT / config_path
         if not path.exists():
             raise FileNotFoundError(f"Config file not found at {path}")
@@ -46,7 +116,8 @@ class Config(BaseModel):
             resolved_paths = {
                 'data': PROJECT_ROOT / paths_data.get('data', 'data/dataset.csv'),
                 'results': PROJECT_ROOT / paths_data.get('results', 'results/experiments.csv'),
-                'figures': PROJECT_ROOT / paths_data.get('figures', 'results/figures')
+                'figures': PROJECT_ROOT / paths_data.get('figures', 'results/figures'),
+                'checkpoints': PROJECT_ROOT / paths_data.get('checkpoints', 'results/runs')
             }
             data['paths'] = resolved_paths
 
@@ -58,10 +129,35 @@ class Config(BaseModel):
             logger.error(f"Error parsing YAML config: {e}")
             raise
 
+class LazyConfig:
+    """
+    Proxy that loads the configuration on first attribute access.
+
+    Importing modules that reference ``config`` stays cheap (no YAML parsing
+    or validation) until a setting is actually read.
+    """
+
+    def __init__(self, loader: Callable[[], Config]):
+        object.__setattr__(self, '_loader', loader)
+        object.__setattr__(self, '_config', None)
+
+    def _get(self) -> Config:
+        if self._config is None:
+            try:
+                object.__setattr__(self, '_config', self._loader())
+            except Exception as e:
+                logger.critical(f"Failed to load configuration: {e}")
+                raise
+        return self._config
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._get(), name, value)
+
+    def __repr__(self) -> str:
+        return repr(self._get())
+
 # Global configuration instance
-try:
-    config = Config.load()
-except Exception as e:
-    logger.critical(f"Failed to load configuration: {e}")
-    # We might want to exit here or provide a fallback, but for now we let it fail loudly as per persona
-    config = None
\ No newline at end of file
+config = LazyConfig(Config.load)
\ No newline at end of file
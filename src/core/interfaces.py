@@ -1,4 +1,4 @@
-from typing import Any, Dict, Protocol, runtime_checkable
+from typing import Any, Dict, Optional, Protocol, runtime_checkable
 
 
 @runtime_checkable
@@ -39,3 +39,25 @@ class MetricEvaluator(Protocol):
             A float score (e.g., distance or similarity).
         """
         ...
+
+@runtime_checkable
+class CacheBackend(Protocol):
+    """Protocol for persistent LLM response caches."""
+
+    name: str
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached response for key, or None on a miss."""
+        ...
+
+    def set(self, key: str, value: str) -> None:
+        """Stores a response under key."""
+        ...
+
+    def compact(self) -> None:
+        """Reclaims space held by superseded entries."""
+        ...
+
+    def close(self) -> None:
+        """Releases any files or connections held by the backend."""
+        ...
@@ -39,3 +39,4 @@ class Registry(Generic[T]):
 # Global registries
 strategy_registry = Registry("Strategy")
 metric_registry = Registry("Metric")
+cache_registry = Registry("Cache")
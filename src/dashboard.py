@@ -1,15 +1,99 @@
+import io
 import os
 import sys
+from pathlib import Path
+from typing import Dict, Optional, Tuple
 
-import matplotlib.pyplot as plt
 import pandas as pd
-import seaborn as sns
 import streamlit as st
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.config.config import config
+from src.utils.results_store import ResultStore, results_location
+from src.utils.significance import PAIR_ON, confidence_intervals, pairwise_tests
+from src.utils.stats import STATS_METRICS, StatsAccumulator
+from src.utils.summary import summary_table
+
+METRICS = STATS_METRICS
+# Columns read from a results file to build its statistics; raw rows are only read on request.
+DASHBOARD_COLUMNS = ("strategy", "status") + METRICS
+# Quantiles behind the distribution plot: whiskers at 5%/95%, box at the quartiles.
+PLOT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Streamlit reruns this script on every widget change. Statistics and rendered
+# figures are cached per (source, run, version), where version is a run's
+# catalog "updated" stamp or a file's mtime and size, so a rerun only reads
+# runs that are new or changed since the last one. A results store keeps each
+# run's statistics next to its rows, so only a results file is ever scanned.
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_rows(source: str, run_id: Optional[str], version: str,
+              columns: Optional[Tuple[str, ...]] = DASHBOARD_COLUMNS) -> pd.DataFrame:
+    path = Path(source)
+    if run_id is not None:
+        return ResultStore(path).load(columns=columns, run_ids=[run_id])
+    readers = {".parquet": pd.read_parquet, ".jsonl": lambda p: pd.read_json(p, lines=True)}
+    df = readers.get(path.suffix, pd.read_csv)(path)
+    return df if columns is None else df[[c for c in columns if c in df.columns]]
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_stats(source: str, run_id: Optional[str], version: str) -> StatsAccumulator:
+    """Mergeable per-strategy statistics of one run, or of the results file."""
+    if run_id is not None:
+        return ResultStore(Path(source)).stats(run_ids=[run_id])
+    return StatsAccumulator().update(load_rows(source, run_id, version))
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_figures(source: str, versions: Tuple[Tuple[Optional[str], str], ...],
+                   strategies: Tuple[str, ...], metric: str, _table: pd.DataFrame,
+                   _quantiles: pd.DataFrame) -> Tuple[bytes, bytes]:
+    """
+    PNG bar chart of mean +/- std and box plot of quantiles, from the statistics only.
+
+    The table and quantiles follow from the other arguments, so they are left out of the cache key.
+    """
+    table, quantiles = _table, _quantiles
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    def png(fig) -> bytes:
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=100, bbox_inches="tight")
+        plt.close(fig)
+        return buf.getvalue()
+
+    fig1, ax1 = plt.subplots(figsize=(10, 6))
+    ax1.bar(table.index, table['mean'], yerr=table['std'].fillna(0.0),
+            color=sns.color_palette('viridis', len(table)), capsize=4)
+    ax1.set_title(f"Mean {metric} (Lower is usually better)")
+    ax1.tick_params(axis='x', labelrotation=45)
+
+    fig2, ax2 = plt.subplots(figsize=(10, 6))
+    ax2.bxp([
+        {"label": name, "whislo": q[0], "q1": q[1], "med": q[2], "q3": q[3], "whishi": q[4],
+         "mean": table.loc[name, 'mean'], "fliers": []}
+        for name, q in ((name, quantiles.loc[name].tolist()) for name in table.index)
+    ], showmeans=True)
+    ax2.set_title(f"Distribution of {metric} (5th-95th percentile)")
+    ax2.tick_params(axis='x', labelrotation=45)
+    return png(fig1), png(fig2)
+
+@st.cache_data(max_entries=32, show_spinner="Resampling...")
+def compare_strategies(source: str, versions: Tuple[Tuple[Optional[str], str], ...],
+                       strategies: Tuple[str, ...],
+                       metric: str) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """Bootstrap CIs per strategy, and paired permutation tests when rows can be paired."""
+    columns = PAIR_ON + ('strategy', 'status', metric)
+    rows = pd.concat([load_rows(source, run_id, version, columns) for run_id, version in versions])
+    rows = rows[rows['strategy'].isin(strategies)]
+    options = dict(confidence=config.analysis.confidence_level,
+                   n_resamples=config.analysis.bootstrap_resamples,
+                   seed=config.experiment.seed, workers=config.analysis.workers)
+    intervals = confidence_intervals(rows, metric, **options)
+    paired = any(column in rows.columns for column in PAIR_ON)
+    return intervals, pairwise_tests(rows, metric, **options) if paired else None
 
 st.set_page_config(page_title="Prompt Engineering Analysis", layout="wide")
 
@@ -21,16 +105,32 @@ Performance is measured by **Vector Distance** (Cosine Distance) to the ground t
 """)
 
 # Load Data
-results_path = config.paths.results
+results_path = results_location(config.paths.results, config.experiment.output_format)
 if not results_path.exists():
     st.error(f"Results file not found at {results_path}. Please run `python src/main.py` first.")
     st.stop()
-
-df = pd.read_csv(results_path)
+source = str(results_path)
 
 # Sidebar
 st.sidebar.header("Configuration")
-all_strategies = df['strategy'].unique()
+versions: Dict[Optional[str], str]
+if results_path.is_dir():
+    # A results store: pick runs from the catalog; each run's statistics are read once.
+    runs = {run['run_id']: run for run in ResultStore(results_path).runs()}
+    selected_runs = st.sidebar.multiselect("Select Runs", list(runs), default=list(runs)[-1:])
+    versions = {run_id: f"{runs[run_id]['updated']}/{runs[run_id]['rows']}"
+                for run_id in selected_runs}
+else:
+    stat = results_path.stat()
+    versions = {None: f"{stat.st_mtime_ns}/{stat.st_size}"}
+
+stats = StatsAccumulator()
+for run_id, version in versions.items():
+    stats.merge(load_stats(source, run_id, version))
+summary = stats.summary()
+status_counts = stats.status_counts()
+all_strategies = sorted(summary.index.get_level_values(0).unique()) if not summary.empty else []
+
 selected_strategies = st.sidebar.multiselect(
     "Select Strategies", 
     all_strategies, 
@@ -41,49 +141,69 @@ if not selected_strategies:
     st.warning("Please select at least one strategy.")
     st.stop()
 
-filtered_df = df[df['strategy'].isin(selected_strategies)]
-
 # Metric Selection
-metric = st.sidebar.selectbox("Select Metric", ["vector_distance", "latency"])
+available_metrics = set(summary.index.get_level_values(1))
+metric_options = [m for m in METRICS if m in available_metrics]
+metric = st.sidebar.selectbox("Select Metric", metric_options)
+if metric == "vector_distance" and "label_distance" in available_metrics:
+    st.info("Tiered scoring: vector distance covers a uniform hash sample of the rows only; "
+            "label distance covers every clearly labelled row.")
+
+failed = int(status_counts['failed'].sum()) if 'failed' in status_counts.columns else 0
+if failed:
+    st.warning(f"{failed} work units failed to generate and are excluded from the analysis.")
 
 # Main Content
 st.header("Statistical Summary")
-summary = filtered_df.groupby('strategy')[metric].agg(['mean', 'std', 'min', 'max', 'count']).sort_values('mean')
-st.dataframe(summary)
+selected = summary[summary.index.get_level_values(0).isin(selected_strategies)]
+table = summary_table(selected, metric)[['mean', 'std', 'min', 'max', 'count']]
+st.dataframe(table)
 
-# Plots
 col1, col2 = st.columns(2)
+quantiles = stats.select(selected_strategies).quantiles(metric, PLOT_QUANTILES)
+bar_png, box_png = render_figures(source, tuple(versions.items()), tuple(selected_strategies),
+                                  metric, table, quantiles)
 
 with col1:
     st.subheader(f"Mean {metric.replace('_', ' ').title()}")
-    fig1, ax1 = plt.subplots(figsize=(10, 6))
-    sns.barplot(data=filtered_df, x='strategy', y=metric, errorbar='sd', palette='viridis', ax=ax1)
-    ax1.set_title(f"Mean {metric} (Lower is usually better)")
-    plt.xticks(rotation=45)
-    st.pyplot(fig1)
+    st.image(bar_png)
 
 with col2:
     st.subheader(f"{metric.replace('_', ' ').title()} Distribution")
-    fig2, ax2 = plt.subplots(figsize=(10, 6))
-    sns.violinplot(data=filtered_df, x='strategy', y=metric, palette='viridis', inner="quartile", ax=ax2)
-    ax2.set_title(f"Distribution of {metric}")
-    plt.xticks(rotation=45)
-    st.pyplot(fig2)
+    st.image(box_png)
+
+# Resampling reads the selected runs' rows, so it runs on request.
+if config.analysis.bootstrap_resamples:
+    st.header("Confidence Intervals and Significance")
+    if st.checkbox("Compute bootstrap intervals and pairwise tests"):
+        intervals, tests = compare_strategies(source, tuple(versions.items()),
+                                              tuple(selected_strategies), metric)
+        st.subheader(f"{config.analysis.confidence_level:.0%} bootstrap CI of the mean")
+        st.dataframe(intervals)
+        st.subheader("Paired permutation tests (mean of a - b, Holm-corrected p)")
+        if tests is None:
+            st.info("Strategies cannot be paired on items: the results have no question column.")
+        else:
+            st.dataframe(tests)
 
 # Raw Data
 st.markdown("---")
 st.header("Raw Data")
 with st.expander("View Raw Data"):
-    st.dataframe(filtered_df)
-    
-    csv = filtered_df.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        "Download CSV",
-        csv,
-        "experiment_results.csv",
-        "text/csv",
-        key='download-csv'
-    )
+    if st.checkbox("Load raw rows"):
+        raw_df = pd.concat([load_rows(source, run_id, version, None)
+                            for run_id, version in versions.items()])
+        raw_df = raw_df[raw_df['strategy'].isin(selected_strategies)]
+        st.dataframe(raw_df)
+
+        csv = raw_df.to_csv(index=False).encode('utf-8')
+        st.download_button(
+            "Download CSV",
+            csv,
+            "experiment_results.csv",
+            "text/csv",
+            key='download-csv'
+        )
 
 st.markdown("---")
 st.markdown("### References")
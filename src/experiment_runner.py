@@ -1,101 +1,767 @@
 """
 Experiment Runner Module.
 """
+import asyncio
 import logging
+import math
+import queue
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Dict, Optional
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from itertools import islice
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sized,
+    Tuple,
+    Union,
+)
 
-import pandas as pd
-from tqdm import tqdm
-
-from src.config.config import config
-from src.core.registry import strategy_registry
 import src.strategies.definitions  # noqa: F401
-from src.utils.data_generator import SyllogismGenerator
-from src.utils.llm_client import OllamaClient
+from src.config.config import config
+from src.core.registry import metric_registry, strategy_registry
+from src.utils.checkpoint import RunCheckpoint, new_run_id, unit_key
+from src.utils.concurrency import AdaptiveLimiter, AIMDController, AsyncAdaptiveLimiter
+from src.utils.data_generator import (
+    GeneratedDataset,
+    SyllogismGenerator,
+    dataset_length,
+    iter_dataset_chunks,
+)
+from src.utils.lazy import lazy_imports, resolve
+from src.utils.llm_client import (
+    AsyncOllamaClient,
+    GenerationStats,
+    OllamaClient,
+    clear_generation_stats,
+    last_generation_stats,
+    record_generation_stats,
+)
 from src.utils.metrics import SimilarityEvaluator
+from src.utils.racing import StrategyRace
+from src.utils.resilience import CircuitOpenError
+from src.utils.results_store import ResultStore, results_location
+from src.utils.scoring import ScoringStage
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# pandas and tqdm are only needed once a run starts.
+__getattr__ = lazy_imports(__name__, pd="pandas", tqdm="tqdm:tqdm")
 
 logger = logging.getLogger(__name__)
 
+EXECUTION_MODES = ("thread", "async")
+WORK_ORDERS = ("interleaved", "strategy", "prefix")
+RESULT_FORMATS = ("csv", "jsonl", "parquet", "dataset")
+
+# Per-generation timing columns recorded alongside total latency
+GENERATION_METRICS = (
+    "ttft", "inter_token_latency", "tokens_per_sec",
+    "prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration",
+)
+
+# Row status: "ok" rows are scored and checkpointed; "failed" rows are neither,
+# so resume retries them
+UNIT_STATUSES = ("ok", "failed")
+
+# (result row, busy seconds, error) for one executed work unit
+UnitOutcome = Tuple[Optional[Dict[str, Any]], float, Optional[Exception]]
+
+class WorkUnit(NamedTuple):
+    """One (strategy, item) cell of the experiment matrix."""
+    strategy_name: str
+    strategy: Any
+    item: Dict[str, str]
+
+class RunProgress:
+    """Thread-safe per-strategy progress and busy-time accounting for one run."""
+
+    def __init__(self, units: List[WorkUnit], capacity: int):
+        self.capacity = capacity
+        self.totals = Counter(unit.strategy_name for unit in units)
+        # While more units may still be added, no strategy counts as finished.
+        self.open = False
+        self.completed: Counter = Counter()
+        self.failed: Counter = Counter()
+        self.busy_time: Dict[str, float] = defaultdict(float)
+        self.wall_time = 0.0
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, strategy_name: str, busy: float, ok: bool) -> bool:
+        """Records a finished unit; returns True when it was the strategy's last one."""
+        with self._lock:
+            self.busy_time[strategy_name] += busy
+            if ok:
+                self.completed[strategy_name] += 1
+            else:
+                self.failed[strategy_name] += 1
+            done = self.completed[strategy_name] + self.failed[strategy_name]
+            return not self.open and done == self.totals[strategy_name]
+
+    def add(self, units: List[WorkUnit], final: bool = True) -> None:
+        """Adds a streamed chunk of units; ``final`` marks the last one."""
+        with self._lock:
+            self.totals.update(unit.strategy_name for unit in units)
+            self.open = not final
+
+    def finish(self) -> None:
+        self.wall_time = time.perf_counter() - self._start
+
+    def summary(self) -> Dict[str, Any]:
+        """Wall-clock time, worker utilisation and per-strategy counts."""
+        total_busy = sum(self.busy_time.values())
+        capacity_time = self.wall_time * self.capacity
+        return {
+            "wall_time": self.wall_time,
+            "busy_time": total_busy,
+            "capacity": self.capacity,
+            "utilization": total_busy / capacity_time if capacity_time else 0.0,
+            "per_strategy": {
+                name: {
+                    "total": total,
+                    "completed": self.completed[name],
+                    "failed": self.failed[name],
+                    "busy_time": self.busy_time[name],
+                }
+                for name, total in self.totals.items()
+            },
+        }
+
 class ExperimentRunner:
     """Orchestrates the prompt engineering experiments."""
 
     def __init__(self, llm_client: Optional[OllamaClient] = None, 
                  evaluator: Optional[SimilarityEvaluator] = None, 
-                 generator: Optional[SyllogismGenerator] = None):
-        
+                 generator: Optional[SyllogismGenerator] = None,
+                 strategies: Optional[List[str]] = None,
+                 dataset: Optional[Union[Path, Iterable[Dict[str, str]]]] = None):
+        unknown = set(strategies or []) - set(strategy_registry.list_all())
+        if unknown:
+            raise ValueError(
+                f"Unknown strategies {sorted(unknown)}. Available: {strategy_registry.list_all()}"
+            )
+        # Registered strategy names to run; None runs all of them.
+        self.strategy_names = strategies
+
         self.llm = llm_client or OllamaClient(
             model=config.llm.model,
             temperature=config.llm.temperature,
-            base_url=config.llm.base_url
+            base_url=config.llm.base_url,
+            cache_dir=str(config.cache.dir),
+            cache_backend=config.cache.backend,
+            cache_max_entries=config.cache.memory_max_entries,
+            cache_max_bytes=config.cache.memory_max_bytes,
+            cache_ttl=config.cache.memory_ttl_seconds,
+            stream=config.llm.stream,
+            keep_alive=config.llm.keep_alive,
+            base_urls=config.llm.hosts,
+            balancing=config.llm.balancing,
+            health_check_interval=config.llm.health_check_interval,
+            timeout=config.llm.timeout,
+            max_retries=config.llm.max_retries,
+            retry_backoff=config.llm.retry_backoff,
+            circuit_failure_threshold=config.llm.circuit_failure_threshold,
+            circuit_reset_seconds=config.llm.circuit_reset_seconds
+        )
+        # Evaluators built here hold a reference on the shared embedding model pool.
+        self._owns_evaluator = evaluator is None
+        self.evaluator = evaluator or SimilarityEvaluator(
+            model_name=config.experiment.embedding_model,
+            cache_size=config.cache.embedding_max_entries,
+            cache_dir=config.cache.embedding_dir,
+            server_socket=config.experiment.embedding_server
         )
-        self.evaluator = evaluator or SimilarityEvaluator(model_name=config.experiment.embedding_model)
         self.generator = generator or SyllogismGenerator(seed=config.experiment.seed)
         
-        # Prepare datasets
-        self.dataset = self.generator.generate_dataset(size=config.experiment.dataset_size)
+        # Prepare datasets. A dataset file, generated items (or any iterable of items) are
+        # streamed in chunks of config.experiment.dataset_chunk_size instead of held in memory.
+        dataset = dataset if dataset is not None else config.experiment.dataset_path
+        if dataset is None:
+            dataset = GeneratedDataset(self.generator, config.experiment.dataset_size,
+                                       chunk_size=max(config.experiment.dataset_chunk_size, 2))
+        self.dataset: Optional[List[Dict[str, str]]] = (
+            dataset if isinstance(dataset, list) else None
+        )
+        self._dataset_source = dataset
         
         # Generate distinct few-shot examples
         self.few_shot_examples = self.generator.generate_dataset(size=4) # 2 valid, 2 invalid
 
-    def run_all_experiments(self, max_workers: int = 4) -> pd.DataFrame:
-        """Runs all defined strategies."""
-        results = []
-        
-        # Instantiate strategies from registry
+        # Wall-clock, utilisation and per-strategy counts of the last run
+        self.run_stats: Dict[str, Any] = {}
+        self.run_id: Optional[str] = None
+
+    def run_all_experiments(self, max_workers: Optional[int] = None, mode: Optional[str] = None,
+                            max_in_flight: Optional[int] = None, order: Optional[str] = None,
+                            run_id: Optional[str] = None, resume: bool = False,
+                            save: bool = True, adaptive: Optional[bool] = None,
+                            early_stopping: Optional[bool] = None) -> 'pd.DataFrame':
+        """
+        Runs all defined strategies.
+
+        The full strategy x item matrix is submitted as one work queue so the
+        pool stays busy across strategy boundaries. Scored rows are appended to
+        a per-run checkpoint under config.paths.checkpoints as they complete.
+        Streamed datasets are run one chunk of items at a time through the same
+        scoring stage, checkpoint and concurrency controller.
+
+        With adaptive concurrency the worker count (or in-flight limit) is only
+        the starting point: an AIMD controller raises it while latency holds and
+        backs off when latency climbs or requests fail, up to
+        config.experiment.max_concurrency.
+
+        With early stopping, items run in rounds of
+        config.experiment.early_stopping_round_size. After each round the
+        strategies race on their running confidence bounds (see StrategyRace):
+        clearly dominated strategies get no further items, and the run stops
+        once a single strategy is left. run_stats['early_stopping'] reports the
+        rounds, the eliminations and the LLM calls saved.
+
+        Args:
+            max_workers: Thread pool size for the "thread" mode; falls back to
+                config.experiment.max_workers.
+            mode: "thread" (default) or "async"; falls back to config.experiment.execution_mode.
+            max_in_flight: Concurrent request limit for the "async" mode.
+            order: Work queue ordering, one of WORK_ORDERS; falls back to
+                config.experiment.work_order.
+            run_id: Identifier of the run; a new one is generated when omitted.
+            resume: Skip units already checkpointed by run_id (or by the latest run
+                when run_id is None).
+            save: Write the results file once the run completes.
+            adaptive: Adjust concurrency at runtime; falls back to
+                config.experiment.adaptive_concurrency.
+            early_stopping: Race strategies and stop dominated ones; falls back to
+                config.experiment.early_stopping.
+        """
+        mode = mode or config.experiment.execution_mode
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode '{mode}'. Expected one of {EXECUTION_MODES}.")
+
+        order = order or config.experiment.work_order
+        max_workers = max_workers or config.experiment.max_workers
+        adaptive = config.experiment.adaptive_concurrency if adaptive is None else adaptive
+        if early_stopping is None:
+            early_stopping = config.experiment.early_stopping
+        strategies = self._create_strategies()
+        logger.info(f"Starting experiments with strategies: {[s[0] for s in strategies]}")
+
+        checkpoint = self._open_checkpoint(run_id, resume)
+        self.run_id = checkpoint.run_id
+        checkpointed = self._checkpointed_rows(checkpoint) if resume else {}
+        resumed: Dict[str, Dict[str, Any]] = {}
+
+        controller = None
+        if mode == "async":
+            capacity = max_in_flight or config.experiment.max_in_flight
+        else:
+            capacity = max_workers
+        if adaptive:
+            controller = self._concurrency_controller(capacity)
+            capacity = controller.max_limit
+        progress = RunProgress([], capacity=capacity)
+
+        # Tiered scoring labels every row and embeds only ambiguous rows and a sample of the rest,
+        # so strategies race on the label metric, which every clearly labelled row has.
+        tiered = config.experiment.scoring == "tiered"
+        race = None
+        on_batch = checkpoint.append
+        if early_stopping:
+            race = StrategyRace([name for name, _ in strategies],
+                                delta=config.experiment.early_stopping_delta,
+                                min_items=config.experiment.early_stopping_min_items,
+                                metric="label_distance" if tiered else "vector_distance")
+
+            def on_batch(batch: List[Dict[str, Any]]) -> None:
+                checkpoint.append(batch)
+                race.update(batch)
+
+        # Generation feeds the scoring stage, which embeds responses in batches concurrently.
+        # Failed units skip it and are kept as "failed" rows.
+        label_metric = metric_registry.create("Label Match") if tiered else None
+        scorer = ScoringStage(self.evaluator, batch_size=config.experiment.scoring_batch_size,
+                              on_batch=on_batch, label_metric=label_metric,
+                              embed_fraction=config.experiment.embedding_sample if tiered else 1.0)
+        failed: List[Dict[str, Any]] = []
+        total_units = 0
+        saved_units = saved_calls = 0
+        consumed = 0
+        with scorer, closing(self._dataset_rounds(early_stopping)) as rounds:
+            for items, final in rounds:
+                consumed += len(items)
+                running = [s for s in strategies
+                           if race is None or (s[0] in race.active and not race.settled)]
+                if race is not None:
+                    # Units of dropped strategies are never generated.
+                    skipped = [s for s in strategies if s not in running]
+                    saved_units += len(skipped) * len(items)
+                    saved_calls += sum(self._calls_per_unit(s, item)
+                                       for _, s in skipped for item in items)
+                    if not running:
+                        # The rest of the dataset is never read; its savings are estimated
+                        # from this round's calls per item.
+                        remaining = self._remaining_items(consumed)
+                        calls = sum(self._calls_per_unit(s, item)
+                                    for _, s in strategies for item in items)
+                        saved_units += len(strategies) * remaining
+                        saved_calls += round(remaining * calls / len(items))
+                        break
+                units = self._build_work_units(running, order, items)
+                total_units += len(units)
+                if checkpointed:
+                    seen = len(resumed)
+                    units = self._skip_checkpointed(units, checkpointed, resumed)
+                    if race is not None:
+                        # Checkpointed rows count towards the race as if they had just been scored.
+                        race.update(list(resumed.values())[seen:])
+                progress.add(units, final)
+                lanes = self._build_lanes(units, order)
+                if mode == "async":
+                    asyncio.run(self._run_async(lanes, progress, capacity, scorer, failed,
+                                                controller))
+                else:
+                    self._run_threaded(lanes, progress, capacity, scorer, failed, controller)
+                if race is not None:
+                    scorer.wait()
+                    for name in race.end_round():
+                        dropped = race.eliminated[name]
+                        logger.info(
+                            f"Early stopping: {name} is dominated after round {race.rounds} "
+                            f"(mean {dropped['mean']:.4f}, "
+                            f"CI [{dropped['low']:.4f}, {dropped['high']:.4f}]); "
+                            f"skipping its remaining items"
+                        )
+        previous = list(resumed.values())
+        if previous:
+            logger.info(f"Resumed run {self.run_id}: {len(previous)} units were already done")
+        scored = scorer.close()
+        # Rows the scoring stage could not score count as failed units too, so resume retries them.
+        failed += [row for row in scored if row.get('status') == "failed"]
+        results = previous + [row for row in scored if row.get('status') != "failed"] + failed
+        if isinstance(self.evaluator, SimilarityEvaluator):
+            self.evaluator.flush_cache()
+
+        progress.finish()
+        self.run_stats = progress.summary()
+        completed = len(results) - len(previous) - len(failed)
+        logger.info(
+            f"Completed {completed}/{total_units - len(previous)} work units "
+            f"({len(failed)} failed) in {self.run_stats['wall_time']:.2f}s "
+            f"(utilization {self.run_stats['utilization']:.0%} "
+            f"of {self.run_stats['capacity']} slots)"
+        )
+        if tiered:
+            self.run_stats['scoring'] = {"scored": scorer.scored, "embedded": scorer.embedded}
+            logger.info(f"Tiered scoring embedded {scorer.embedded} of {scorer.scored} scored rows")
+        if race is not None:
+            self.run_stats['early_stopping'] = {
+                **race.summary(), "units_saved": saved_units, "llm_calls_saved": saved_calls,
+            }
+            logger.info(
+                f"Early stopping ran {race.rounds} rounds, kept {race.active} and saved up to "
+                f"{saved_calls} LLM calls ({saved_units} work units)"
+            )
+        if controller is not None:
+            self.run_stats['concurrency'] = {
+                "final": controller.limit,
+                "knee": controller.knee(),
+                "history": [sample._asdict() for sample in controller.history],
+            }
+            logger.info(
+                f"Adaptive concurrency finished at {controller.limit} "
+                f"(best throughput at {controller.knee()}, {len(controller.history)} adjustments)"
+            )
+
+        if isinstance(self.llm, OllamaClient):
+            logger.info(f"LLM cache stats: {self.llm.cache_stats()}")
+            if self.llm.host_stats():
+                logger.info(f"Ollama host stats: {self.llm.host_stats()}")
+
+        pd, = resolve(__name__, "pd")
+        df = pd.DataFrame(results)
+        if save:
+            self._save_results(df)
+        return df
+
+    def close(self) -> None:
+        """Releases the evaluator this runner created, leaving the pooled model warm for reuse."""
+        if self._owns_evaluator and isinstance(self.evaluator, SimilarityEvaluator):
+            self.evaluator.close()
+            self._owns_evaluator = False
+
+    @staticmethod
+    def _concurrency_controller(initial: int) -> AIMDController:
+        return AIMDController(
+            initial=initial,
+            max_limit=config.experiment.max_concurrency,
+            latency_tolerance=config.experiment.latency_tolerance,
+        )
+
+    @staticmethod
+    def _concurrency_feedback(outcome: UnitOutcome) -> Tuple[Optional[float], bool]:
+        """(latency, ok) to report to the controller; cache hits carry no latency signal."""
+        _, busy, error = outcome
+        if error is not None:
+            # Only errors that point at an overloaded or unreachable server call for backing off.
+            overloaded = getattr(error, 'retryable', False) or isinstance(error, CircuitOpenError)
+            return None, not overloaded
+        stats = last_generation_stats()
+        if stats is not None and stats.cached:
+            return None, True
+        return busy, True
+
+    @staticmethod
+    def _open_checkpoint(run_id: Optional[str], resume: bool) -> RunCheckpoint:
+        directory = config.paths.checkpoints
+        # A results store keeps run statistics, which grow with every checkpointed batch.
+        store = None
+        if config.experiment.output_format == "dataset":
+            store = ResultStore(results_location(config.paths.results, "dataset"))
+        if resume and run_id is None:
+            latest = RunCheckpoint.latest(directory, store)
+            if latest is not None:
+                return latest
+            logger.warning(f"No checkpoint to resume in {directory}; starting a new run.")
+        return RunCheckpoint(directory, run_id or new_run_id(), store)
+
+    @staticmethod
+    def _checkpointed_rows(checkpoint: RunCheckpoint) -> Dict[str, Dict[str, Any]]:
+        """Checkpointed rows by unit key, so each streamed chunk is filtered by lookup."""
+        return {row['unit_key']: row for row in checkpoint.load() if 'unit_key' in row}
+
+    def _skip_checkpointed(self, units: List[WorkUnit], checkpointed: Dict[str, Dict[str, Any]],
+                           resumed: Dict[str, Dict[str, Any]]) -> List[WorkUnit]:
+        """Drops units already checkpointed, collecting their rows (one per unit) into resumed."""
+        model = self._model_name()
+        remaining = []
+        for unit in units:
+            key = unit_key(unit.strategy_name, unit.item, model)
+            if key in checkpointed:
+                resumed.setdefault(key, checkpointed[key])
+            else:
+                remaining.append(unit)
+        return remaining
+
+    def _dataset_chunks(self) -> Iterator[Tuple[List[Dict[str, str]], bool]]:
+        """Yields (items, is_last_chunk); a chunk is read ahead so the last one is known."""
+        size = config.experiment.dataset_chunk_size
+        source = self._dataset_source
+        if isinstance(source, (str, Path)):
+            chunks: Iterator[List[Dict[str, str]]] = iter_dataset_chunks(Path(source), size)
+        else:
+            items = iter(source)
+            chunks = iter(lambda: list(islice(items, size)), [])
+        current = next(chunks, [])
+        for upcoming in chunks:
+            yield current, False
+            current = upcoming
+        yield current, True
+
+    def _dataset_rounds(self, early_stopping: bool) -> Iterator[Tuple[List[Dict[str, str]], bool]]:
+        """Dataset chunks, split into rounds of early_stopping_round_size items when racing."""
+        if not early_stopping:
+            yield from self._dataset_chunks()
+            return
+        size = config.experiment.early_stopping_round_size
+        for items, final in self._dataset_chunks():
+            for start in range(0, len(items), size):
+                yield items[start:start + size], final and start + size >= len(items)
+
+    def _remaining_items(self, consumed: int) -> int:
+        """Items left after ``consumed``; 0 when the dataset's length is unknown (e.g. JSONL)."""
+        source = self._dataset_source
+        if isinstance(source, (str, Path)):
+            total = dataset_length(Path(source))
+        else:
+            total = len(source) if isinstance(source, Sized) else None
+        return max(0, total - consumed) if total is not None else 0
+
+    @staticmethod
+    def _calls_per_unit(strategy: Any, item: Dict[str, str]) -> int:
+        """LLM requests a unit may make: Self-Consistency up to its sample budget, others one."""
+        budget = getattr(strategy, 'budget', None)
+        return budget(item) if callable(budget) else 1
+
+    def _create_strategies(self) -> List[Tuple[str, Any]]:
+        """Instantiates strategies from the registry."""
         strategies = []
-        for name in strategy_registry.list_all():
+        for name in self.strategy_names or strategy_registry.list_all():
             if name == "Few-Shot":
                 strategies.append((name, strategy_registry.create(name, examples=self.few_shot_examples)))
+            elif name == "Self-Consistency":
+                strategies.append((name, strategy_registry.create(
+                    name,
+                    samples=config.experiment.self_consistency_samples,
+                    temperature=config.experiment.self_consistency_temperature,
+                    base_seed=config.experiment.seed,
+                )))
             else:
                 strategies.append((name, strategy_registry.create(name)))
+        return strategies
 
-        logger.info(f"Starting experiments with strategies: {[s[0] for s in strategies]}")
-        
+    def _build_work_units(self, strategies: List[Tuple[str, Any]], order: str,
+                          items: List[Dict[str, str]]) -> List[WorkUnit]:
+        """
+        Flattens the strategy x item matrix into one ordered work queue.
+
+        "strategy" groups units by strategy (the historical order), "interleaved"
+        cycles through strategies item by item, and "prefix" sorts by rendered
+        prompt so requests sharing a prompt prefix reach the server back-to-back.
+        """
+        if order not in WORK_ORDERS:
+            raise ValueError(f"Unknown work order '{order}'. Expected one of {WORK_ORDERS}.")
+        if order == "strategy":
+            return [WorkUnit(name, strategy, item)
+                    for name, strategy in strategies for item in items]
+
+        units = [WorkUnit(name, strategy, item) for item in items for name, strategy in strategies]
+        if order == "prefix":
+            units.sort(key=self._prefix_key)
+        return units
+
+    @staticmethod
+    def _static_prefix(unit: WorkUnit) -> Optional[str]:
+        prefix = getattr(unit.strategy, 'static_prefix', None)
+        return prefix if isinstance(prefix, str) and prefix else None
+
+    @classmethod
+    def _prefix_key(cls, unit: WorkUnit) -> Tuple[int, str, str]:
+        prefix = cls._static_prefix(unit)
+        if prefix is not None:
+            # Stable sort keeps item order within a declared prefix group.
+            return (0, prefix, "")
+        if not hasattr(unit.strategy, 'build_prompt'):
+            return (2, "", "")
+        request = unit.strategy.build_prompt(unit.item)
+        return (1, request.get('system') or "", request['prompt'])
+
+    def _build_lanes(self, units: List[WorkUnit], order: str) -> List[List[WorkUnit]]:
+        """
+        Splits the work queue into lanes; each lane runs serially on one worker.
+
+        In "prefix" order, units whose strategy declares the same static_prefix
+        share lanes of up to config.experiment.prefix_lane_size, so their
+        requests reach the server back-to-back over one connection and reuse
+        the prefix's KV cache. Every other unit is a lane of its own.
+        """
+        if order != "prefix":
+            return [[unit] for unit in units]
+        groups: Dict[str, List[WorkUnit]] = {}
+        singles = []
+        for unit in units:
+            prefix = self._static_prefix(unit)
+            if prefix is None:
+                singles.append([unit])
+            else:
+                groups.setdefault(prefix, []).append(unit)
+        size = config.experiment.prefix_lane_size
+        lanes = [group[i:i + size] for group in groups.values() for i in range(0, len(group), size)]
+        # Long lanes start first so they do not end up on the critical path.
+        return lanes + singles
+
+    def _execute_unit(self, unit: WorkUnit) -> UnitOutcome:
+        """Generates one unit, returning (unscored result, busy seconds, error)."""
+        start = time.perf_counter()
+        try:
+            result = self._generate_single_item(unit.item, unit.strategy_name, unit.strategy)
+            return result, time.perf_counter() - start, None
+        except Exception as e:
+            return None, time.perf_counter() - start, e
+
+    def _collect(self, unit: WorkUnit, outcome: UnitOutcome, progress: RunProgress,
+                 scorer: ScoringStage, failed: List[Dict[str, Any]]) -> None:
+        result, busy, error = outcome
+        if error is not None:
+            logger.error(f"Error processing item for strategy {unit.strategy_name}: {error}")
+            failed.append(self._failed_result(unit, error, busy))
+        else:
+            scorer.submit(result)
+        if progress.record(unit.strategy_name, busy, ok=error is None):
+            logger.info(
+                f"Strategy {unit.strategy_name} finished: {progress.completed[unit.strategy_name]}"
+                f"/{progress.totals[unit.strategy_name]} items "
+                f"({progress.failed[unit.strategy_name]} failed)"
+            )
+
+    def _run_threaded(self, lanes: List[List[WorkUnit]], progress: RunProgress, max_workers: int,
+                      scorer: ScoringStage, failed: List[Dict[str, Any]],
+                      controller: Optional[AIMDController] = None) -> None:
+        tqdm, = resolve(__name__, "tqdm")
+        finished: "queue.Queue[Tuple[WorkUnit, UnitOutcome]]" = queue.Queue()
+        limiter = AdaptiveLimiter(controller) if controller is not None else None
+
+        def run_lane(lane: List[WorkUnit]) -> None:
+            for unit in lane:
+                if limiter is None:
+                    finished.put((unit, self._execute_unit(unit)))
+                    continue
+                limiter.acquire()
+                outcome = self._execute_unit(unit)
+                limiter.release(*self._concurrency_feedback(outcome))
+                finished.put((unit, outcome))
+
+        total = sum(len(lane) for lane in lanes)
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            for name, strategy_instance in strategies:
-                logger.info(f"Running strategy: {name}")
-                
-                # Submit all tasks for this strategy
-                future_to_item = {
-                    executor.submit(self._process_single_item, item, name, strategy_instance): item 
-                    for item in self.dataset
-                }
-                
-                for future in tqdm(as_completed(future_to_item), total=len(self.dataset), desc=name):
-                    try:
-                        result = future.result()
-                        results.append(result)
-                    except Exception as e:
-                        logger.error(f"Error processing item for strategy {name}: {e}")
+            for lane in lanes:
+                executor.submit(run_lane, lane)
+            for _ in tqdm(range(total), desc="Experiments"):
+                unit, outcome = finished.get()
+                self._collect(unit, outcome, progress, scorer, failed)
 
-        df = pd.DataFrame(results)
-        self._save_results(df)
-        return df
+    async def _run_async(self, lanes: List[List[WorkUnit]], progress: RunProgress,
+                         max_in_flight: int, scorer: ScoringStage, failed: List[Dict[str, Any]],
+                         controller: Optional[AIMDController] = None) -> None:
+        """Runs every lane as a coroutine on one event loop."""
+        async_llm = AsyncOllamaClient.from_client(self.llm, max_in_flight=max_in_flight)
+        finished: "asyncio.Queue[Tuple[WorkUnit, UnitOutcome]]" = asyncio.Queue()
+        limiter = AsyncAdaptiveLimiter(controller) if controller is not None else None
+
+        async def execute(unit: WorkUnit) -> UnitOutcome:
+            start = time.perf_counter()
+            try:
+                result = await self._generate_single_item_async(
+                    unit.item, unit.strategy_name, unit.strategy, async_llm
+                )
+                return result, time.perf_counter() - start, None
+            except Exception as e:
+                return None, time.perf_counter() - start, e
+
+        async def run_lane(lane: List[WorkUnit]) -> None:
+            for unit in lane:
+                if limiter is None:
+                    finished.put_nowait((unit, await execute(unit)))
+                    continue
+                await limiter.acquire()
+                outcome = await execute(unit)
+                await limiter.release(*self._concurrency_feedback(outcome))
+                finished.put_nowait((unit, outcome))
 
-    def _process_single_item(self, item: Dict[str, str], strategy_name: str, strategy_instance: Any) -> Dict[str, Any]:
-        """Process a single item with the given strategy."""
-        start_time = time.time()
+        tasks = []
+        try:
+            tqdm, = resolve(__name__, "tqdm")
+            tasks = [asyncio.ensure_future(run_lane(lane)) for lane in lanes]
+            total = sum(len(lane) for lane in lanes)
+            with tqdm(total=total, desc="Experiments (async)") as bar:
+                for _ in range(total):
+                    unit, outcome = await finished.get()
+                    self._collect(unit, outcome, progress, scorer, failed)
+                    bar.update(1)
+            logger.info(f"Peak in-flight requests: {async_llm.scheduler.peak_in_flight}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await async_llm.aclose()
+
+    def _generate_single_item(self, item: Dict[str, str], strategy_name: str,
+                              strategy_instance: Any) -> Dict[str, Any]:
+        """Generates a response for a single item; the result is left unscored."""
+        clear_generation_stats()
+        start_time = time.perf_counter()
         response = strategy_instance.execute(item, self.llm)
-        elapsed = time.time() - start_time
-        
-        distance = self.evaluator.evaluate(response, item['answer'])
-        
-        return {
+        elapsed = time.perf_counter() - start_time
+        return self._build_result(item, strategy_name, response, elapsed)
+
+    async def _generate_single_item_async(self, item: Dict[str, str], strategy_name: str,
+                                          strategy_instance: Any,
+                                          async_llm: AsyncOllamaClient) -> Dict[str, Any]:
+        """Async variant of _generate_single_item."""
+        clear_generation_stats()
+        start_time = time.perf_counter()
+        if hasattr(strategy_instance, 'aexecute'):
+            response = await strategy_instance.aexecute(item, async_llm)
+        elif hasattr(strategy_instance, 'build_prompt'):
+            response = await async_llm.generate(**strategy_instance.build_prompt(item))
+        else:
+            # Strategies without a declarative prompt fall back to the blocking client.
+            response, stats = await asyncio.to_thread(self._execute_blocking, item,
+                                                      strategy_instance)
+            record_generation_stats(stats)
+        elapsed = time.perf_counter() - start_time
+        return self._build_result(item, strategy_name, response, elapsed)
+
+    def _execute_blocking(self, item: Dict[str, str],
+                          strategy_instance: Any) -> Tuple[str, Optional[GenerationStats]]:
+        # Runs in a worker thread's copied context, so its stats are carried back explicitly.
+        clear_generation_stats()
+        response = strategy_instance.execute(item, self.llm)
+        return response, last_generation_stats()
+
+    def _model_name(self) -> Optional[str]:
+        """The evaluated model, which is part of every unit key so a resume never mixes models."""
+        model = getattr(self.llm, 'model', None)
+        return model if isinstance(model, str) else None
+
+    def _build_result(self, item: Dict[str, str], strategy_name: str, response: Optional[str],
+                      elapsed: float) -> Dict[str, Any]:
+        """Builds a result row; generation timing comes from the client's last call here."""
+        stats = last_generation_stats()
+        model = self._model_name()
+        timings = stats.to_dict() if stats is not None else {}
+        result = {
+            "run_id": self.run_id,
+            "unit_key": unit_key(strategy_name, item, model),
+            "model": model,
             "strategy": strategy_name,
             "question": item['question'],
             "ground_truth": item['answer'],
+            "label": item.get('label'),
             "model_output": response,
-            "vector_distance": distance,
-            "latency": elapsed
+            "vector_distance": math.nan,
+            "latency": elapsed,
+            "status": "ok",
+            "error": None
         }
+        for column in GENERATION_METRICS:
+            value = timings.get(column)
+            result[column] = math.nan if value is None else value
+        return result
+
+    def _failed_result(self, unit: WorkUnit, error: Exception, elapsed: float) -> Dict[str, Any]:
+        """A row for a unit whose generation failed; it carries no output and is never scored."""
+        clear_generation_stats()
+        result = self._build_result(unit.item, unit.strategy_name, None, elapsed)
+        result['status'] = "failed"
+        result['error'] = f"{type(error).__name__}: {error}"
+        return result
 
-    def _save_results(self, df: pd.DataFrame):
+    def _save_results(self, df: 'pd.DataFrame'):
         """Saves results to configured path."""
-        config.paths.results.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(config.paths.results, index=False)
-        logger.info(f"Results saved to {config.paths.results}")
+        save_results(df, config.paths.results, config.experiment.output_format)
+
+def save_results(df: 'pd.DataFrame', path: Path, fmt: str = "csv") -> Path:
+    """
+    Writes a results frame in one of RESULT_FORMATS.
+
+    The file suffix follows the format, so "results/experiments.csv" becomes
+    "results/experiments.parquet" for Parquet output. "dataset" adds the rows
+    to the partitioned ResultStore in "results/experiments/" instead of
+    overwriting a file, keeping the history of earlier runs.
+    """
+    if fmt not in RESULT_FORMATS:
+        raise ValueError(f"Unknown output format '{fmt}'. Expected one of {RESULT_FORMATS}.")
+    path = results_location(path, fmt)
+    if fmt == "dataset":
+        ResultStore(path).write(df)
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "jsonl":
+        df.to_json(path, orient="records", lines=True)
+    else:
+        df.to_parquet(path, index=False)
+    logger.info(f"Results saved to {path}")
+    return path
 
 if __name__ == "__main__":
     # Setup logging
@@ -5,15 +5,21 @@ import argparse
 import logging
 import os
 import sys
-from typing import Optional
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
 
 # Add project root to path to allow running as a script
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.analysis import ResultAnalyzer
 from src.config.config import config
-from src.experiment_runner import ExperimentRunner
+from src.core.registry import cache_registry, strategy_registry
+from src.experiment_runner import EXECUTION_MODES, RESULT_FORMATS, ExperimentRunner, save_results
 from src.utils.llm_client import OllamaClient, start_ollama_server
+from src.utils.load_balancer import BALANCING_POLICIES
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,16 +27,157 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def parse_args():
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value}")
+    return number
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Prompt Engineering Analysis Experiment Runner",
-        epilog="Use this CLI to run experiments with different LLM models and prompting strategies."
+        epilog="Use this CLI to run experiments with different LLM models and prompting "
+               "strategies. Any flag left out falls back to config/settings.yaml."
+    )
+    parser.add_argument(
+        "-m", "--model", dest="models", action="append", metavar="MODEL",
+        help="Model to evaluate; repeat to run several models one after another."
+    )
+    parser.add_argument(
+        "-s", "--strategies", nargs="+", metavar="NAME", choices=strategy_registry.list_all(),
+        help="Strategies to run (default: all registered). Use --list-strategies to see names."
+    )
+    parser.add_argument(
+        "--list-strategies", action="store_true",
+        help="Print registered strategies and exit."
+    )
+    parser.add_argument(
+        "--host", dest="hosts", action="append", metavar="URL",
+        help="Ollama host; repeat to balance requests across several hosts."
+    )
+    parser.add_argument(
+        "--balancing", choices=BALANCING_POLICIES,
+        help="How requests are spread over hosts."
+    )
+    parser.add_argument(
+        "-n", "--dataset-size", type=_positive_int,
+        help="Number of generated syllogisms."
+    )
+    parser.add_argument(
+        "--dataset", type=Path, metavar="FILE",
+        help="Stream items from a JSONL/Parquet/JSON dataset file instead of generating them."
+    )
+    parser.add_argument("-w", "--workers", type=_positive_int, help="Worker threads (thread mode).")
+    parser.add_argument("--mode", choices=EXECUTION_MODES, help="Execution mode.")
+    parser.add_argument(
+        "--max-in-flight", type=_positive_int,
+        help="Concurrent requests (async mode)."
+    )
+    parser.add_argument(
+        "--adaptive-concurrency", action="store_true",
+        help="Tune concurrency at runtime from latency and errors; "
+             "--workers/--max-in-flight set the start."
+    )
+    parser.add_argument(
+        "--early-stopping", action="store_true",
+        help="Run items in rounds and stop evaluating strategies clearly worse than another."
+    )
+    parser.add_argument(
+        "--scoring", choices=("embedding", "tiered"),
+        help="Embed every response, or label-match all and embed only ambiguous ones and a sample."
+    )
+    parser.add_argument(
+        "--embedding-server", metavar="SOCKET",
+        help="Encode via a running embedding server."
+    )
+    parser.add_argument(
+        "--cache-backend", choices=cache_registry.list_all(),
+        help="LLM response cache backend."
+    )
+    parser.add_argument("--output-format", choices=RESULT_FORMATS, help="Results file format.")
+    parser.add_argument(
+        "-o", "--output", type=Path,
+        help="Results file path (suffix follows the format)."
+    )
+    parser.add_argument(
+        "--no-report", action="store_true",
+        help="Skip the analysis report and figures."
+    )
+    parser.add_argument(
+        "--preview", action="store_true",
+        help="Render report figures quickly at low resolution."
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--significance", action="store_true",
+        help="Add confidence intervals and pairwise tests to the report (reads every row)."
+    )
+    parser.add_argument(
+        "--non-interactive", action="store_true",
+        help="Never prompt; use --model or the configured model. Implied when stdin is not a TTY."
+    )
+    parser.add_argument(
+        "--resume", nargs="?", const="latest", default=None, metavar="RUN_ID",
+        help="Resume an interrupted run, skipping checkpointed work units "
+             "(default: the latest run)."
+    )
+    args = parser.parse_args(argv)
+    if args.resume and args.models and len(args.models) > 1:
+        parser.error("--resume can only be used with a single model.")
+    return args
+
+def apply_overrides(args: argparse.Namespace) -> None:
+    """Applies CLI flags on top of the loaded configuration."""
+    if args.hosts:
+        config.llm.base_urls = args.hosts
+    if args.balancing is not None:
+        config.llm.balancing = args.balancing
+    if args.dataset_size is not None:
+        config.experiment.dataset_size = args.dataset_size
+    if args.dataset is not None:
+        config.experiment.dataset_path = args.dataset
+    if args.mode is not None:
+        config.experiment.execution_mode = args.mode
+    if args.max_in_flight is not None:
+        config.experiment.max_in_flight = args.max_in_flight
+    if args.adaptive_concurrency:
+        config.experiment.adaptive_concurrency = True
+    if args.early_stopping:
+        config.experiment.early_stopping = True
+    if args.scoring is not None:
+        config.experiment.scoring = args.scoring
+    if args.embedding_server is not None:
+        config.experiment.embedding_server = args.embedding_server
+    if args.cache_backend is not None:
+        config.cache.backend = args.cache_backend
+    if args.output_format is not None:
+        config.experiment.output_format = args.output_format
+    if args.output is not None:
+        config.paths.results = args.output
+    if args.significance:
+        config.analysis.significance = True
 
 def setup_environment() -> Optional[OllamaClient]:
     """Checks and sets up the Ollama environment."""
-    client = OllamaClient(base_url=config.llm.base_url)
+    client = OllamaClient(
+        model=config.llm.model,
+        temperature=config.llm.temperature,
+        base_url=config.llm.base_url,
+        cache_dir=str(config.cache.dir),
+        cache_backend=config.cache.backend,
+        cache_max_entries=config.cache.memory_max_entries,
+        cache_max_bytes=config.cache.memory_max_bytes,
+        cache_ttl=config.cache.memory_ttl_seconds,
+        stream=config.llm.stream,
+        keep_alive=config.llm.keep_alive,
+        base_urls=config.llm.hosts,
+        balancing=config.llm.balancing,
+        health_check_interval=config.llm.health_check_interval,
+        timeout=config.llm.timeout,
+        max_retries=config.llm.max_retries,
+        retry_backoff=config.llm.retry_backoff,
+        circuit_failure_threshold=config.llm.circuit_failure_threshold,
+        circuit_reset_seconds=config.llm.circuit_reset_seconds
+    )
     if not client.check_connection():
         logger.warning("Ollama is not reachable.")
         if not start_ollama_server():
@@ -38,17 +185,21 @@ def setup_environment() -> Optional[OllamaClient]:
              return None
     return client
 
-def select_model(client: OllamaClient) -> None:
-    """Interactively selects the LLM model."""
+def select_model(client: OllamaClient, interactive: bool = True) -> None:
+    """Selects the LLM model, prompting only when interactive."""
     available_models = client.list_models()
     if not available_models:
         logger.error("No models found in Ollama. Please run `ollama pull <model>` to install one.")
         sys.exit(1)
-        
+
+    if not interactive:
+        logger.info(f"Using configured model: {config.llm.model}")
+        return
+
     logger.info("Available Models:")
     for i, model in enumerate(available_models):
         logger.info(f"{i + 1}. {model}")
-        
+
     try:
         # We still use input() for interaction, but log the prompt context
         logger.info(f"Prompting user for model selection (default: {config.llm.model})")
@@ -66,45 +217,94 @@ def select_model(client: OllamaClient) -> None:
     except ValueError:
         logger.warning("Invalid input. Using default model.")
 
-def run_experiments(client: OllamaClient) -> None:
-    """Instantiates dependencies and runs experiments."""
+def resolve_models(client: OllamaClient, requested: Optional[List[str]],
+                   interactive: bool) -> List[str]:
+    """Returns the models to run, validating explicitly requested ones against the server."""
+    if not requested:
+        select_model(client, interactive=interactive)
+        return [config.llm.model]
+
+    available = client.list_models()
+    missing = [model for model in requested
+               if model not in available and f"{model}:latest" not in available]
+    if missing:
+        logger.error(f"Models not installed in Ollama: {missing}. Available: {available}")
+        sys.exit(1)
+    return requested
+
+def run_experiments(client: OllamaClient, resume: Optional[str] = None,
+                    workers: Optional[int] = None,
+                    strategies: Optional[List[str]] = None) -> 'pd.DataFrame':
+    """Instantiates dependencies and runs experiments for the client's model."""
     try:
         from src.utils.data_generator import SyllogismGenerator
         from src.utils.metrics import SimilarityEvaluator
-        
+
         # Instantiate dependencies
-        evaluator = SimilarityEvaluator(model_name=config.experiment.embedding_model)
+        evaluator = SimilarityEvaluator(
+            model_name=config.experiment.embedding_model,
+            cache_size=config.cache.embedding_max_entries,
+            cache_dir=config.cache.embedding_dir,
+            server_socket=config.experiment.embedding_server
+        )
         generator = SyllogismGenerator(seed=config.experiment.seed)
-        
+
         # Inject dependencies
-        runner = ExperimentRunner(llm_client=client, evaluator=evaluator, generator=generator)
-        runner.run_all_experiments()
+        runner = ExperimentRunner(llm_client=client, evaluator=evaluator, generator=generator,
+                                  strategies=strategies)
+        run_id = None if resume in (None, "latest") else resume
+        try:
+            return runner.run_all_experiments(max_workers=workers, run_id=run_id,
+                                              resume=bool(resume), save=False)
+        finally:
+            # The pooled embedding model stays loaded for the next model's run.
+            evaluator.close()
     except Exception as e:
         logger.error(f"Experiment execution failed: {e}")
         sys.exit(1)
 
-def generate_report() -> None:
+def generate_report(results_path: Optional[Path] = None, run_ids: Optional[List[str]] = None,
+                    preview: bool = False) -> None:
     """Analyzes results and generates a report."""
     try:
-        analyzer = ResultAnalyzer()
+        analyzer = ResultAnalyzer(results_path=results_path, run_ids=run_ids, preview=preview)
         analyzer.generate_report()
     except Exception as e:
         logger.error(f"Analysis failed: {e}")
         sys.exit(1)
 
-def main():
-    _ = parse_args()
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if args.list_strategies:
+        print("\n".join(strategy_registry.list_all()))
+        return
+
+    apply_overrides(args)
     logger.info("Starting Prompt Engineering Analysis Project")
-    
+
     client = setup_environment()
     if not client:
         sys.exit(1)
-    
-    select_model(client)
-    run_experiments(client)
-    generate_report()
+
+    interactive = not args.non_interactive and sys.stdin.isatty()
+    frames = []
+    for model in resolve_models(client, args.models, interactive):
+        logger.info(f"Running experiments with model: {model}")
+        config.llm.model = model
+        client.model = model
+        frames.append(run_experiments(client, resume=args.resume, workers=args.workers,
+                                      strategies=args.strategies))
+
+    import pandas as pd
+
+    results = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    results_path = save_results(results, config.paths.results, config.experiment.output_format)
+    if not args.no_report:
+        # A results store keeps every run; report on the ones from this invocation.
+        run_ids = results['run_id'].dropna().unique().tolist() if 'run_id' in results else None
+        generate_report(results_path, run_ids or None, preview=args.preview)
 
     logger.info("Project workflow completed successfully.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
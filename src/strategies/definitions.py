@@ -1,24 +1,42 @@
-from typing import Any, Dict, List
+import asyncio
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 from src.core.registry import strategy_registry
+from src.utils.labels import extract_label
+from src.utils.llm_client import (
+    clear_generation_stats,
+    last_generation_stats,
+    record_generation_stats,
+)
 
 
 @strategy_registry.register("Baseline (Zero-Shot)")
 class BaselineStrategy:
     name = "Baseline (Zero-Shot)"
     description = "Raw prompt, no system message."
+    static_prefix = None
+
+    def build_prompt(self, item: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        return {"prompt": item['question'], "system": None}
 
     def execute(self, item: Dict[str, Any], llm_client: Any) -> str:
-        return llm_client.generate(prompt=item['question'])
+        return llm_client.generate(**self.build_prompt(item))
 
 @strategy_registry.register("Basic Prompting")
 class BasicStrategy:
     name = "Basic Prompting"
     description = "With specific system message."
+    system_msg = "You are a logic expert. Answer the following syllogism question clearly and concisely. Start with 'Yes' or 'No'."
+    # The system message is rendered ahead of the prompt, so every request shares it.
+    static_prefix = system_msg
+
+    def build_prompt(self, item: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        return {"prompt": item['question'], "system": self.system_msg}
 
     def execute(self, item: Dict[str, Any], llm_client: Any) -> str:
-        system_msg = "You are a logic expert. Answer the following syllogism question clearly and concisely. Start with 'Yes' or 'No'."
-        return llm_client.generate(prompt=item['question'], system=system_msg)
+        return llm_client.generate(**self.build_prompt(item))
 
 @strategy_registry.register("Few-Shot")
 class FewShotStrategy:
@@ -27,36 +45,135 @@ class FewShotStrategy:
 
     def __init__(self, examples: List[Dict[str, str]]):
         self.examples = examples
+        # Rendered once; identical for every item, so the server can reuse its KV cache.
+        self.static_prefix = "Here are some examples of logic puzzles:\n\n" + "".join(
+            f"{ex['question']}\nAnswer: {ex['answer']}\n\n" for ex in examples
+        )
+
+    def build_prompt(self, item: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        prompt = f"{self.static_prefix}Now solve this one:\n{item['question']}\nAnswer:"
+        return {"prompt": prompt, "system": None}
 
     def execute(self, item: Dict[str, Any], llm_client: Any) -> str:
-        prompt = "Here are some examples of logic puzzles:\n\n"
-        for ex in self.examples:
-            prompt += f"{ex['question']}\nAnswer: {ex['answer']}\n\n"
-        
-        prompt += f"Now solve this one:\n{item['question']}\nAnswer:"
-        return llm_client.generate(prompt=prompt)
+        return llm_client.generate(**self.build_prompt(item))
 
 @strategy_registry.register("Chain of Thought")
 class CoTStrategy:
     name = "Chain of Thought"
     description = "Chain of Thought prompting."
+    static_prefix = None
 
-    def execute(self, item: Dict[str, Any], llm_client: Any) -> str:
+    def build_prompt(self, item: Dict[str, Any]) -> Dict[str, Optional[str]]:
         prompt = f"{item['question']}\nLet's think step by step to derive the correct answer."
-        return llm_client.generate(prompt=prompt)
+        return {"prompt": prompt, "system": None}
+
+    def execute(self, item: Dict[str, Any], llm_client: Any) -> str:
+        return llm_client.generate(**self.build_prompt(item))
 
 @strategy_registry.register("Self-Consistency")
 class SelfConsistencyStrategy:
     name = "Self-Consistency"
-    description = "Generates multiple CoT paths and selects the most frequent answer (Simulated with single path for now)."
+    description = "Samples several CoT paths and returns the majority Yes/No answer."
+    static_prefix = None
 
-    def execute(self, item: Dict[str, Any], llm_client: Any) -> str:
-        # In a full implementation, we would generate k samples. 
-        # For this prototype, we emphasize the instruction to be robust.
+    def __init__(self, samples: int = 5, temperature: float = 0.7,
+                 parallelism: Optional[int] = None, base_seed: int = 0):
+        if samples < 1:
+            raise ValueError("Self-Consistency needs at least one sample.")
+        if temperature <= 0:
+            raise ValueError("Self-Consistency sampling needs a temperature above 0.")
+        self.samples = samples
+        self.temperature = temperature
+        self.parallelism = parallelism
+        self.base_seed = base_seed
+
+    def build_prompt(self, item: Dict[str, Any]) -> Dict[str, Optional[str]]:
         prompt = (
             f"{item['question']}\n"
             "Think through this step-by-step. "
             "Double check your reasoning to ensure it is absolutely correct. "
             "Answer:"
         )
-        return llm_client.generate(prompt=prompt)
+        return {"prompt": prompt, "system": None}
+
+    def budget(self, item: Dict[str, Any]) -> int:
+        """Samples allowed for an item; ``sample_budget`` on the item overrides the default."""
+        return max(1, int(item.get('sample_budget', self.samples)))
+
+    def _wave_size(self, budget: int, drawn: int) -> int:
+        # The first wave draws just enough samples to form a majority on its own.
+        width = self.parallelism or (budget // 2 + 1)
+        return min(width, budget - drawn)
+
+    def execute(self, item: Dict[str, Any], llm_client: Any) -> str:
+        request = self.build_prompt(item)
+        budget = self.budget(item)
+        votes = _Votes()
+        with ThreadPoolExecutor(max_workers=self._wave_size(budget, 0)) as pool:
+            while votes.drawn < budget and not votes.settled(budget):
+                seeds = range(self.base_seed + votes.drawn,
+                              self.base_seed + votes.drawn + self._wave_size(budget, votes.drawn))
+                futures = [pool.submit(self._sample, llm_client, request, seed) for seed in seeds]
+                for future in futures:
+                    votes.add(*future.result())
+        return votes.winner()
+
+    def _sample(self, llm_client: Any, request: Dict[str, Optional[str]],
+                seed: int) -> Tuple[str, Any]:
+        # Samples run on pool threads, so their stats are carried back explicitly.
+        clear_generation_stats()
+        response = llm_client.generate(**request, temperature=self.temperature, seed=seed)
+        return response, last_generation_stats()
+
+    async def _asample(self, async_llm: Any, request: Dict[str, Optional[str]],
+                       seed: int) -> Tuple[str, Any]:
+        response = await async_llm.generate(**request, temperature=self.temperature, seed=seed)
+        return response, last_generation_stats()
+
+    async def aexecute(self, item: Dict[str, Any], async_llm: Any) -> str:
+        """Async variant of execute for the runner's asyncio mode."""
+        request = self.build_prompt(item)
+        budget = self.budget(item)
+        votes = _Votes()
+        while votes.drawn < budget and not votes.settled(budget):
+            seeds = range(self.base_seed + votes.drawn,
+                          self.base_seed + votes.drawn + self._wave_size(budget, votes.drawn))
+            samples = await asyncio.gather(*(self._asample(async_llm, request, seed)
+                                             for seed in seeds))
+            for response, stats in samples:
+                votes.add(response, stats)
+        return votes.winner()
+
+
+class _Votes:
+    """Yes/No tally over Self-Consistency samples."""
+
+    def __init__(self) -> None:
+        self.counts: Counter = Counter()
+        self.first_response: Dict[Optional[str], Tuple[str, Any]] = {}
+        self.drawn = 0
+
+    def add(self, response: str, stats: Any = None) -> None:
+        label = extract_label(response)
+        self.counts[label] += 1
+        self.first_response.setdefault(label, (response, stats))
+        self.drawn += 1
+
+    def _ranked(self) -> List[Tuple[str, int]]:
+        return [(label, n) for label, n in self.counts.most_common() if label is not None]
+
+    def settled(self, budget: int) -> bool:
+        """True once the leading label cannot be caught by the samples still to be drawn."""
+        ranked = self._ranked()
+        if not ranked:
+            return False
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0
+        return ranked[0][1] - runner_up > budget - self.drawn
+
+    def winner(self) -> str:
+        """Returns the first response carrying the majority label and publishes its stats."""
+        ranked = self._ranked()
+        # With no parseable label, fall back to the first response.
+        response, stats = self.first_response[ranked[0][0] if ranked else None]
+        record_generation_stats(stats)
+        return response
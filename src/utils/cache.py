@@ -0,0 +1,509 @@
+"""
+Persistent response cache backends for the LLM client.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.core.interfaces import CacheBackend
+from src.core.registry import cache_registry
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LEGACY_CACHE_FILE = "llm_cache.json"
+
+
+def _load_legacy_cache(cache_dir: Path) -> Dict[str, str]:
+    """Reads the old single-file JSON cache so existing entries survive the switch."""
+    legacy_file = cache_dir / LEGACY_CACHE_FILE
+    if not legacy_file.exists():
+        return {}
+    try:
+        with open(legacy_file, 'r') as f:
+            data = json.load(f)
+        logger.info(f"Migrating {len(data)} entries from legacy cache {legacy_file}")
+        return {str(k): str(v) for k, v in data.items()}
+    except Exception as e:
+        logger.warning(f"Failed to read legacy cache: {e}")
+        return {}
+
+
+@cache_registry.register("log")
+class AppendLogCache:
+    """
+    Append-only JSON-lines log with an in-memory key -> (offset, length) index.
+
+    Every miss costs a single appended line, so writes are O(1) regardless of
+    cache size. Appends take an advisory file lock so several processes can
+    share one log; a torn trailing line from a crash is skipped on load.
+    Superseded records are dropped by a compaction pass that runs on a
+    background thread once the log grows past ``compact_ratio`` times the
+    number of live keys.
+    """
+
+    name = "log"
+
+    def __init__(self, cache_dir: Path, filename: str = "llm_cache.jsonl",
+                 compact_ratio: float = 2.0, compact_min_records: int = 1000):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.cache_dir / filename
+        self.lock_path = self.cache_dir / f"{filename}.lock"
+        self.compact_ratio = compact_ratio
+        self.compact_min_records = compact_min_records
+
+        self._lock = threading.RLock()
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._loaded = False
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._records = 0
+        self._compactor: Optional[threading.Thread] = None
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool = True) -> Iterator[None]:
+        """Advisory inter-process lock; a no-op where fcntl is unavailable."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if not self.path.exists():
+                with self._file_lock():
+                    # Another process may have migrated while we waited for the lock.
+                    if not self.path.exists():
+                        legacy = _load_legacy_cache(self.cache_dir)
+                        if legacy:
+                            os.replace(self._write_temp(legacy), self.path)
+            self._reload()
+            self._loaded = True
+
+    def _reload(self) -> None:
+        """Rebuilds the index from scratch."""
+        self._index.clear()
+        self._offset = 0
+        self._records = 0
+        self._inode = None
+        self._scan()
+
+    def _scan(self) -> None:
+        """Indexes complete records appended since the last scan (possibly by other processes)."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return
+        if self._inode is not None and (stat.st_ino != self._inode or stat.st_size < self._offset):
+            # Another process compacted the log underneath us.
+            self._reload()
+            return
+        self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            offset = self._offset
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Incomplete trailing record, still being written or torn.
+                try:
+                    record = json.loads(line)
+                    self._index[record["k"]] = (offset, len(line))
+                    self._records += 1
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"Skipping corrupt cache record at offset {offset}")
+                offset += len(line)
+            self._offset = offset
+
+    def _read_value(self, key: str, offset: int, length: int) -> Optional[str]:
+        """The value of key's record at offset, or None if that record is not key's."""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                record = json.loads(f.read(length))
+            if record["k"] != key:
+                return None
+            return record["v"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached value for key, or None."""
+        self._ensure_loaded()
+        with self._lock:
+            # Stat on every lookup: a compaction elsewhere replaces the file and moves every offset.
+            self._scan()
+            location = self._index.get(key)
+            if location is None:
+                return None
+            value = self._read_value(key, *location)
+            if value is None:
+                # The file changed between the stat and the read; rebuild the index and retry once.
+                self._reload()
+                location = self._index.get(key)
+                value = self._read_value(key, *location) if location is not None else None
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        """Appends a record for key."""
+        self._ensure_loaded()
+        line = (json.dumps({"k": key, "v": value}) + "\n").encode()
+        with self._lock, self._file_lock():
+            # Pick up foreign appends first so our offset bookkeeping stays exact.
+            self._scan()
+            with open(self.path, 'ab') as f:
+                start = f.tell()
+                if start and start != self._offset:
+                    # A crashed writer left a torn record; terminate it before appending.
+                    f.write(b"\n")
+                    start += 1
+                f.write(line)
+            self._index[key] = (start, len(line))
+            self._offset = start + len(line)
+            self._inode = self.path.stat().st_ino
+            self._records += 1
+        self._maybe_compact()
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._index)
+
+    def _maybe_compact(self) -> None:
+        if self._records < self.compact_min_records:
+            return
+        if self._records <= self.compact_ratio * len(self._index):
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, name="cache-compactor", daemon=True)
+        self._compactor.start()
+
+    def _write_temp(self, entries: Dict[str, str]) -> str:
+        """Writes one record per entry to a fresh temporary file next to the log."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{self.path.name}.",
+                                        suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            for key, value in entries.items():
+                f.write((json.dumps({"k": key, "v": value}) + "\n").encode())
+            f.flush()
+            os.fsync(f.fileno())
+        return tmp_path
+
+    def compact(self) -> None:
+        """Rewrites the log keeping only the latest record for each key."""
+        self._ensure_loaded()
+        tmp_path = None
+        try:
+            with self._lock:
+                self._scan()
+                index, inode = dict(self._index), self._inode
+                end, before = self._offset, self._records
+
+            # Gather live values in one sequential pass while gets and sets carry on.
+            live = {offset: key for key, (offset, _) in index.items()}
+            entries = {}
+            with open(self.path, 'rb') as f:
+                if os.fstat(f.fileno()).st_ino != inode:
+                    return  # Compacted by another process meanwhile.
+                offset = 0
+                for line in f:
+                    if offset >= end:
+                        break
+                    key = live.get(offset)
+                    if key is not None:
+                        try:
+                            entries[key] = json.loads(line)["v"]
+                        except (ValueError, KeyError, TypeError):
+                            pass
+                    offset += len(line)
+            tmp_path = self._write_temp(entries)
+
+            with self._lock, self._file_lock():
+                self._scan()
+                if self._inode != inode:
+                    return
+                # Records appended since the snapshot go after it, so they still win on load.
+                tail = sorted(location for location in self._index.values() if location[0] >= end)
+                if tail:
+                    with open(self.path, 'rb') as f, open(tmp_path, 'ab') as out:
+                        for offset, length in tail:
+                            f.seek(offset)
+                            out.write(f.read(length))
+                        out.flush()
+                        os.fsync(out.fileno())
+                os.replace(tmp_path, self.path)
+                tmp_path = None
+                self._reload()
+            logger.info(f"Compacted LLM cache from {before} to {self._records} records")
+        except Exception as e:
+            logger.warning(f"Cache compaction failed: {e}")
+        finally:
+            if tmp_path is not None:
+                Path(tmp_path).unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """Waits for a running compaction to finish."""
+        if self._compactor is not None:
+            self._compactor.join()
+
+
+@cache_registry.register("sqlite")
+class SQLiteCache:
+    """
+    SQLite store in WAL mode.
+
+    Each thread gets its own connection; WAL lets readers proceed while another
+    thread or process writes, and SQLite's own locking serialises writers.
+    Connections are also tracked centrally so close() can release all of them.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, cache_dir: Path, filename: str = "llm_cache.sqlite", timeout: float = 30.0):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.cache_dir / filename
+        self.timeout = timeout
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Only the owning thread uses it; close() may run on another thread
+            conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._connections_lock:
+                self._connections.append(conn)
+            self._local.conn = conn
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self._initialize(conn)
+                    self._initialized = True
+        return conn
+
+    def _initialize(self, conn: sqlite3.Connection) -> None:
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+        count = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if count == 0:
+            legacy = _load_legacy_cache(self.cache_dir)
+            if legacy:
+                with conn:
+                    conn.executemany("INSERT OR IGNORE INTO cache VALUES (?, ?)", legacy.items())
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached value for key, or None."""
+        row = self._connection().execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        """Inserts or replaces the value for key."""
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO cache VALUES (?, ?)", (key, value))
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def compact(self) -> None:
+        """Folds the write-ahead log back into the main database file."""
+        self._connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self) -> None:
+        """Closes the connections of every thread; later calls reconnect."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        for conn in connections:
+            conn.close()
+
+
+@dataclass
+class CacheStats:
+    """Counters for the in-memory tier and the persistent store behind it."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    backend_hits: int = 0
+    backend_misses: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = asdict(self)
+        lookups = self.hits + self.misses
+        data["hit_rate"] = self.hits / lookups if lookups else 0.0
+        return data
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU bounded by entry count and by total value bytes.
+
+    Entries older than ``ttl_seconds`` are treated as misses and dropped.
+    """
+
+    def __init__(self, max_entries: Optional[int] = 10000,
+                 max_bytes: Optional[int] = 64 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.stats = CacheStats()
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[str, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _size_of(value: str) -> int:
+        return len(value.encode())
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            value, size, stored_at = entry
+            if self.ttl_seconds is not None and self.clock() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.current_bytes -= size
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        size = self._size_of(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            if self.max_bytes is not None and size > self.max_bytes:
+                return  # Larger than the whole tier; leave it to the persistent store.
+            self._entries[key] = (value, size, self.clock())
+            self.current_bytes += size
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self.current_bytes > self.max_bytes)
+        ):
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            self.stats.evictions += 1
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+class TieredCache:
+    """
+    Bounded in-memory LRU in front of a persistent cache backend.
+
+    ``aget`` and ``aset`` are for event-loop callers: the memory tier is
+    served inline and only backend I/O runs in a worker thread.
+    """
+
+    def __init__(self, backend: CacheBackend, memory: Optional[LRUCache] = None):
+        self.backend = backend
+        self.memory = memory if memory is not None else LRUCache()
+        self.name = f"{getattr(backend, 'name', 'backend')}+lru"
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.memory.stats
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        return self._promote(key, self.backend.get(key))
+
+    async def aget(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        return self._promote(key, await asyncio.to_thread(self.backend.get, key))
+
+    def _promote(self, key: str, value: Optional[str]) -> Optional[str]:
+        """Counts a backend lookup and copies a hit into the memory tier."""
+        if value is None:
+            self.stats.backend_misses += 1
+            return None
+        self.stats.backend_hits += 1
+        self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.backend.set(key, value)
+        self.memory.set(key, value)
+
+    async def aset(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self.backend.set, key, value)
+        self.memory.set(key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
+    def compact(self) -> None:
+        self.backend.compact()
+
+    def close(self) -> None:
+        self.backend.close()
@@ -0,0 +1,94 @@
+"""
+Append-only run checkpoints so interrupted experiment runs can resume.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+
+if TYPE_CHECKING:
+    from src.utils.results_store import ResultStore
+
+logger = logging.getLogger(__name__)
+
+
+def unit_key(strategy_name: str, item: Dict[str, Any], model: Optional[str] = None) -> str:
+    """Deterministic key of a (model, strategy, item) work unit."""
+    item_hash = hashlib.sha1(json.dumps(item, sort_keys=True, default=str).encode()).hexdigest()
+    return hashlib.sha1(f"{model or ''}\0{strategy_name}\0{item_hash}".encode()).hexdigest()[:16]
+
+
+def new_run_id() -> str:
+    """Sortable, collision-resistant run identifier."""
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+class RunCheckpoint:
+    """
+    JSONL file of scored result rows for one run.
+
+    Rows are appended and fsynced batch by batch as the scoring stage
+    finishes them, so a crash loses at most the rows still in flight. A
+    trailing partial line left by a crash is ignored on load and terminated
+    before the next append. With a ``store``, each appended batch is also
+    folded into the run's statistics there, so they cover every checkpointed
+    row even if the run never reaches its final save.
+    """
+
+    def __init__(self, directory: Path, run_id: str, store: Optional['ResultStore'] = None):
+        self.run_id = run_id
+        self.path = Path(directory) / f"{run_id}.jsonl"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.store = store
+        self._lock = threading.Lock()
+
+    @classmethod
+    def latest(cls, directory: Path,
+               store: Optional['ResultStore'] = None) -> Optional['RunCheckpoint']:
+        """Returns the most recently modified checkpoint in directory, if any."""
+        paths = sorted(Path(directory).glob("*.jsonl"), key=lambda p: p.stat().st_mtime)
+        return cls(directory, paths[-1].stem, store) if paths else None
+
+    def append(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        payload = "".join(json.dumps(row, default=str) + "\n" for row in rows)
+        with self._lock, open(self.path, 'ab+') as f:
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # A crashed writer left a torn row; terminate it so ours starts on a fresh line.
+                    payload = "\n" + payload
+            f.write(payload.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+            if self.store is not None:
+                try:
+                    self.store.add_stats(rows)
+                except Exception as e:
+                    # The rows are safe in the checkpoint; the final save rebuilds the statistics.
+                    logger.error(f"Could not add checkpointed rows to run statistics: {e}")
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Returns every complete row written so far."""
+        if not self.path.exists():
+            return []
+        rows = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.endswith("\n"):
+                    logger.warning(f"Ignoring truncated row {line_no} in {self.path}")
+                    break
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring corrupt row {line_no} in {self.path}")
+        return rows
+
+    def completed_keys(self) -> Set[str]:
+        return {row['unit_key'] for row in self.load() if 'unit_key' in row}
@@ -0,0 +1,162 @@
+"""
+Adaptive concurrency control for the experiment runner's worker pool.
+"""
+import asyncio
+import logging
+import math
+import statistics
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencySample(NamedTuple):
+    """One limit adjustment: what the window measured at ``limit`` and what followed."""
+    elapsed: float
+    limit: int
+    throughput: float
+    latency: float
+    new_limit: int
+    reason: str
+
+
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit.
+
+    Completed requests are measured in windows of ``limit`` samples, roughly
+    one round trip at the current concurrency. A window whose median latency
+    stays within ``latency_tolerance`` times the best median seen so far
+    raises the limit by ``increase``. Once latency climbs past that (the
+    server is queueing rather than working in parallel), or a request fails,
+    the limit is multiplied by ``backoff``. After a decrease, further failures
+    are ignored until a full window has completed so one burst of errors
+    backs off only once. The throughput of every window is kept in
+    ``history``; ``knee()`` is the limit that achieved the best throughput.
+    """
+
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 32,
+                 increase: int = 1, backoff: float = 0.5, latency_tolerance: float = 2.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("Expected 1 <= min_limit <= max_limit.")
+        if not 0.0 < backoff < 1.0:
+            raise ValueError("backoff must be between 0 and 1.")
+        if latency_tolerance <= 1.0:
+            raise ValueError("latency_tolerance must be greater than 1.")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.history: List[ConcurrencySample] = []
+        self._limit = min(max(initial, min_limit), max_limit)
+        self._clock = clock
+        self._start = clock()
+        self._window: List[float] = []
+        self._window_start = self._start
+        self._baseline = math.inf
+        self._cooldown = 0
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def record(self, latency: float, ok: bool = True) -> int:
+        """Records one completed request and returns the (possibly updated) limit."""
+        with self._lock:
+            self._cooldown = max(0, self._cooldown - 1)
+            if not ok:
+                if self._cooldown == 0:
+                    self._adjust(self._decreased(), math.nan, math.nan, "error")
+                return self._limit
+
+            self._window.append(latency)
+            if len(self._window) < self._limit:
+                return self._limit
+
+            now = self._clock()
+            median = statistics.median(self._window)
+            throughput = len(self._window) / max(now - self._window_start, 1e-9)
+            self._baseline = min(self._baseline, median)
+            if median > self.latency_tolerance * self._baseline:
+                self._adjust(self._decreased(), throughput, median, "latency")
+            else:
+                limit = min(self._limit + self.increase, self.max_limit)
+                self._adjust(limit, throughput, median, "increase")
+            return self._limit
+
+    def knee(self) -> int:
+        """Limit with the highest measured throughput (the current limit before any full window)."""
+        measured = [s for s in self.history if not math.isnan(s.throughput)]
+        if not measured:
+            return self._limit
+        return max(measured, key=lambda s: s.throughput).limit
+
+    def _decreased(self) -> int:
+        return max(self.min_limit, int(self._limit * self.backoff))
+
+    def _adjust(self, limit: int, throughput: float, latency: float, reason: str) -> None:
+        elapsed = self._clock() - self._start
+        sample = ConcurrencySample(elapsed, self._limit, throughput, latency, limit, reason)
+        self.history.append(sample)
+        if limit != self._limit:
+            logger.info(
+                f"Concurrency {self._limit} -> {limit} ({reason}; "
+                f"median latency {latency:.2f}s, {throughput:.2f} requests/s)"
+            )
+        if limit < self._limit:
+            self._cooldown = self._limit
+        self._limit = limit
+        self._window = []
+        self._window_start = self._clock()
+
+
+class AdaptiveLimiter:
+    """Blocks worker threads while the controller's limit is in use."""
+
+    def __init__(self, controller: AIMDController):
+        self.controller = controller
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._condition:
+            self._condition.wait_for(lambda: self.in_flight < self.controller.limit)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def release(self, latency: Optional[float] = None, ok: bool = True) -> None:
+        """Frees a slot, feeding the request's latency to the controller unless it is None."""
+        with self._condition:
+            self.in_flight -= 1
+            if latency is not None or not ok:
+                self.controller.record(latency or 0.0, ok)
+            self._condition.notify_all()
+
+
+class AsyncAdaptiveLimiter:
+    """Event-loop counterpart of AdaptiveLimiter; create it inside the running loop."""
+
+    def __init__(self, controller: AIMDController):
+        self.controller = controller
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.controller.limit)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    async def release(self, latency: Optional[float] = None, ok: bool = True) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            if latency is not None or not ok:
+                self.controller.record(latency or 0.0, ok)
+            self._condition.notify_all()
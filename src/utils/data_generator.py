@@ -1,29 +1,53 @@
 """
 Module for generating logic puzzle datasets (Syllogisms).
 """
+import argparse
+import copy
 import json
-import random
+import logging
+from itertools import chain, islice
 from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from src.utils.lazy import lazy_imports, resolve
+
+# NumPy and pyarrow load on first use so importing the generator stays cheap for the CLI.
+__getattr__ = lazy_imports(__name__, np="numpy", pa="pyarrow", pq="pyarrow.parquet")
+
+logger = logging.getLogger(__name__)
+
+DATASET_FORMATS = ("json", "jsonl", "parquet")
 
 
 class SyllogismGenerator:
-    """Generates syllogism problems with ground truth."""
+    """
+    Generates syllogism problems with ground truth.
+
+    Each item is one cell of the (form, subject, middle term, predicate)
+    grid. Datasets are drawn as grid indices from the generator's own NumPy
+    ``Generator``, one vectorized chunk at a time, so equal seeds give equal
+    datasets whatever else in the process uses ``random``, and millions of
+    items can be streamed without holding them in memory.
+    """
 
     def __init__(self, seed: int = 42):
         self.seed = seed
-        random.seed(seed)
-        
+        np, = resolve(__name__, "np")
+        self.rng = np.random.default_rng(seed)
+
         # Simple knowledge base for template filling
         self.subjects: list[str] = ["cats", "dogs", "birds", "fish", "programmers", "philosophers"]
         self.middle_terms: list[str] = ["mammals", "animals", "living things", "logic users", "humans", "mortals"]
         self.predicates: list[str] = ["breathing", "warm-blooded", "capable of thought", "destined to die", "part of nature"]
+        self._rendered: Optional[List[dict[str, str]]] = None
 
-    def generate_valid_syllogism(self) -> dict[str, str]:
-        """Generates a valid syllogism (Yes answer)."""
-        s = random.choice(self.subjects)
-        m = random.choice(self.middle_terms)
-        p = random.choice(self.predicates)
-        
+    @property
+    def capacity(self) -> int:
+        """Distinct items per label; a deduplicated dataset holds at most twice this many."""
+        return len(self.subjects) * len(self.middle_terms) * len(self.predicates)
+
+    @staticmethod
+    def _valid(s: str, m: str, p: str) -> dict[str, str]:
         # Valid: All S are M. All M are P. -> All S are P.
         question = f"Premise 1: All {s} are {m}.\nPremise 2: All {m} are {p}.\nQuestion: Are all {s} {p}?"
         return {
@@ -32,12 +56,8 @@ class SyllogismGenerator:
             "label": "Yes"
         }
 
-    def generate_invalid_syllogism(self) -> dict[str, str]:
-        """Generates an invalid/indeterminate syllogism (No answer)."""
-        s = random.choice(self.subjects)
-        m = random.choice(self.middle_terms)
-        p = random.choice(self.predicates)
-        
+    @staticmethod
+    def _invalid(s: str, m: str, p: str) -> dict[str, str]:
         # Invalid: All S are M. Some P are M. -> All S are P? (Undetermined/No)
         question = f"Premise 1: All {s} are {m}.\nPremise 2: Some {p} are {m}.\nQuestion: Are all {s} {p}?"
         return {
@@ -46,15 +66,73 @@ class SyllogismGenerator:
             "label": "No"
         }
 
-    def generate_dataset(self, size: int = 20) -> list[dict[str, str]]:
+    def _terms(self, index: int) -> tuple[str, str, str]:
+        rest, p = divmod(index, len(self.predicates))
+        s, m = divmod(rest, len(self.middle_terms))
+        return self.subjects[s], self.middle_terms[m], self.predicates[p]
+
+    def _items(self) -> List[dict[str, str]]:
+        """Every item, rendered once: valid forms first, then invalid ones."""
+        if self._rendered is None:
+            terms = [self._terms(i) for i in range(self.capacity)]
+            self._rendered = [self._valid(*t) for t in terms] + [self._invalid(*t) for t in terms]
+        return self._rendered
+
+    def generate_valid_syllogism(self) -> dict[str, str]:
+        """Generates a valid syllogism (Yes answer)."""
+        return self._valid(*self._terms(int(self.rng.integers(self.capacity))))
+
+    def generate_invalid_syllogism(self) -> dict[str, str]:
+        """Generates an invalid/indeterminate syllogism (No answer)."""
+        return self._invalid(*self._terms(int(self.rng.integers(self.capacity))))
+
+    def iter_chunks(self, size: int, chunk_size: int = 10_000,
+                    unique: bool = False) -> Iterator[List[dict[str, str]]]:
+        """
+        Lazily yields a balanced dataset of ``size // 2`` valid/invalid pairs in shuffled chunks.
+
+        With ``unique=True`` items are drawn without replacement, so no item
+        repeats; the dataset is cut short once the grid is exhausted. Items
+        are shuffled within each chunk, so a seed reproduces a dataset for a
+        given ``chunk_size``.
+        """
+        if chunk_size < 2:
+            raise ValueError("chunk_size must be at least 2.")
+        pairs = size // 2
+        if unique and pairs > self.capacity:
+            logger.warning(f"Only {2 * self.capacity} distinct syllogisms exist; "
+                           f"the deduplicated dataset stops there instead of at {size}.")
+            pairs = self.capacity
+        order = None
+        if unique:
+            order = (self.rng.permutation(self.capacity), self.rng.permutation(self.capacity))
+
+        items = self._items()
+        drawn = 0
+        while drawn < pairs:
+            n = min(chunk_size // 2, pairs - drawn)
+            if order is not None:
+                valid, invalid = order[0][drawn:drawn + n], order[1][drawn:drawn + n]
+            else:
+                valid, invalid = self.rng.integers(self.capacity, size=(2, n))
+            np, = resolve(__name__, "np")
+            indices = self.rng.permutation(np.concatenate([valid, invalid + self.capacity]))
+            drawn += n
+            yield [dict(items[i]) for i in indices.tolist()]
+
+    def iter_items(self, size: int, chunk_size: int = 10_000,
+                   unique: bool = False) -> Iterator[dict[str, str]]:
+        """Item-by-item view of ``iter_chunks``."""
+        return chain.from_iterable(self.iter_chunks(size, chunk_size, unique))
+
+    def generate_dataset(self, size: int = 20, unique: bool = False) -> list[dict[str, str]]:
         """Generates a balanced dataset of valid and invalid syllogisms."""
-        dataset: list[dict[str, str]] = []
-        for _ in range(size // 2):
-            dataset.append(self.generate_valid_syllogism())
-            dataset.append(self.generate_invalid_syllogism())
-        
-        random.shuffle(dataset)
-        return dataset
+        return list(self.iter_items(size, chunk_size=max(size, 2), unique=unique))
+
+    def write_dataset(self, filepath: Path, size: int, chunk_size: int = 10_000,
+                      unique: bool = False) -> int:
+        """Streams a generated dataset to JSONL, Parquet or JSON (by suffix); returns the count."""
+        return write_dataset(self.iter_chunks(size, chunk_size, unique), filepath)
 
     def save_dataset(self, dataset: list[dict[str, str]], filepath: Path) -> None:
         """Saves the dataset to a JSON file."""
@@ -62,8 +140,135 @@ class SyllogismGenerator:
         with open(filepath, 'w') as f:
             json.dump(dataset, f, indent=2)
 
+
+class GeneratedDataset:
+    """
+    Re-iterable stream of ``generator.iter_items`` that is never held in memory.
+
+    The generator's RNG is snapshotted up front and every pass replays it on a
+    copy of the generator, so each iteration yields the same items (a resumed
+    run in the same process sees the units it checkpointed).
+    """
+
+    def __init__(self, generator: Any, size: int, chunk_size: int = 10_000,
+                 unique: bool = False):
+        self.generator = generator
+        self.size = size
+        self.chunk_size = chunk_size
+        self.unique = unique
+        np, = resolve(__name__, "np")
+        rng = getattr(generator, 'rng', None)
+        self._rng = copy.deepcopy(rng) if isinstance(rng, np.random.Generator) else None
+
+    def __len__(self) -> int:
+        pairs = self.size // 2
+        if self.unique and hasattr(self.generator, 'capacity'):
+            pairs = min(pairs, self.generator.capacity)
+        return 2 * pairs
+
+    def __iter__(self) -> Iterator[dict[str, str]]:
+        generator = self.generator
+        if self._rng is not None:
+            generator = copy.copy(generator)
+            generator.rng = copy.deepcopy(self._rng)
+        return generator.iter_items(self.size, self.chunk_size, self.unique)
+
+
+def dataset_format(filepath: Path) -> str:
+    fmt = Path(filepath).suffix.lstrip(".")
+    if fmt not in DATASET_FORMATS:
+        raise ValueError(
+            f"Unsupported dataset file '{filepath}'. Expected a suffix from {DATASET_FORMATS}."
+        )
+    return fmt
+
+
+def write_dataset(chunks: Iterable[List[Dict[str, Any]]], filepath: Path) -> int:
+    """Writes item chunks as they arrive; only JSON output needs every item in memory."""
+    filepath = Path(filepath)
+    fmt = dataset_format(filepath)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    if fmt == "json":
+        items = [item for chunk in chunks for item in chunk]
+        with open(filepath, 'w') as f:
+            json.dump(items, f, indent=2)
+        return len(items)
+    if fmt == "jsonl":
+        with open(filepath, 'w') as f:
+            for chunk in chunks:
+                f.writelines(json.dumps(item) + "\n" for item in chunk)
+                count += len(chunk)
+        return count
+
+    pa, pq = resolve(__name__, "pa", "pq")
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pylist(chunk)
+            if writer is None:
+                writer = pq.ParquetWriter(filepath, table.schema)
+            writer.write_table(table)
+            count += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def dataset_length(filepath: Path) -> Optional[int]:
+    """Items in a dataset file when its metadata says so (Parquet), else None."""
+    filepath = Path(filepath)
+    if dataset_format(filepath) != "parquet":
+        return None
+    pq, = resolve(__name__, "pq")
+    return pq.ParquetFile(filepath).metadata.num_rows
+
+
+def iter_dataset_chunks(filepath: Path, chunk_size: int = 10_000) -> Iterator[List[Dict[str, Any]]]:
+    """Reads a dataset file back in chunks; JSONL and Parquet are streamed."""
+    filepath = Path(filepath)
+    fmt = dataset_format(filepath)
+    if fmt == "parquet":
+        pq, = resolve(__name__, "pq")
+        for batch in pq.ParquetFile(filepath).iter_batches(batch_size=chunk_size):
+            yield batch.to_pylist()
+        return
+
+    with open(filepath) as f:
+        if fmt == "json":
+            items = iter(json.load(f))
+        else:
+            items = (json.loads(line) for line in f if line.strip())
+        while chunk := list(islice(items, chunk_size)):
+            yield chunk
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate a syllogism dataset file.")
+    parser.add_argument(
+        "-n", "--size", type=int, default=20,
+        help="Number of items, half valid and half invalid (an odd size is rounded down).",
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path,
+        help="JSONL, Parquet or JSON file; prints JSON when omitted.",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Random seed.")
+    parser.add_argument("--unique", action="store_true", help="Never repeat an item.")
+    parser.add_argument(
+        "--chunk-size", type=int, default=10_000, help="Items generated per vectorized chunk.",
+    )
+    args = parser.parse_args(argv)
+
+    gen = SyllogismGenerator(seed=args.seed)
+    if args.output is None:
+        print(json.dumps(gen.generate_dataset(args.size, unique=args.unique), indent=2))
+        return
+    count = gen.write_dataset(args.output, args.size, chunk_size=args.chunk_size,
+                              unique=args.unique)
+    logger.info(f"Wrote {count} items to {args.output}")
+
 if __name__ == "__main__":
-    # Test generation
-    gen = SyllogismGenerator()
-    data = gen.generate_dataset(5)
-    print(json.dumps(data, indent=2))
+    logging.basicConfig(level=logging.INFO)
+    main()
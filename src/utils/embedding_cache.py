@@ -0,0 +1,178 @@
+"""
+Embedding cache keyed by model name and text hash.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def embedding_key(model_name: str, text: str) -> str:
+    """Stable key for a text embedded by a given model."""
+    return hashlib.sha1(f"{model_name}\0{text}".encode()).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Append-only on-disk embedding store made of immutable ``.npy`` chunks.
+
+    Each flush writes a new ``chunk-*.npy`` file plus a ``.keys.json`` file
+    listing the key for each row. Chunks are opened with ``mmap_mode='r'`` so
+    vectors are paged in on demand rather than loaded up front, and writers in
+    different processes never touch the same file.
+    """
+
+    def __init__(self, directory: Path, flush_size: int = 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_size = flush_size
+        self._chunks: Dict[str, np.ndarray] = {}
+        self._index: Dict[str, Tuple[str, int]] = {}
+        self._pending: Dict[str, np.ndarray] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        for keys_path in sorted(self.directory.glob("chunk-*.keys.json")):
+            chunk_path = keys_path.with_name(keys_path.name.replace(".keys.json", ".npy"))
+            if not chunk_path.exists():
+                continue  # Written by a process that has not finished flushing yet.
+            self._open_chunk(chunk_path, keys_path)
+        self._loaded = True
+
+    def _open_chunk(self, chunk_path: Path, keys_path: Path) -> None:
+        try:
+            with open(keys_path, 'r') as f:
+                keys = json.load(f)
+            vectors = np.load(chunk_path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable embedding chunk {chunk_path}: {e}")
+            return
+        self._chunks[chunk_path.name] = vectors
+        for row, key in enumerate(keys):
+            self._index[key] = (chunk_path.name, row)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            self._load()
+            if key in self._pending:
+                return self._pending[key]
+            location = self._index.get(key)
+            if location is None:
+                return None
+            chunk, row = location
+            return np.asarray(self._chunks[chunk][row])
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._load()
+            if key in self._index:
+                return
+            self._pending[key] = np.asarray(vector, dtype=np.float32)
+            if len(self._pending) >= self.flush_size:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """Writes pending vectors as a new chunk."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        stem = f"chunk-{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        chunk_path = self.directory / f"{stem}.npy"
+        keys_path = self.directory / f"{stem}.keys.json"
+        keys = list(self._pending)
+        vectors = np.stack([self._pending[k] for k in keys])
+
+        # Keys first, vectors last: readers only pick up chunks whose .npy exists.
+        tmp_keys = keys_path.with_suffix(".tmp")
+        with open(tmp_keys, 'w') as f:
+            json.dump(keys, f)
+        os.replace(tmp_keys, keys_path)
+        tmp_chunk = self.directory / f"{stem}.tmp.npy"
+        np.save(tmp_chunk, vectors)
+        os.replace(tmp_chunk, chunk_path)
+
+        self._open_chunk(chunk_path, keys_path)
+        self._pending.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._index) + len(self._pending)
+
+
+class EmbeddingCache:
+    """
+    Two-level cache of text embeddings for one embedding model.
+
+    An in-memory LRU bounded by entry count sits in front of an optional
+    EmbeddingStore, so repeated texts (reference answers in particular) are
+    encoded once per process, and once ever when a store directory is given.
+    """
+
+    def __init__(self, model_name: str, max_entries: int = 50000, directory: Optional[Path] = None):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.store: Optional[EmbeddingStore] = None
+        if directory is not None:
+            safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+            self.store = EmbeddingStore(Path(directory) / safe_name)
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Returns cached vectors aligned with texts (None where missing)."""
+        found: List[Optional[np.ndarray]] = []
+        for text in texts:
+            key = embedding_key(self.model_name, text)
+            with self._lock:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+            if vector is None and self.store is not None:
+                vector = self.store.get(key)
+                if vector is not None:
+                    self._remember(key, vector)
+            if vector is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            found.append(vector)
+        return found
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[np.ndarray]) -> None:
+        for text, vector in zip(texts, vectors, strict=True):
+            key = embedding_key(self.model_name, text)
+            self._remember(key, vector)
+            if self.store is not None:
+                self.store.put(key, vector)
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def flush(self) -> None:
+        """Persists pending vectors to the on-disk store, if any."""
+        if self.store is not None:
+            self.store.flush()
@@ -0,0 +1,446 @@
+"""
+Local embedding service reached over a Unix socket.
+
+One server process owns the embedding models and batches encode requests
+from every connected client. Requests and metadata travel as length-prefixed
+JSON frames; vectors are written into a shared-memory arena owned by each
+connection, so they cross the process boundary without serialization.
+
+Run it with:
+    python -m src.utils.embedding_server --socket /tmp/embeddings.sock
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("!I")
+_MAX_FRAME = 64 * 1024 * 1024
+DEFAULT_ARENA_BYTES = 4 * 1024 * 1024
+
+
+class EmbeddingServerError(RuntimeError):
+    """Raised on the client when the server rejects or fails a request."""
+
+
+def send_frame(sock: socket.socket, payload: Dict[str, Any]) -> None:
+    data = json.dumps(payload).encode()
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def recv_frame(sock: socket.socket) -> Optional[Dict[str, Any]]:
+    """Reads one frame; returns None when the peer closed the connection."""
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    (length,) = _HEADER.unpack(header)
+    if length > _MAX_FRAME:
+        raise EmbeddingServerError(f"Frame of {length} bytes exceeds the {_MAX_FRAME} byte limit.")
+    data = _recv_exact(sock, length)
+    if data is None:
+        raise EmbeddingServerError("Connection closed mid-frame.")
+    return json.loads(data)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks = bytearray()
+    while len(chunks) < size:
+        chunk = sock.recv(size - len(chunks))
+        if not chunk:
+            if chunks:
+                raise EmbeddingServerError("Connection closed mid-frame.")
+            return None
+        chunks.extend(chunk)
+    return bytes(chunks)
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attaches to a segment the server owns without handing it to this process's tracker."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    # Before 3.13 attaching registers the segment, and the tracker would unlink it at exit.
+    resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    return shm
+
+
+class _Arena:
+    """Server-side shared-memory region for one connection's results."""
+
+    def __init__(self, size: int):
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def size(self) -> int:
+        return self.shm.size
+
+    def write(self, vectors: np.ndarray) -> None:
+        view = np.ndarray(vectors.shape, dtype=vectors.dtype, buffer=self.shm.buf)
+        view[...] = vectors
+        del view
+
+    def close(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+
+@dataclass
+class _Request:
+    model: str
+    texts: List[str]
+    done: threading.Event = field(default_factory=threading.Event)
+    vectors: Optional[np.ndarray] = None
+    error: Optional[str] = None
+
+
+class EmbeddingServer:
+    """
+    Owns embedding models and serves encode requests over a Unix socket.
+
+    Each client connection runs on its own thread and enqueues requests; a
+    single batching thread gathers requests for up to ``max_wait`` seconds
+    or ``max_batch`` texts, encodes each model's texts in one call, and
+    writes every caller's vectors into that connection's arena.
+    """
+
+    def __init__(self, socket_path: str, loader: Optional[Callable[[str], Any]] = None,
+                 max_batch: int = 256, max_wait: float = 0.01, encode_batch_size: int = 64,
+                 arena_bytes: int = DEFAULT_ARENA_BYTES):
+        self.socket_path = str(socket_path)
+        self.loader = loader or _pooled_model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.encode_batch_size = encode_batch_size
+        self.arena_bytes = arena_bytes
+        self.batches = 0
+        self.requests = 0
+        self._models: Dict[str, Any] = {}
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._listener: Optional[socket.socket] = None
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> 'EmbeddingServer':
+        """Binds the socket and starts the accept and batching threads."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.socket_path)
+        listener.listen()
+        self._listener = listener
+        loops = ((self._accept_loop, "embedding-accept"), (self._batch_loop, "embedding-batch"))
+        for target, name in loops:
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Embedding server listening on {self.socket_path}")
+        return self
+
+    def serve_forever(self) -> None:
+        self.start()
+        try:
+            self._stopped.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._queue.put(None)
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def __enter__(self) -> 'EmbeddingServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _accept_loop(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                return  # Listener closed by stop().
+            threading.Thread(target=self._handle, args=(conn,), name="embedding-conn",
+                             daemon=True).start()
+
+    def _handle(self, conn: socket.socket) -> None:
+        arena = _Arena(self.arena_bytes)
+        try:
+            with conn:
+                send_frame(conn, {"ok": True, "arena": arena.name, "size": arena.size})
+                while True:
+                    message = recv_frame(conn)
+                    if message is None:
+                        return
+                    arena = self._serve(conn, message, arena)
+        except (OSError, EmbeddingServerError) as e:
+            logger.debug(f"Embedding client disconnected: {e}")
+        finally:
+            arena.close()
+
+    def _serve(self, conn: socket.socket, message: Dict[str, Any], arena: _Arena) -> _Arena:
+        if message.get("op") != "encode":
+            send_frame(conn, {"ok": False, "error": f"Unknown op {message.get('op')!r}"})
+            return arena
+
+        request = _Request(model=message["model"], texts=list(message["texts"]))
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            send_frame(conn, {"ok": False, "error": request.error})
+            return arena
+
+        vectors = request.vectors
+        if vectors.nbytes > arena.size:
+            # Grow to the next power of two; the client re-attaches by name.
+            arena.close()
+            arena = _Arena(1 << (vectors.nbytes - 1).bit_length())
+        arena.write(vectors)
+        send_frame(conn, {
+            "ok": True, "arena": arena.name, "size": arena.size,
+            "shape": list(vectors.shape), "dtype": vectors.dtype.str,
+        })
+        return arena
+
+    def _batch_loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            texts = len(first.texts)
+            deadline = time.monotonic() + self.max_wait
+            while texts < self.max_batch:
+                try:
+                    request = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._queue.put(None)
+                    break
+                batch.append(request)
+                texts += len(request.texts)
+            self._encode(batch)
+
+    def _encode(self, batch: List[_Request]) -> None:
+        by_model: Dict[str, List[_Request]] = {}
+        for request in batch:
+            by_model.setdefault(request.model, []).append(request)
+
+        for model_name, requests in by_model.items():
+            try:
+                model = self._models.get(model_name)
+                if model is None:
+                    model = self._models[model_name] = self.loader(model_name)
+                texts = [text for request in requests for text in request.texts]
+                vectors = np.asarray(model.encode(texts, batch_size=self.encode_batch_size),
+                                     dtype=np.float32)
+                start = 0
+                for request in requests:
+                    request.vectors = vectors[start:start + len(request.texts)]
+                    start += len(request.texts)
+            except Exception as e:
+                logger.error(f"Embedding batch for {model_name} failed: {e}")
+                for request in requests:
+                    request.error = str(e)
+            for request in requests:
+                request.done.set()
+        self.batches += 1
+        self.requests += len(batch)
+
+
+def _pooled_model(model_name: str) -> Any:
+    from src.utils.metrics import embedding_model_pool
+    return embedding_model_pool.acquire(model_name)
+
+
+class _Connection:
+    """Client side of one server connection and its attached arena."""
+
+    def __init__(self, socket_path: str, timeout: Optional[float]):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path)
+        hello = recv_frame(self.sock)
+        if not hello or not hello.get("ok"):
+            raise EmbeddingServerError(f"Bad handshake from embedding server: {hello}")
+        self.shm = _attach_shared_memory(hello["arena"])
+
+    def encode(self, model: str, texts: List[str]) -> np.ndarray:
+        send_frame(self.sock, {"op": "encode", "model": model, "texts": texts})
+        reply = recv_frame(self.sock)
+        if reply is None:
+            raise EmbeddingServerError("Embedding server closed the connection.")
+        if not reply.get("ok"):
+            raise EmbeddingServerError(reply.get("error", "unknown error"))
+        if reply["arena"] != self.shm.name:
+            self.shm.close()
+            self.shm = _attach_shared_memory(reply["arena"])
+        view = np.ndarray(tuple(reply["shape"]), dtype=np.dtype(reply["dtype"]),
+                          buffer=self.shm.buf)
+        # The arena is reused by this connection's next request, so results are copied out once.
+        vectors = view.copy()
+        del view
+        return vectors
+
+    def close(self) -> None:
+        self.shm.close()
+        self.sock.close()
+
+
+class EmbeddingClient:
+    """
+    Drop-in stand-in for a SentenceTransformer backed by an EmbeddingServer.
+
+    Keeps up to ``max_connections`` connections so concurrent callers reach
+    the server together and can share its batches. ``close`` closes the idle
+    connections; ones checked out at the time are closed when returned.
+    """
+
+    def __init__(self, socket_path: str, model_name: str, max_connections: int = 4,
+                 timeout: Optional[float] = 60.0):
+        self.socket_path = str(socket_path)
+        self.model_name = model_name
+        self.max_connections = max_connections
+        self.timeout = timeout
+        # None entries wake callers waiting on connections that close() retired
+        self._idle: "queue.Queue[Optional[_Connection]]" = queue.Queue()
+        # Connections opened since the last close(), and slots taken including ones still opening
+        self._live: Set[_Connection] = set()
+        self._opened = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def encode(self, texts: List[str], batch_size: Optional[int] = None, **_: Any) -> np.ndarray:
+        """Returns an (n, d) float32 array; batch_size is decided by the server."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        conn = self._checkout()
+        try:
+            vectors = conn.encode(self.model_name, list(texts))
+        except (OSError, EmbeddingServerError):
+            self._retire(conn)
+            raise
+        with self._lock:
+            if conn in self._live:
+                self._idle.put(conn)
+                return vectors
+        self._retire(conn)
+        return vectors
+
+    def _checkout(self) -> _Connection:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    generation = self._generation
+                    can_open = self._opened < self.max_connections
+                    if can_open:
+                        self._opened += 1
+                conn = self._open(generation) if can_open else self._idle.get()
+            if conn is not None:
+                return conn
+
+    def _open(self, generation: int) -> _Connection:
+        try:
+            conn = _Connection(self.socket_path, self.timeout)
+        except Exception:
+            with self._lock:
+                if generation == self._generation:
+                    self._opened -= 1
+            raise
+        with self._lock:
+            # Opened across a close(): not tracked, so it is closed when returned
+            if generation == self._generation:
+                self._live.add(conn)
+        return conn
+
+    def _retire(self, conn: _Connection) -> None:
+        """Closes a connection and frees its slot for a waiting caller."""
+        conn.close()
+        with self._lock:
+            if conn in self._live:
+                self._live.discard(conn)
+                self._opened -= 1
+        self._idle.put(None)
+
+    def close(self) -> None:
+        with self._lock:
+            self._live = set()
+            self._opened = 0
+            self._generation += 1
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if conn is not None:
+                    conn.close()
+
+
+def start_embedding_server(socket_path: str, models: Optional[List[str]] = None,
+                           wait: float = 120.0) -> subprocess.Popen:
+    """Launches the server in a background process and waits until its socket accepts."""
+    command = [sys.executable, "-m", "src.utils.embedding_server", "--socket", str(socket_path)]
+    for model in models or []:
+        command += ["--preload", model]
+    process = subprocess.Popen(command, cwd=Path(__file__).resolve().parent.parent.parent)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise EmbeddingServerError(f"Embedding server exited with code {process.returncode}.")
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(str(socket_path))
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise EmbeddingServerError(f"Embedding server did not start within {wait:.0f}s.")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Local embedding server")
+    parser.add_argument("--socket", required=True, help="Unix socket path to listen on.")
+    parser.add_argument("--preload", action="append", default=[], metavar="MODEL",
+                        help="Embedding model to load before accepting requests.")
+    parser.add_argument("--max-batch", type=int, default=256, help="Texts per dynamic batch.")
+    parser.add_argument("--max-wait", type=float, default=0.01,
+                        help="Seconds to wait to fill a batch.")
+    args = parser.parse_args(argv)
+
+    from src.utils.metrics import embedding_model_pool
+    embedding_model_pool.preload(args.preload)
+    EmbeddingServer(args.socket, max_batch=args.max_batch, max_wait=args.max_wait).serve_forever()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,44 @@
+"""
+Yes/No label extraction from free-form model answers.
+"""
+import re
+from typing import Optional
+
+# An explicit "Answer: Yes" wins over a bare yes/no mentioned earlier in the reasoning.
+_ANSWER_PATTERN = re.compile(r"\banswer\s*(?:is)?\s*[:\-]?\s*\**\s*(yes|no)\b", re.IGNORECASE)
+_LABEL_PATTERN = re.compile(r"\b(yes|no)\b", re.IGNORECASE)
+
+
+def extract_label(text: str) -> Optional[str]:
+    """
+    Returns "Yes" or "No" for an answer, or None when neither appears.
+
+    Args:
+        text: The model output.
+    """
+    if not text:
+        return None
+    match = _ANSWER_PATTERN.search(text) or _LABEL_PATTERN.search(text)
+    if match is None:
+        return None
+    return match.group(1).capitalize()
+
+
+def parse_label(text: str) -> Optional[str]:
+    """
+    Returns the answer's label only when it is unambiguous, else None.
+
+    An explicit "Answer: ..." decides; otherwise every bare yes/no in the
+    text must agree. Unlike extract_label, "yes ... no" without an explicit
+    answer counts as ambiguous.
+
+    Args:
+        text: The model output.
+    """
+    if not text:
+        return None
+    match = _ANSWER_PATTERN.search(text)
+    if match is not None:
+        return match.group(1).capitalize()
+    labels = {label.lower() for label in _LABEL_PATTERN.findall(text)}
+    return labels.pop().capitalize() if len(labels) == 1 else None
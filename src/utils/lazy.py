@@ -0,0 +1,36 @@
+"""
+Deferred imports for heavy optional dependencies.
+"""
+import importlib
+import sys
+from typing import Any, Callable, Tuple
+
+
+def lazy_imports(module_name: str, **aliases: str) -> Callable[[str], Any]:
+    """
+    Builds a PEP 562 module ``__getattr__`` that imports aliases on first use.
+
+    Each alias maps to a module path, or to ``"module:attribute"`` for a name
+    inside a module. The imported object is stored on the module so later
+    lookups (and ``unittest.mock.patch``) see a plain attribute.
+
+    Example:
+        __getattr__ = lazy_imports(__name__, pd="pandas", plt="matplotlib.pyplot")
+    """
+    def __getattr__(name: str) -> Any:
+        target = aliases.get(name)
+        if target is None:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        path, _, attribute = target.partition(":")
+        value = importlib.import_module(path)
+        if attribute:
+            value = getattr(value, attribute)
+        setattr(sys.modules[module_name], name, value)
+        return value
+    return __getattr__
+
+
+def resolve(module_name: str, *names: str) -> Tuple[Any, ...]:
+    """Returns lazily imported names of a module, importing them if needed."""
+    module = sys.modules[module_name]
+    return tuple(getattr(module, name) for name in names)
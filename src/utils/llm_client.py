@@ -1,18 +1,48 @@
 """
 Ollama Client Wrapper.
 """
+import asyncio
 import hashlib
-import json
+import itertools
 import logging
 import subprocess
 import time
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
-import ollama
+from src.core.registry import cache_registry
+from src.utils.cache import LRUCache, TieredCache
+from src.utils.lazy import lazy_imports, resolve
+from src.utils.load_balancer import AsyncBalancedClient, BalancedClient
+from src.utils.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    aretry_call,
+    retry_call,
+)
+
+# The ollama package (and httpx behind it) is imported on first client construction.
+__getattr__ = lazy_imports(__name__, ollama="ollama", httpx="httpx")
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
 def start_ollama_server(max_retries: int = 5) -> bool:
     """
     Attempts to start the Ollama server and waits for it to become responsive.
@@ -52,92 +82,358 @@ def start_ollama_server(max_retries: int = 5) -> bool:
         logger.error(f"Failed to start Ollama server: {e}")
         return False
 
+@dataclass
+class GenerationStats:
+    """
+    Timing for one generation.
+
+    ``ttft`` and ``inter_token_latency`` are wall-clock seconds measured on the
+    client while streaming; the remaining fields come from Ollama's own
+    counters (durations converted from nanoseconds to seconds).
+    """
+
+    ttft: Optional[float] = None
+    inter_token_latency: Optional[float] = None
+    tokens_per_sec: Optional[float] = None
+    prompt_eval_count: Optional[int] = None
+    prompt_eval_duration: Optional[float] = None
+    eval_count: Optional[int] = None
+    eval_duration: Optional[float] = None
+    cached: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+# Stats of the most recent generation in the current thread or asyncio task.
+_last_generation_stats: ContextVar[Optional[GenerationStats]] = ContextVar(
+    "last_generation_stats", default=None
+)
+
+def last_generation_stats() -> Optional[GenerationStats]:
+    """Returns the stats of the latest generate call made from this thread or task."""
+    return _last_generation_stats.get()
+
+def clear_generation_stats() -> None:
+    """Forgets the stats of the previous generation in this thread or task."""
+    _last_generation_stats.set(None)
+
+def record_generation_stats(stats: Optional[GenerationStats]) -> None:
+    """Publishes stats gathered elsewhere (e.g. a worker thread) as this context's latest."""
+    _last_generation_stats.set(stats)
+
+def _field(response: Any, key: str) -> Any:
+    """Reads a field from a dict or an ollama response model."""
+    try:
+        return response[key]
+    except (KeyError, TypeError):
+        return None
+
+def _stats_from_response(response: Any) -> GenerationStats:
+    eval_count = _field(response, 'eval_count')
+    eval_duration = _field(response, 'eval_duration')
+    prompt_eval_duration = _field(response, 'prompt_eval_duration')
+    stats = GenerationStats(
+        prompt_eval_count=_field(response, 'prompt_eval_count'),
+        prompt_eval_duration=(
+            prompt_eval_duration / 1e9 if prompt_eval_duration is not None else None
+        ),
+        eval_count=eval_count,
+        eval_duration=eval_duration / 1e9 if eval_duration is not None else None,
+    )
+    if eval_count and eval_duration:
+        stats.tokens_per_sec = eval_count / (eval_duration / 1e9)
+    return stats
+
+class _StreamTimer:
+    """Tracks time to first token and gaps between streamed chunks."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        self.chunks = 0
+
+    def tick(self) -> None:
+        now = time.perf_counter()
+        if self.first is None:
+            self.first = now
+        self.last = now
+        self.chunks += 1
+
+    def finish(self, final_chunk: Any) -> GenerationStats:
+        stats = _stats_from_response(final_chunk)
+        if self.first is not None:
+            stats.ttft = self.first - self.start
+            if self.chunks > 1:
+                stats.inter_token_latency = (self.last - self.first) / (self.chunks - 1)
+        return stats
+
+def make_cache_key(model: str, temperature: float, prompt: str, system: Optional[str],
+                   seed: Optional[int] = None) -> str:
+    """
+    Deterministic cache key shared by the sync and async clients.
+
+    Seeded samples get their own key so k samples of one prompt do not
+    collapse onto a single cached response.
+    """
+    key_content = f"{model}_{temperature}_{prompt}_{system}"
+    if seed is not None:
+        key_content += f"_seed{seed}"
+    return hashlib.md5(key_content.encode()).hexdigest()
+
+def request_cache_key(request: Dict[str, Any]) -> str:
+    """Cache key of an ``ollama`` generate request; the consistent-hash policy routes on it."""
+    options = request.get('options') or {}
+    return make_cache_key(request['model'], options.get('temperature'), request['prompt'],
+                          request.get('system'), options.get('seed'))
+
+class LLMError(Exception):
+    """A generation request that produced no response."""
+    retryable = False
+
+class LLMConnectionError(LLMError):
+    """The server could not be reached."""
+    retryable = True
+
+class LLMTimeoutError(LLMError):
+    """The request exceeded the client timeout."""
+    retryable = True
+
+class LLMServerError(LLMError):
+    """The server answered with a 5xx or 429 status."""
+    retryable = True
+
+class ModelNotFoundError(LLMError):
+    """The requested model is not installed on the server."""
+
+def describe_error(error: Exception, model: str, base_url: str) -> str:
+    """Turns a client exception into an actionable message."""
+    error_msg = str(error)
+    if any(s in error_msg for s in ("Connection refused", "Failed to establish a new connection",
+                                    "Failed to connect")):
+        return (f"Could not connect to Ollama at {base_url}. "
+                "Please ensure 'ollama serve' is running.")
+    if "model" in error_msg and "not found" in error_msg:
+        return f"Model '{model}' not found. Please run 'ollama pull {model}' to download it."
+    return f"Failed to generate response. Details: {error_msg}"
+
+def classify_error(error: Exception, model: str, base_url: str) -> Exception:
+    """Maps a client exception to a typed LLMError carrying an actionable message."""
+    if isinstance(error, (LLMError, CircuitOpenError)):
+        return error
+    httpx, ollama = resolve(__name__, "httpx", "ollama")
+    message = describe_error(error, model, base_url)
+    if isinstance(error, (TimeoutError, httpx.TimeoutException)):
+        return LLMTimeoutError(f"Request to {base_url} timed out. Details: {error}")
+    if isinstance(error, (ConnectionError, httpx.TransportError)):
+        return LLMConnectionError(message)
+    status = None
+    if isinstance(error, ollama.ResponseError):
+        status = getattr(error, 'status_code', None)
+    if status == 404 or message.startswith("Model "):
+        return ModelNotFoundError(message)
+    if status is not None and (status >= 500 or status == 429):
+        return LLMServerError(message)
+    return LLMError(message)
+
 class OllamaClient:
     """Wrapper for Ollama API interaction with Caching."""
 
-    def __init__(self, model: str = "llama3", temperature: float = 0.0, base_url: str = "http://localhost:11434", cache_dir: str = ".cache"):
+    def __init__(self, model: str = "llama3", temperature: float = 0.0, base_url: str = "http://localhost:11434",
+                 cache_dir: str = ".cache", cache_backend: str = "log",
+                 cache_max_entries: Optional[int] = 10000,
+                 cache_max_bytes: Optional[int] = 64 * 1024 * 1024,
+                 cache_ttl: Optional[float] = None, stream: bool = False,
+                 keep_alive: Optional[Union[str, float]] = None,
+                 base_urls: Optional[List[str]] = None,
+                 balancing: str = "round_robin", health_check_interval: float = 30.0,
+                 timeout: Optional[float] = None, max_retries: int = 2, retry_backoff: float = 0.5,
+                 circuit_failure_threshold: int = 5, circuit_reset_seconds: float = 30.0):
         self.model = model
         self.temperature = temperature
+        # Timed-out and unreachable requests are retried with backoff; the breaker fails fast
+        # while the server keeps failing.
+        self.timeout = timeout
+        self.retry_policy = RetryPolicy(max_retries=max_retries, base_delay=retry_backoff)
+        self.breaker = CircuitBreaker(circuit_failure_threshold, circuit_reset_seconds)
+        # With several hosts, requests are balanced across them and base_url names the first.
+        self.base_urls = list(base_urls or [base_url])
+        self.base_url = self.base_urls[0]
+        self.balancing = balancing
+        self.health_check_interval = health_check_interval
+        self.stream = stream
+        # How long the server keeps the model (and its KV cache) loaded after a request
+        self.keep_alive = keep_alive
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.cache_file = self.cache_dir / "llm_cache.json"
-        self.cache = self._load_cache()
+        self.cache = self._load_cache(
+            cache_backend,
+            LRUCache(max_entries=cache_max_entries, max_bytes=cache_max_bytes,
+                     ttl_seconds=cache_ttl)
+        )
 
         # The official python client uses OLLAMA_HOST env var, but we can also set it if needed.
         # For now, we rely on the default behavior or env vars.
         # If we needed to change the host, we would use ollama.Client(host=base_url)
-        try:
-            self.client = ollama.Client(host=base_url)
-        except Exception as e:
-            logger.warning(f"Failed to initialize Ollama Client with specific host: {e}. Using default.")
-            self.client = ollama
-
-    def _load_cache(self) -> Dict[str, str]:
-        if self.cache_file.exists():
+        ollama, = resolve(__name__, "ollama")
+        if len(self.base_urls) > 1:
+            # A bad multi-host setup must fail loudly, not fall back to a single default host.
+            self.client = BalancedClient(self.base_urls, balancing, health_check_interval,
+                                         key_fn=request_cache_key, timeout=timeout)
+        else:
             try:
-                with open(self.cache_file, 'r') as f:
-                    return json.load(f)
+                self.client = ollama.Client(host=self.base_url, timeout=timeout)
             except Exception as e:
-                logger.warning(f"Failed to load cache: {e}")
-                return {}
-        return {}
+                logger.warning(f"Failed to initialize Ollama Client with specific host: {e}. Using default.")
+                self.client = ollama
 
-    def _save_cache(self):
-        try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f, indent=2)
-        except Exception as e:
-            logger.warning(f"Failed to save cache: {e}")
+    def _load_cache(self, backend: str, memory: LRUCache) -> TieredCache:
+        """Creates the persistent cache backend behind a bounded in-memory tier.
+
+        The persistent store indexes its entries lazily on first use; only
+        recently used responses are held in memory.
+        """
+        return TieredCache(cache_registry.create(backend, cache_dir=self.cache_dir), memory)
+
+    def cache_stats(self) -> dict[str, Any]:
+        """Returns hit/miss/eviction counters for the response cache."""
+        return self.cache.stats.to_dict()
+
+    def host_stats(self) -> dict[str, Any]:
+        """Per-host health and request counts when balancing across several hosts."""
+        return self.client.pool.stats() if isinstance(self.client, BalancedClient) else {}
 
-    def _get_cache_key(self, prompt: str, system: Optional[str]) -> str:
-        key_content = f"{self.model}_{self.temperature}_{prompt}_{system}"
-        return hashlib.md5(key_content.encode()).hexdigest()
+    def _get_cache_key(self, prompt: str, system: Optional[str],
+                       temperature: Optional[float] = None, seed: Optional[int] = None) -> str:
+        temperature = self.temperature if temperature is None else temperature
+        return make_cache_key(self.model, temperature, prompt, system, seed)
 
-    def generate(self, prompt: str, system: Optional[str] = None) -> str:
+    def _options(self, temperature: Optional[float], seed: Optional[int]) -> dict[str, Any]:
+        options: dict[str, Any] = {
+            "temperature": self.temperature if temperature is None else temperature,
+        }
+        if seed is not None:
+            options["seed"] = seed
+        return options
+
+    def _classify(self, error: Exception) -> Exception:
+        return classify_error(error, self.model, self.base_url)
+
+    def _request(self, call: Callable[[], T]) -> T:
+        """Runs one server call under the client's retry policy and circuit breaker."""
+        return retry_call(call, self._classify, self.retry_policy, self.breaker)
+
+    def _open_stream(self, **request: Any) -> Iterator[Any]:
+        # Waiting for the first chunk surfaces connection errors here, where they can be retried.
+        chunks = iter(self.client.generate(**request, stream=True))
+        first = next(chunks, None)
+        return itertools.chain([] if first is None else [first], chunks)
+
+    def generate(self, prompt: str, system: Optional[str] = None,
+                 temperature: Optional[float] = None, seed: Optional[int] = None) -> str:
         """
         Generates a response from the model with caching.
 
+        When the client was created with ``stream=True`` the response is
+        streamed so time-to-first-token can be measured; either way the
+        timing is available from ``last_generation_stats()`` afterwards.
+
         Args:
             prompt: The user prompt.
             system: Optional system prompt.
+            temperature: Overrides the client's temperature for this call.
+            seed: Sampling seed; seeded calls are cached under their own key.
 
         Returns:
             The generated text response.
+
+        Raises:
+            LLMError: The request failed (after retries, for transient errors).
+            CircuitOpenError: Recent requests kept failing, so the server was not called.
         """
-        cache_key = self._get_cache_key(prompt, system)
-        if cache_key in self.cache:
+        if self.stream:
+            return "".join(self.generate_stream(prompt, system, temperature=temperature, seed=seed))
+
+        cache_key = self._get_cache_key(prompt, system, temperature, seed)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
             logger.info("Cache hit for prompt.")
-            return self.cache[cache_key]
+            _last_generation_stats.set(GenerationStats(cached=True))
+            return cached
 
+        response = self._request(lambda: self.client.generate(
+            model=self.model,
+            prompt=prompt,
+            system=system,
+            options=self._options(temperature, seed),
+            stream=False,
+            keep_alive=self.keep_alive
+        ))
+
+        result = str(response['response'])
+        _last_generation_stats.set(_stats_from_response(response))
+        self.cache.set(cache_key, result)
+        return result
+
+    def generate_stream(self, prompt: str, system: Optional[str] = None,
+                        temperature: Optional[float] = None,
+                        seed: Optional[int] = None) -> Iterator[str]:
+        """
+        Streams response tokens as they arrive.
+
+        Cache hits are yielded as a single chunk. Once the stream is exhausted
+        the full text is cached and ``last_generation_stats()`` reports
+        time-to-first-token, mean inter-token latency and Ollama's
+        eval counters.
+
+        Args:
+            prompt: The user prompt.
+            system: Optional system prompt.
+            temperature: Overrides the client's temperature for this call.
+            seed: Sampling seed; seeded calls are cached under their own key.
+
+        Yields:
+            Response text chunks.
+
+        Raises:
+            LLMError: The request failed. Only failures before the first chunk are retried.
+            CircuitOpenError: Recent requests kept failing, so the server was not called.
+        """
+        cache_key = self._get_cache_key(prompt, system, temperature, seed)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.info("Cache hit for prompt.")
+            _last_generation_stats.set(GenerationStats(cached=True))
+            yield cached
+            return
+
+        timer = _StreamTimer()
+        parts = []
+        final_chunk: Any = None
+        chunks = self._request(lambda: self._open_stream(
+            model=self.model,
+            prompt=prompt,
+            system=system,
+            options=self._options(temperature, seed),
+            keep_alive=self.keep_alive
+        ))
         try:
-            options: dict[str, Any] = {
-                "temperature": self.temperature,
-            }
-            
-            response = self.client.generate(
-                model=self.model,
-                prompt=prompt,
-                system=system,
-                options=options,
-                stream=False
-            )
-            
-            result = str(response['response'])
-            self.cache[cache_key] = result
-            self._save_cache()
-            return result
-            
+            for chunk in chunks:
+                text = _field(chunk, 'response') or ""
+                if text:
+                    timer.tick()
+                    parts.append(text)
+                    yield text
+                final_chunk = chunk
         except Exception as e:
-            error_msg = str(e)
-            if "Connection refused" in error_msg or "Failed to establish a new connection" in error_msg:
-                actionable_msg = f"Error: Could not connect to Ollama at {self.client._client.base_url}. Please ensure 'ollama serve' is running."
-            elif "model" in error_msg and "not found" in error_msg:
-                 actionable_msg = f"Error: Model '{self.model}' not found. Please run 'ollama pull {self.model}' to download it."
-            else:
-                actionable_msg = f"Error: Failed to generate response. Details: {error_msg}"
-            
-            logger.error(actionable_msg)
-            return actionable_msg
+            raise self._classify(e) from e
+
+        _last_generation_stats.set(timer.finish(final_chunk))
+        self.cache.set(cache_key, "".join(parts))
+
+    def last_generation_stats(self) -> Optional[GenerationStats]:
+        """Stats of the latest generation made from the calling thread or task."""
+        return last_generation_stats()
 
     def check_connection(self) -> bool:
         """Checks if the Ollama server is reachable."""
@@ -167,3 +463,238 @@ class OllamaClient:
         except Exception as e:
             logger.error(f"Failed to list models: {e}")
             return []
+
+
+class AsyncRequestScheduler:
+    """
+    Bounds in-flight requests across models and queues them per model.
+
+    Each model gets its own FIFO queue drained by ``per_model_limit`` worker
+    tasks; a global semaphore caps the total number of requests in flight.
+    Must be created and used inside a single running event loop.
+    """
+
+    def __init__(self, max_in_flight: int = 64, per_model_limit: Optional[int] = None):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1.")
+        self.max_in_flight = max_in_flight
+        self.per_model_limit = per_model_limit or max_in_flight
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, list] = {}
+        self._running: Dict[str, Set[asyncio.Future]] = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def _queue_for(self, model: str) -> asyncio.Queue:
+        if model not in self._queues:
+            self._queues[model] = asyncio.Queue()
+            self._running[model] = set()
+            self._workers[model] = [
+                asyncio.ensure_future(self._worker(model)) for _ in range(self.per_model_limit)
+            ]
+        return self._queues[model]
+
+    async def submit(self, model: str, factory: Callable[[], Awaitable[T]]) -> T:
+        """Queues a request for model and waits for its result."""
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._queue_for(model).put((factory, future))
+        return await future
+
+    async def _worker(self, model: str) -> None:
+        queue = self._queues[model]
+        running = self._running[model]
+        while True:
+            factory, future = await queue.get()
+            try:
+                if future.done():
+                    continue  # Cancelled while waiting in the queue.
+                async with self._semaphore:
+                    if future.done():
+                        continue
+                    self.in_flight += 1
+                    self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                    task = asyncio.ensure_future(factory())
+                    future.add_done_callback(
+                        lambda f, t=task: t.cancel() if f.cancelled() else None
+                    )
+                    running.add(task)
+                    try:
+                        await asyncio.wait({task})
+                    except asyncio.CancelledError:
+                        task.cancel()
+                        raise
+                    finally:
+                        running.discard(task)
+                        self.in_flight -= 1
+                if future.done():
+                    continue
+                if task.cancelled():
+                    future.cancel()
+                elif task.exception() is not None:
+                    future.set_exception(task.exception())
+                else:
+                    future.set_result(task.result())
+            finally:
+                queue.task_done()
+
+    def cancel(self, model: Optional[str] = None) -> int:
+        """Cancels queued and in-flight requests for model (or all models). Returns the count."""
+        cancelled = 0
+        for name in [model] if model is not None else list(self._queues):
+            queue = self._queues.get(name)
+            if queue is None:
+                continue
+            while not queue.empty():
+                _, future = queue.get_nowait()
+                queue.task_done()
+                if future.cancel():
+                    cancelled += 1
+            for task in list(self._running[name]):
+                if task.cancel():
+                    cancelled += 1
+        return cancelled
+
+    async def aclose(self) -> None:
+        """Cancels outstanding work and stops the worker tasks."""
+        self.cancel()
+        workers = [w for ws in self._workers.values() for w in ws]
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._queues.clear()
+        self._workers.clear()
+        self._running.clear()
+
+
+class AsyncOllamaClient:
+    """
+    Asyncio counterpart of OllamaClient built on ``ollama.AsyncClient``.
+
+    Requests go through an AsyncRequestScheduler so hundreds can be in flight
+    from one thread. Responses share the cache key scheme (and, via
+    ``from_client``, the cache itself) with the synchronous client.
+    """
+
+    def __init__(self, model: str = "llama3", temperature: float = 0.0, base_url: str = "http://localhost:11434",
+                 cache: Optional[TieredCache] = None, max_in_flight: int = 64,
+                 per_model_limit: Optional[int] = None, stream: bool = False,
+                 keep_alive: Optional[Union[str, float]] = None,
+                 base_urls: Optional[List[str]] = None,
+                 balancing: str = "round_robin", health_check_interval: float = 30.0,
+                 timeout: Optional[float] = None, max_retries: int = 2, retry_backoff: float = 0.5,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
+        self.model = model
+        self.temperature = temperature
+        self.retry_policy = RetryPolicy(max_retries=max_retries, base_delay=retry_backoff)
+        self.breaker = circuit_breaker or CircuitBreaker()
+        self.base_urls = list(base_urls or [base_url])
+        self.base_url = self.base_urls[0]
+        self.stream = stream
+        self.keep_alive = keep_alive
+        self.cache = cache
+        ollama, = resolve(__name__, "ollama")
+        if len(self.base_urls) > 1:
+            self.client = AsyncBalancedClient(self.base_urls, balancing, health_check_interval,
+                                              key_fn=request_cache_key, timeout=timeout)
+        else:
+            self.client = ollama.AsyncClient(host=self.base_url, timeout=timeout)
+        self.scheduler = AsyncRequestScheduler(max_in_flight=max_in_flight,
+                                               per_model_limit=per_model_limit)
+
+    @classmethod
+    def from_client(cls, client: OllamaClient, **kwargs: Any) -> 'AsyncOllamaClient':
+        """Builds an async client sharing a sync client's model, hosts, cache and breaker."""
+        return cls(
+            model=client.model,
+            temperature=client.temperature,
+            base_url=client.base_url,
+            cache=client.cache,
+            stream=client.stream,
+            keep_alive=client.keep_alive,
+            base_urls=client.base_urls,
+            balancing=client.balancing,
+            health_check_interval=client.health_check_interval,
+            timeout=client.timeout,
+            max_retries=client.retry_policy.max_retries,
+            retry_backoff=client.retry_policy.base_delay,
+            circuit_breaker=client.breaker,
+            **kwargs
+        )
+
+    async def generate(self, prompt: str, system: Optional[str] = None, model: Optional[str] = None,
+                       temperature: Optional[float] = None, seed: Optional[int] = None) -> str:
+        """
+        Generates a response, scheduled on the queue for the target model.
+
+        Args:
+            prompt: The user prompt.
+            system: Optional system prompt.
+            model: Overrides the client's default model for this request.
+            temperature: Overrides the client's temperature for this request.
+            seed: Sampling seed; seeded requests are cached under their own key.
+
+        Returns:
+            The generated text response.
+
+        Raises:
+            LLMError: The request failed (after retries, for transient errors).
+            CircuitOpenError: Recent requests kept failing, so the server was not called.
+        """
+        model = model or self.model
+        temperature = self.temperature if temperature is None else temperature
+        cache_key = make_cache_key(model, temperature, prompt, system, seed)
+        if self.cache is not None:
+            # Backend lookups hit the disk, so they run off the event loop.
+            cached = await self.cache.aget(cache_key)
+            if cached is not None:
+                logger.info("Cache hit for prompt.")
+                _last_generation_stats.set(GenerationStats(cached=True))
+                return cached
+
+        async def request() -> Tuple[str, GenerationStats]:
+            options: Dict[str, Any] = {"temperature": temperature}
+            if seed is not None:
+                options["seed"] = seed
+            if not self.stream:
+                response = await self.client.generate(
+                    model=model, prompt=prompt, system=system, options=options, stream=False,
+                    keep_alive=self.keep_alive
+                )
+                return str(response['response']), _stats_from_response(response)
+
+            timer = _StreamTimer()
+            parts = []
+            final_chunk: Any = None
+            async for chunk in await self.client.generate(
+                model=model, prompt=prompt, system=system, options=options, stream=True,
+                keep_alive=self.keep_alive
+            ):
+                text = _field(chunk, 'response') or ""
+                if text:
+                    timer.tick()
+                    parts.append(text)
+                final_chunk = chunk
+            return "".join(parts), timer.finish(final_chunk)
+
+        # Each attempt is queued afresh, so a retry holds no scheduler slot while backing off.
+        result, stats = await aretry_call(
+            lambda: self.scheduler.submit(model, request),
+            lambda error: classify_error(error, model, self.base_url),
+            self.retry_policy, self.breaker,
+        )
+
+        # Set here rather than in request(): the scheduler runs that in its own task context.
+        _last_generation_stats.set(stats)
+        if self.cache is not None:
+            await self.cache.aset(cache_key, result)
+        return result
+
+    def cancel(self, model: Optional[str] = None) -> int:
+        """Cancels pending and in-flight requests."""
+        return self.scheduler.cancel(model)
+
+    async def aclose(self) -> None:
+        """Stops the scheduler and closes the HTTP connection pool."""
+        await self.scheduler.aclose()
+        await self.client.close()
@@ -0,0 +1,311 @@
+"""
+Load balancing across several Ollama hosts.
+"""
+import bisect
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from src.utils.lazy import lazy_imports, resolve
+
+__getattr__ = lazy_imports(__name__, ollama="ollama", httpx="httpx")
+
+logger = logging.getLogger(__name__)
+
+BALANCING_POLICIES = ("round_robin", "least_outstanding", "consistent_hash")
+
+
+def is_unavailable(error: Exception) -> bool:
+    """True when the host rather than the request failed, so another host may succeed."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    httpx, ollama = resolve(__name__, "httpx", "ollama")
+    if isinstance(error, httpx.TransportError):
+        return True
+    return isinstance(error, ollama.ResponseError) and error.status_code >= 500
+
+
+@dataclass
+class Endpoint:
+    """One Ollama host and its routing state."""
+    url: str
+    client: Any
+    healthy: bool = True
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    retry_at: float = 0.0
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes; losing a host remaps only its share of keys."""
+
+    def __init__(self, nodes: List[str], replicas: int = 64):
+        self._ring = sorted(
+            (self._hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas)
+        )
+        self._hashes = [h for h, _ in self._ring]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+    def nodes_for(self, key: str) -> List[str]:
+        """Distinct nodes in ring order starting at the key's position."""
+        start = bisect.bisect(self._hashes, self._hash(key))
+        nodes: List[str] = []
+        for i in range(len(self._ring)):
+            node = self._ring[(start + i) % len(self._ring)][1]
+            if node not in nodes:
+                nodes.append(node)
+        return nodes
+
+
+class EndpointPool:
+    """
+    Picks hosts for requests and tracks their health.
+
+    ``candidates`` returns every endpoint in the order to try: the policy's
+    pick first, the remaining healthy hosts as failover, and hosts marked
+    down last. A host that fails with an availability error is marked down
+    and skipped until ``health_check_interval`` has passed, after which it is
+    probed before it receives traffic again.
+    """
+
+    def __init__(self, urls: List[str], client_factory: Callable[[str], Any],
+                 policy: str = "round_robin", health_check_interval: float = 30.0):
+        if not urls:
+            raise ValueError("At least one endpoint URL is required.")
+        if policy not in BALANCING_POLICIES:
+            raise ValueError(
+                f"Unknown balancing policy '{policy}'. Expected one of {BALANCING_POLICIES}."
+            )
+        self.policy = policy
+        self.health_check_interval = health_check_interval
+        self.endpoints = [Endpoint(url, client_factory(url)) for url in dict.fromkeys(urls)]
+        self._by_url = {endpoint.url: endpoint for endpoint in self.endpoints}
+        self._ring = HashRing(list(self._by_url))
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def candidates(self, key: Optional[str] = None) -> List[Endpoint]:
+        with self._lock:
+            if self.policy == "consistent_hash" and key is not None:
+                ordered = [self._by_url[url] for url in self._ring.nodes_for(key)]
+            else:
+                ordered = list(self.endpoints)
+            now = time.monotonic()
+            up = [e for e in ordered if e.healthy or now >= e.retry_at]
+            down = [e for e in ordered if e not in up]
+            if up and (self.policy != "consistent_hash" or key is None):
+                # Rotate over available hosts only, so a dead host's turns are shared evenly.
+                start = next(self._turn) % len(up)
+                up = up[start:] + up[:start]
+                if self.policy == "least_outstanding":
+                    up.sort(key=lambda endpoint: endpoint.outstanding)
+            return up + down
+
+    def begin(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+
+    def end(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.outstanding -= 1
+
+    def mark_up(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            if not endpoint.healthy:
+                logger.info(f"Ollama host {endpoint.url} is back up.")
+            endpoint.healthy = True
+
+    def mark_down(self, endpoint: Endpoint, error: Exception) -> None:
+        with self._lock:
+            endpoint.failures += 1
+            endpoint.retry_at = time.monotonic() + self.health_check_interval
+            if endpoint.healthy:
+                logger.warning(f"Ollama host {endpoint.url} marked down: {error}")
+            endpoint.healthy = False
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host health, live and total request counts, and failures."""
+        with self._lock:
+            return {
+                e.url: {
+                    "healthy": e.healthy,
+                    "outstanding": e.outstanding,
+                    "requests": e.requests,
+                    "failures": e.failures,
+                }
+                for e in self.endpoints
+            }
+
+
+class BalancedClient:
+    """
+    Drop-in for ``ollama.Client`` that spreads requests over several hosts.
+
+    ``key_fn`` maps a request's keyword arguments to the key the
+    "consistent_hash" policy routes on, so identical requests keep landing on
+    the host that already served them. Requests failing with an availability
+    error move on to the next candidate; streams only fail over before their
+    first chunk.
+    """
+
+    def __init__(self, urls: List[str], policy: str = "round_robin",
+                 health_check_interval: float = 30.0,
+                 key_fn: Optional[Callable[[Dict[str, Any]], str]] = None,
+                 timeout: Optional[float] = None):
+        ollama, = resolve(__name__, "ollama")
+        self.pool = EndpointPool(urls, lambda url: ollama.Client(host=url, timeout=timeout), policy,
+                                 health_check_interval)
+        self.key_fn = key_fn
+
+    def generate(self, **kwargs: Any) -> Any:
+        if kwargs.get("stream"):
+            return self._stream(kwargs)
+        return self._call(lambda client: client.generate(**kwargs), self._key(kwargs))
+
+    def list(self) -> Any:
+        return self._call(lambda client: client.list())
+
+    def check_health(self) -> Dict[str, bool]:
+        """Probes every host now and returns url -> reachable."""
+        for endpoint in self.pool.endpoints:
+            self._probe(endpoint)
+        return {e.url: e.healthy for e in self.pool.endpoints}
+
+    def _key(self, kwargs: Dict[str, Any]) -> Optional[str]:
+        return self.key_fn(kwargs) if self.key_fn is not None else None
+
+    def _probe(self, endpoint: Endpoint) -> bool:
+        try:
+            endpoint.client.list()
+        except Exception as e:
+            self.pool.mark_down(endpoint, e)
+            return False
+        self.pool.mark_up(endpoint)
+        return True
+
+    def _call(self, request: Callable[[Any], Any], key: Optional[str] = None) -> Any:
+        error: Optional[Exception] = None
+        for endpoint in self.pool.candidates(key):
+            if not endpoint.healthy and not self._probe(endpoint):
+                continue
+            self.pool.begin(endpoint)
+            try:
+                return request(endpoint.client)
+            except Exception as e:
+                if not is_unavailable(e):
+                    raise
+                self.pool.mark_down(endpoint, e)
+                error = e
+            finally:
+                self.pool.end(endpoint)
+        raise error or ConnectionError("No Ollama host is reachable.")
+
+    def _stream(self, kwargs: Dict[str, Any]) -> Iterator[Any]:
+        error: Optional[Exception] = None
+        for endpoint in self.pool.candidates(self._key(kwargs)):
+            if not endpoint.healthy and not self._probe(endpoint):
+                continue
+            started = False
+            self.pool.begin(endpoint)
+            try:
+                for chunk in endpoint.client.generate(**kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not is_unavailable(e):
+                    raise
+                self.pool.mark_down(endpoint, e)
+                error = e
+            finally:
+                self.pool.end(endpoint)
+        raise error or ConnectionError("No Ollama host is reachable.")
+
+
+class AsyncBalancedClient:
+    """Drop-in for ``ollama.AsyncClient`` with the same routing as BalancedClient."""
+
+    def __init__(self, urls: List[str], policy: str = "round_robin",
+                 health_check_interval: float = 30.0,
+                 key_fn: Optional[Callable[[Dict[str, Any]], str]] = None,
+                 timeout: Optional[float] = None):
+        ollama, = resolve(__name__, "ollama")
+        self.pool = EndpointPool(urls, lambda url: ollama.AsyncClient(host=url, timeout=timeout),
+                                 policy, health_check_interval)
+        self.key_fn = key_fn
+
+    async def generate(self, **kwargs: Any) -> Any:
+        if kwargs.get("stream"):
+            return self._stream(kwargs)
+        return await self._call(lambda client: client.generate(**kwargs), self._key(kwargs))
+
+    async def list(self) -> Any:
+        return await self._call(lambda client: client.list())
+
+    async def check_health(self) -> Dict[str, bool]:
+        for endpoint in self.pool.endpoints:
+            await self._probe(endpoint)
+        return {e.url: e.healthy for e in self.pool.endpoints}
+
+    async def close(self) -> None:
+        for endpoint in self.pool.endpoints:
+            await endpoint.client.close()
+
+    def _key(self, kwargs: Dict[str, Any]) -> Optional[str]:
+        return self.key_fn(kwargs) if self.key_fn is not None else None
+
+    async def _probe(self, endpoint: Endpoint) -> bool:
+        try:
+            await endpoint.client.list()
+        except Exception as e:
+            self.pool.mark_down(endpoint, e)
+            return False
+        self.pool.mark_up(endpoint)
+        return True
+
+    async def _call(self, request: Callable[[Any], Any], key: Optional[str] = None) -> Any:
+        error: Optional[Exception] = None
+        for endpoint in self.pool.candidates(key):
+            if not endpoint.healthy and not await self._probe(endpoint):
+                continue
+            self.pool.begin(endpoint)
+            try:
+                return await request(endpoint.client)
+            except Exception as e:
+                if not is_unavailable(e):
+                    raise
+                self.pool.mark_down(endpoint, e)
+                error = e
+            finally:
+                self.pool.end(endpoint)
+        raise error or ConnectionError("No Ollama host is reachable.")
+
+    async def _stream(self, kwargs: Dict[str, Any]) -> AsyncIterator[Any]:
+        error: Optional[Exception] = None
+        for endpoint in self.pool.candidates(self._key(kwargs)):
+            if not endpoint.healthy and not await self._probe(endpoint):
+                continue
+            started = False
+            self.pool.begin(endpoint)
+            try:
+                async for chunk in await endpoint.client.generate(**kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not is_unavailable(e):
+                    raise
+                self.pool.mark_down(endpoint, e)
+                error = e
+            finally:
+                self.pool.end(endpoint)
+        raise error or ConnectionError("No Ollama host is reachable.")
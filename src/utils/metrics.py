@@ -2,35 +2,118 @@
 Metrics module for calculating vector distances between texts.
 """
 import logging
-from typing import List
+import math
+from pathlib import Path
+from typing import List, Optional
 
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_distances
+import numpy as np
 
 from src.core.registry import metric_registry
+from src.utils.embedding_cache import EmbeddingCache
+from src.utils.labels import extract_label, parse_label
+from src.utils.lazy import lazy_imports, resolve
+from src.utils.model_pool import ModelPool
+
+# sentence-transformers pulls in torch; load it only when an evaluator is built.
+__getattr__ = lazy_imports(
+    __name__, SentenceTransformer="sentence_transformers:SentenceTransformer"
+)
 
 logger = logging.getLogger(__name__)
 
+def _load_sentence_transformer(model_name: str):
+    SentenceTransformer, = resolve(__name__, "SentenceTransformer")
+    return SentenceTransformer(model_name)
+
+# Loaded embedding models shared by every SimilarityEvaluator in the process
+embedding_model_pool = ModelPool(_load_sentence_transformer, name="embedding model")
+
+def rowwise_cosine_distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Cosine distance between matching rows of two (n, d) arrays.
+
+    Rows with a zero norm get the maximum-safety distance of 1.0.
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    dots = np.einsum('ij,ij->i', a, b)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        similarity = np.where(norms > 0, dots / norms, 0.0)
+    return 1.0 - similarity
+
 @metric_registry.register("Cosine Similarity")
 class SimilarityEvaluator:
     """Evaluates text similarity using vector embeddings."""
 
     name = "Cosine Similarity"
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", batch_size: int = 64,
+                 cache_size: int = 50000, cache_dir: Optional[Path] = None,
+                 server_socket: Optional[str] = None):
         """
         Initialize the evaluator with a specific Sentence Transformer model.
+
+        The model comes from embedding_model_pool, so evaluators for the same
+        model share one loaded copy; call close() to release it. With
+        server_socket, texts are encoded by an EmbeddingServer instead.
         
         Args:
             model_name: The name of the model to load from Hugging Face Hub.
+            batch_size: Encoder batch size used by calculate_batch_distances.
+            cache_size: Number of embeddings kept in the in-memory LRU.
+            cache_dir: Optional directory for a persistent memory-mapped embedding store.
+            server_socket: Unix socket of a running embedding server to encode with.
         """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.embedding_cache = EmbeddingCache(model_name, max_entries=cache_size,
+                                              directory=cache_dir)
+        self.server_socket = server_socket
+        self._released = False
+        if server_socket is not None:
+            from src.utils.embedding_server import EmbeddingClient
+            logger.info(f"Encoding with embedding server at {server_socket}")
+            self.model = EmbeddingClient(server_socket, model_name)
+            return
         try:
-            logger.info(f"Loading embedding model: {model_name}")
-            self.model = SentenceTransformer(model_name)
+            self.model = embedding_model_pool.acquire(model_name)
         except Exception as e:
             logger.error(f"Failed to load embedding model {model_name}: {e}")
             raise
 
+    def close(self) -> None:
+        """Flushes the embedding cache and releases the pooled model (or server connections)."""
+        self.flush_cache()
+        if self._released:
+            return
+        if self.server_socket is not None:
+            self.model.close()
+        else:
+            embedding_model_pool.release(self.model_name)
+        self._released = True
+
+    def encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Embeds texts, encoding only those not already in the embedding cache.
+
+        Duplicate texts within the call are encoded once.
+        """
+        cached = self.embedding_cache.get_many(texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, cached, strict=True) if v is None))
+        if missing:
+            encoded = np.asarray(
+                self.model.encode(missing, batch_size=batch_size or self.batch_size)
+            )
+            fresh = {text: encoded[i] for i, text in enumerate(missing)}
+            self.embedding_cache.put_many(missing, [fresh[t] for t in missing])
+            cached = [v if v is not None else fresh[t] for t, v in zip(texts, cached, strict=True)]
+        return np.stack(cached)
+
+    def flush_cache(self) -> None:
+        """Persists newly computed embeddings to the on-disk store, if configured."""
+        self.embedding_cache.flush()
+
     def evaluate(self, prediction: str, reference: str) -> float:
         """Alias for calculate_distance to satisfy MetricEvaluator protocol."""
         return self.calculate_distance(prediction, reference)
@@ -51,18 +134,60 @@ class SimilarityEvaluator:
             logger.warning("Empty text provided for distance calculation.")
             return 1.0 # Max distance for failure safety
 
-        embeddings = self.model.encode([text1, text2])
-        # cosine_distances returns a matrix. We want the distance between [0] and [1].
-        # dist matrix: [[0, d], [d, 0]]
-        dist = cosine_distances([embeddings[0]], [embeddings[1]])[0][0]
-        return float(dist)
+        embeddings = self.encode([text1, text2])
+        return float(rowwise_cosine_distance(embeddings[:1], embeddings[1:])[0])
+
+    def calculate_batch_distances(self, predictions: List[str], references: List[str],
+                                  batch_size: Optional[int] = None) -> List[float]:
+        """
+        Calculates distances for a batch of pairs.
+
+        All texts are encoded in a single call and distances are computed as a
+        vectorized row-wise cosine; empty texts get the maximum distance of 1.0.
+        """
+        if len(predictions) != len(references):
+            raise ValueError("Predictions and references must have the same length.")
+        if not predictions:
+            return []
+
+        distances = np.ones(len(predictions))
+        valid = [i for i, (p, r) in enumerate(zip(predictions, references, strict=True)) if p and r]
+        if len(valid) < len(predictions):
+            logger.warning(f"{len(predictions) - len(valid)} empty texts provided "
+                           f"for distance calculation.")
+        if valid:
+            texts = [predictions[i] for i in valid] + [references[i] for i in valid]
+            embeddings = self.encode(texts, batch_size=batch_size)
+            distances[valid] = rowwise_cosine_distance(embeddings[:len(valid)],
+                                                       embeddings[len(valid):])
+        return distances.tolist()
+
+
+@metric_registry.register("Label Match")
+class LabelMatchEvaluator:
+    """
+    Scores an answer by its Yes/No label: 0.0 when it matches the reference, 1.0 when not.
+
+    Labels come from compiled regular expressions (``src.utils.labels``), so a
+    row costs microseconds instead of two embeddings. Answers without one
+    clear label score NaN, marking them for a finer metric.
+    """
+
+    name = "Label Match"
+
+    def evaluate(self, prediction: str, reference: str) -> float:
+        """
+        Args:
+            prediction: The model output.
+            reference: The expected label ("Yes"/"No") or a reference answer starting with it.
+        """
+        expected = extract_label(reference)
+        predicted = parse_label(prediction)
+        if expected is None or predicted is None:
+            return math.nan
+        return 0.0 if predicted == expected else 1.0
 
     def calculate_batch_distances(self, predictions: List[str], references: List[str]) -> List[float]:
-        """Calculates distances for a batch of pairs."""
         if len(predictions) != len(references):
             raise ValueError("Predictions and references must have the same length.")
-            
-        distances = []
-        for pred, ref in zip(predictions, references, strict=False):
-            distances.append(self.calculate_distance(pred, ref))
-        return distances
+        return [self.evaluate(p, r) for p, r in zip(predictions, references, strict=True)]
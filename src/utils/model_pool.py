@@ -0,0 +1,117 @@
+"""
+Process-wide pool of loaded models shared between evaluators.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolEntry:
+    """A loaded model and its bookkeeping."""
+    model: Any
+    load_seconds: float
+    refs: int = 0
+    acquisitions: int = 0
+    pinned: bool = False
+
+
+class ModelPool:
+    """
+    Loads each model once per process and hands out shared references.
+
+    ``acquire`` loads on first use (concurrent callers for the same name wait
+    for a single load) and counts references; ``release`` drops one. Models
+    stay warm at zero references so back-to-back runs reuse them, until
+    ``evict_idle`` or ``clear`` is called. ``preload`` loads and pins models
+    up front so they are never evicted as idle.
+    """
+
+    def __init__(self, loader: Callable[[str], Any], name: str = "model"):
+        self.loader = loader
+        self.name = name
+        self._entries: Dict[str, PoolEntry] = {}
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, model_name: str) -> Any:
+        """Returns the shared model, loading it if needed, and adds a reference."""
+        entry = self._load(model_name)
+        with self._lock:
+            entry.refs += 1
+            entry.acquisitions += 1
+        return entry.model
+
+    def release(self, model_name: str) -> None:
+        """Drops one reference; the model stays loaded."""
+        with self._lock:
+            entry = self._entries.get(model_name)
+            if entry is None or entry.refs == 0:
+                logger.warning(f"Release of {self.name} '{model_name}' without a matching acquire.")
+                return
+            entry.refs -= 1
+
+    def preload(self, model_names: Iterable[str]) -> None:
+        """Loads models ahead of time and pins them in the pool."""
+        for model_name in model_names:
+            self._load(model_name).pinned = True
+
+    def evict_idle(self) -> List[str]:
+        """Unloads unpinned models with no references; returns their names."""
+        with self._lock:
+            idle = [name for name, e in self._entries.items() if e.refs == 0 and not e.pinned]
+            for name in idle:
+                del self._entries[name]
+        if idle:
+            logger.info(f"Evicted idle {self.name}s: {idle}")
+        return idle
+
+    def clear(self) -> None:
+        """Drops every model regardless of references."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model load time, live references and acquisition counts."""
+        with self._lock:
+            return {
+                name: {
+                    "load_seconds": e.load_seconds,
+                    "refs": e.refs,
+                    "acquisitions": e.acquisitions,
+                    "pinned": e.pinned,
+                }
+                for name, e in self._entries.items()
+            }
+
+    def __contains__(self, model_name: str) -> bool:
+        with self._lock:
+            return model_name in self._entries
+
+    def _load(self, model_name: str) -> PoolEntry:
+        with self._lock:
+            entry = self._entries.get(model_name)
+            if entry is not None:
+                return entry
+            loading = self._loading.setdefault(model_name, threading.Lock())
+
+        with loading:
+            # Another thread may have finished loading while we waited.
+            with self._lock:
+                entry: Optional[PoolEntry] = self._entries.get(model_name)
+            if entry is not None:
+                return entry
+
+            logger.info(f"Loading {self.name}: {model_name}")
+            start = time.perf_counter()
+            model = self.loader(model_name)
+            entry = PoolEntry(model=model, load_seconds=time.perf_counter() - start)
+            logger.info(f"Loaded {self.name} {model_name} in {entry.load_seconds:.2f}s")
+            with self._lock:
+                self._entries[model_name] = entry
+                self._loading.pop(model_name, None)
+            return entry
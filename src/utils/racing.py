@@ -0,0 +1,91 @@
+"""
+Racing strategies against each other to stop evaluating clearly worse ones early.
+"""
+import math
+import threading
+from statistics import NormalDist
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from src.utils.stats import RunningStats
+
+
+class StrategyRace:
+    """
+    Running confidence bounds on each strategy's mean metric (lower is better).
+
+    Scored rows are folded in as they arrive; ``end_round`` then drops every
+    strategy whose lower bound lies above the best upper bound of the
+    others, since it is worse than that strategy with high confidence. Bounds
+    use a normal approximation of the mean. The error budget ``delta`` is
+    split across strategies and spent over rounds (``delta / (k r (r + 1))``
+    in round r), so it holds however many rounds a streamed dataset takes.
+    Strategies need ``min_items`` scores before they can be compared.
+    """
+
+    def __init__(self, strategies: Sequence[str], delta: float = 0.05, min_items: int = 30,
+                 metric: str = "vector_distance"):
+        if not 0 < delta < 1:
+            raise ValueError("delta must be between 0 and 1.")
+        self.delta = delta
+        self.min_items = max(2, min_items)
+        self.metric = metric
+        self.stats: Dict[str, RunningStats] = {name: RunningStats() for name in strategies}
+        self.active: List[str] = list(strategies)
+        # Eliminated strategy -> its round, scored items, mean and bounds when it was dropped.
+        self.eliminated: Dict[str, Dict[str, Any]] = {}
+        self.rounds = 0
+        self._lock = threading.Lock()
+
+    @property
+    def settled(self) -> bool:
+        """True once a single strategy is left, so the ranking of the best is known."""
+        return len(self.active) <= 1
+
+    def update(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Adds scored rows; failed rows and strategies outside the race are ignored."""
+        values: Dict[str, List[float]] = {}
+        for row in rows:
+            if row.get('status', "ok") != "failed" and row.get('strategy') in self.stats:
+                values.setdefault(row['strategy'], []).append(row.get(self.metric, math.nan))
+        with self._lock:
+            for name, batch in values.items():
+                self.stats[name].update(batch)
+
+    def bounds(self) -> Dict[str, Tuple[float, float, float]]:
+        """(mean, lower, upper) per active strategy at the current round's confidence."""
+        rounds = max(self.rounds, 1)
+        round_delta = self.delta / (len(self.stats) * rounds * (rounds + 1))
+        z = NormalDist().inv_cdf(1 - round_delta / 2)
+        bounds = {}
+        with self._lock:
+            for name in self.active:
+                stats = self.stats[name]
+                if stats.count < self.min_items:
+                    bounds[name] = (stats.mean if stats.count else math.nan, -math.inf, math.inf)
+                    continue
+                radius = z * math.sqrt(stats.m2 / (stats.count - 1) / stats.count)
+                bounds[name] = (stats.mean, stats.mean - radius, stats.mean + radius)
+        return bounds
+
+    def end_round(self) -> List[str]:
+        """Closes a round of items; returns the strategies eliminated by it."""
+        self.rounds += 1
+        bounds = self.bounds()
+        dropped = []
+        for name, (mean, low, high) in bounds.items():
+            rivals = [bounds[other][2] for other in bounds if other != name]
+            if rivals and low > min(rivals):
+                dropped.append(name)
+                self.eliminated[name] = {"round": self.rounds, "items": self.stats[name].count,
+                                         "mean": mean, "low": low, "high": high}
+        self.active = [name for name in self.active if name not in dropped]
+        return dropped
+
+    def summary(self) -> Dict[str, Any]:
+        """Rounds run, active strategies with their bounds, and when each other one was dropped."""
+        return {
+            "rounds": self.rounds,
+            "active": {name: dict(zip(("mean", "low", "high"), b, strict=True))
+                       for name, b in self.bounds().items()},
+            "eliminated": {name: dict(info) for name, info in self.eliminated.items()},
+        }
@@ -0,0 +1,172 @@
+"""
+Retries with exponential backoff and a circuit breaker for remote calls.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the server while the circuit breaker is open."""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff of ``base_delay * 2**attempt``, capped at ``max_delay``, with jitter."""
+    max_retries: int = 2
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    jitter: float = 0.1
+
+    def delay(self, attempt: int) -> float:
+        delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+
+class CircuitBreaker:
+    """
+    Fails fast once a server keeps failing.
+
+    ``failure_threshold`` consecutive failures open the circuit, and calls
+    raise CircuitOpenError without reaching the server. After
+    ``reset_timeout`` seconds one trial call is let through (half-open): a
+    success closes the circuit, a failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> None:
+        with self._lock:
+            state = self._state()
+            now = self._clock()
+            # A trial that never reported back (e.g. it was cancelled) expires after reset_timeout.
+            trial_pending = (self._trial_started is not None
+                             and now - self._trial_started < self.reset_timeout)
+            if state == "open" or (state == "half_open" and trial_pending):
+                raise CircuitOpenError(
+                    f"Circuit open after {self.failures} consecutive failures; "
+                    f"next trial in {max(0.0, self.reset_timeout - (now - self._opened_at)):.0f}s."
+                )
+            self._trial_started = now if state == "half_open" else None
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit closed: server is responding again.")
+            self.failures = 0
+            self._opened_at = None
+            self._trial_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_started = None
+            if self._opened_at is not None or self.failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(f"Circuit opened after {self.failures} consecutive failures.")
+                self._opened_at = self._clock()
+
+
+def _retryable(error: Exception) -> bool:
+    return getattr(error, "retryable", False)
+
+
+def _record(breaker: CircuitBreaker, error: Exception) -> None:
+    # A non-retryable error means the server answered, which keeps the circuit closed.
+    if _retryable(error):
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+
+def retry_call(call: Callable[[], T], classify: Callable[[Exception], Exception],
+               policy: RetryPolicy, breaker: Optional[CircuitBreaker] = None,
+               sleep: Callable[[float], None] = time.sleep) -> T:
+    """
+    Runs ``call``, retrying failures whose classified error is ``retryable``.
+
+    ``classify`` turns a raw exception into the typed error that is raised
+    once retries run out (or straight away for non-retryable errors).
+    Only retryable failures count towards the breaker.
+    """
+    for attempt in range(policy.max_retries + 1):
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = call()
+        except Exception as e:
+            error = classify(e)
+            if breaker is not None:
+                _record(breaker, error)
+            if not _retryable(error) or attempt == policy.max_retries:
+                if error is e:
+                    raise
+                raise error from e
+            delay = policy.delay(attempt)
+            logger.warning(
+                f"{error} Retrying in {delay:.1f}s ({attempt + 1}/{policy.max_retries})."
+            )
+            sleep(delay)
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
+    raise AssertionError("unreachable")
+
+
+async def aretry_call(call: Callable[[], Awaitable[T]], classify: Callable[[Exception], Exception],
+                      policy: RetryPolicy, breaker: Optional[CircuitBreaker] = None) -> T:
+    """Async variant of retry_call; cancellation is never retried."""
+    for attempt in range(policy.max_retries + 1):
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = classify(e)
+            if breaker is not None:
+                _record(breaker, error)
+            if not _retryable(error) or attempt == policy.max_retries:
+                if error is e:
+                    raise
+                raise error from e
+            delay = policy.delay(attempt)
+            logger.warning(
+                f"{error} Retrying in {delay:.1f}s ({attempt + 1}/{policy.max_retries})."
+            )
+            await asyncio.sleep(delay)
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
+    raise AssertionError("unreachable")
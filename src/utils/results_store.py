@@ -0,0 +1,215 @@
+"""
+Columnar results history: Parquet partitioned by run, model and strategy.
+"""
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+from src.utils.lazy import lazy_imports, resolve
+from src.utils.stats import STATS_METRICS, StatsAccumulator
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# pyarrow loads when results are first written or read.
+__getattr__ = lazy_imports(
+    __name__, pd="pandas", pa="pyarrow", pc="pyarrow.compute", ds="pyarrow.dataset"
+)
+
+logger = logging.getLogger(__name__)
+
+# Directory levels of the store, outermost first: <root>/run_id=<id>/model=<m>/strategy=<s>/
+PARTITION_COLUMNS = ("run_id", "model", "strategy")
+
+
+class ResultStore:
+    """
+    Hive-partitioned Parquet dataset of result rows, plus a catalog of runs.
+
+    Saving a run replaces only that run's partitions, so history accumulates
+    across runs. Reads go through ``pyarrow.dataset``: filters on run, model
+    or strategy skip whole directories, other filters are pushed down to
+    Parquet row-group statistics, and only the requested columns are decoded.
+    The catalog (``_catalog.json``) lists runs without touching the data, and
+    ``_stats/<run_id>.json`` holds each run's per-model streaming statistics,
+    updated whenever its rows are written or checkpointed (``add_stats``), so
+    summaries need no data scan.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.catalog_path = self.root / "_catalog.json"
+        self.stats_dir = self.root / "_stats"
+
+    def _partitioning(self):
+        ds, pa = resolve(__name__, "ds", "pa")
+        schema = pa.schema([(name, pa.string()) for name in PARTITION_COLUMNS])
+        return ds.partitioning(schema, flavor="hive")
+
+    def write(self, df: 'pd.DataFrame') -> None:
+        """Writes every run in df, replacing earlier partitions of the same run/model/strategy."""
+        missing = set(PARTITION_COLUMNS) - set(df.columns)
+        if missing:
+            raise ValueError(f"Results are missing partition columns {sorted(missing)}.")
+        if df.empty:
+            return
+        pa, pc, ds = resolve(__name__, "pa", "pc", "ds")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        for name in PARTITION_COLUMNS:
+            index = table.schema.get_field_index(name)
+            table = table.set_column(index, name, pc.cast(table[name], pa.string()))
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        ds.write_dataset(
+            table, self.root, format="parquet", partitioning=self._partitioning(),
+            basename_template="part-{i}.parquet", existing_data_behavior="delete_matching",
+        )
+        self._update_catalog(df)
+        self._update_stats(df)
+        runs = sorted(df['run_id'].dropna().unique())
+        logger.info(f"Saved {len(df)} rows for runs {runs} to {self.root}")
+
+    def _update_catalog(self, df: 'pd.DataFrame') -> None:
+        catalog = {entry['run_id']: entry for entry in self.runs()}
+        now = time.strftime('%Y-%m-%dT%H:%M:%S')
+        for run_id, rows in df.groupby('run_id', dropna=True):
+            previous = catalog.get(run_id, {})
+            catalog[run_id] = {
+                "run_id": run_id,
+                "created": previous.get("created", now),
+                "updated": now,
+                "rows": len(rows),
+                "failed": int((rows['status'] == "failed").sum()) if 'status' in rows else 0,
+                "models": sorted(rows['model'].dropna().unique().tolist()),
+                "strategies": sorted(rows['strategy'].dropna().unique().tolist()),
+                "columns": list(rows.columns),
+            }
+        entries = sorted(catalog.values(), key=lambda entry: (entry['created'], entry['run_id']))
+        tmp = self.catalog_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(entries, indent=2))
+        os.replace(tmp, self.catalog_path)
+
+    def _stats_path(self, run_id: str) -> Path:
+        return self.stats_dir / f"{run_id}.json"
+
+    def _read_stats(self, run_id: str) -> Optional[Dict[str, StatsAccumulator]]:
+        path = self._stats_path(run_id)
+        if not path.exists():
+            return None
+        data = json.loads(path.read_text())
+        return {model: StatsAccumulator.from_dict(acc) for model, acc in data.items()}
+
+    def _write_stats(self, run_id: str, stats: Dict[str, StatsAccumulator]) -> None:
+        self.stats_dir.mkdir(parents=True, exist_ok=True)
+        path = self._stats_path(run_id)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({model: acc.to_dict() for model, acc in sorted(stats.items())}))
+        os.replace(tmp, path)
+
+    def add_stats(self, rows: Sequence[Dict[str, Any]]) -> None:
+        """Folds new rows (e.g. a checkpointed batch) into their runs' statistics."""
+        pd, = resolve(__name__, "pd")
+        df = pd.DataFrame(list(rows))
+        if df.empty or not {'run_id', 'model'} <= set(df.columns):
+            return
+        for run_id, run_rows in df.groupby('run_id', dropna=True):
+            stats = self._read_stats(run_id) or {}
+            for model, part in run_rows.groupby(run_rows['model'].astype(str)):
+                added = StatsAccumulator().update(part)
+                stats[model] = stats[model].merge(added) if model in stats else added
+            self._write_stats(run_id, stats)
+
+    def _update_stats(self, df: 'pd.DataFrame') -> None:
+        # Like the data, only the (model, strategy) partitions written are replaced.
+        for run_id, run_rows in df.groupby('run_id', dropna=True):
+            stats = self._read_stats(run_id) or {}
+            for model, rows in run_rows.groupby(run_rows['model'].astype(str)):
+                written = StatsAccumulator().update(rows)
+                previous = stats.get(model)
+                if previous is not None:
+                    written = previous.drop(written.groups).merge(written)
+                stats[model] = written
+            self._write_stats(run_id, stats)
+
+    def stats(self, run_ids: Optional[Sequence[str]] = None,
+              models: Optional[Sequence[str]] = None) -> StatsAccumulator:
+        """
+        Merged statistics of the given runs (all by default) and models.
+
+        Runs saved before statistics were kept are scanned once and their
+        statistics stored.
+        """
+        merged = StatsAccumulator()
+        for run_id in (run_ids if run_ids is not None else [run['run_id'] for run in self.runs()]):
+            stats = self._read_stats(run_id)
+            if stats is None:
+                columns = PARTITION_COLUMNS + ("status",) + STATS_METRICS
+                rows = self.load(columns=columns, run_ids=[run_id])
+                stats = {str(model): StatsAccumulator().update(part)
+                         for model, part in rows.groupby('model')}
+                if stats:
+                    self._write_stats(run_id, stats)
+            for model, acc in stats.items():
+                if models is None or model in models:
+                    merged.merge(acc)
+        return merged
+
+    def runs(self) -> List[Dict[str, Any]]:
+        """Catalog entries, oldest run first."""
+        if not self.catalog_path.exists():
+            return []
+        return json.loads(self.catalog_path.read_text())
+
+    def latest_run(self) -> Optional[str]:
+        runs = self.runs()
+        return runs[-1]['run_id'] if runs else None
+
+    def load(self, columns: Optional[Sequence[str]] = None, run_ids: Optional[Sequence[str]] = None,
+             models: Optional[Sequence[str]] = None, strategies: Optional[Sequence[str]] = None,
+             where: Any = None) -> 'pd.DataFrame':
+        """
+        Reads the matching rows into a DataFrame.
+
+        ``run_ids``, ``models`` and ``strategies`` restrict the partitions read;
+        ``where`` is an extra ``pyarrow.dataset`` expression, e.g.
+        ``ds.field("status") == "ok"``. Unknown columns are skipped.
+        """
+        if not self.root.is_dir():
+            raise FileNotFoundError(f"No results stored under {self.root}")
+        pd, pa, ds = resolve(__name__, "pd", "pa", "ds")
+        partitions = None
+        for name, values in zip(PARTITION_COLUMNS, (run_ids, models, strategies), strict=True):
+            if values is not None:
+                condition = ds.field(name).isin(list(values))
+                partitions = condition if partitions is None else partitions & condition
+
+        # Prune files by their partition directories before opening any of them.
+        discovered = ds.dataset(self.root, format="parquet", partitioning=self._partitioning())
+        fragments = list(discovered.get_fragments(filter=partitions) if partitions is not None
+                         else discovered.get_fragments())
+        if not fragments:
+            return pd.DataFrame(columns=list(columns or []))
+
+        # Runs may differ in columns or null-only types; unify the selected file footers.
+        schema = pa.unify_schemas([f.physical_schema for f in fragments],
+                                  promote_options="permissive")
+        for name in PARTITION_COLUMNS:
+            schema = schema.append(pa.field(name, pa.string()))
+        dataset = ds.dataset([f.path for f in fragments], schema=schema, format="parquet",
+                             partitioning=self._partitioning(), partition_base_dir=str(self.root))
+        if columns is not None:
+            columns = [c for c in dict.fromkeys(columns) if c in schema.names]
+        if where is None or partitions is None:
+            expression = partitions if where is None else where
+        else:
+            expression = partitions & where
+        return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def results_location(path: Path, fmt: str) -> Path:
+    """Where results of format fmt live: a file with its suffix, or a "dataset" directory."""
+    path = Path(path)
+    return path.with_suffix("") if fmt == "dataset" else path.with_suffix(f".{fmt}")
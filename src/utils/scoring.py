@@ -0,0 +1,199 @@
+"""
+Batched scoring stage that runs alongside generation.
+"""
+import logging
+import math
+import queue
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class ScoringStage:
+    """
+    Background thread that scores result rows in batches.
+
+    Generation workers ``submit`` rows holding ``model_output`` and
+    ``ground_truth``; the stage collects up to ``batch_size`` rows (or
+    whatever arrived within ``max_wait`` seconds) and scores them with one
+    ``calculate_batch_distances`` call, so the encoder sees large batches
+    from a single thread while generation continues. ``on_batch``, when
+    given, receives each scored batch (e.g. to persist it incrementally).
+    ``wait`` blocks until every row submitted so far has been scored. A
+    batch that cannot be scored at all is kept with ``status: "failed"``.
+
+    With a ``label_metric`` scoring is tiered: the cheap metric scores every
+    row into ``label_distance``, and ``evaluator`` only embeds a
+    deterministic ``embed_fraction`` sample of the rows, chosen by a hash of
+    the row's unit key so a resumed run samples the same rows, plus the rows
+    the label metric left unscored (NaN, i.e. ambiguous). ``vector_distance``
+    holds the sample only, so its statistics stay a uniform sample of every
+    row; ambiguous rows get their distance in ``ambiguous_vector_distance``.
+    """
+
+    def __init__(self, evaluator: Any, batch_size: int = 64, max_wait: float = 0.05,
+                 on_batch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                 label_metric: Optional[Any] = None, embed_fraction: float = 1.0):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+        if not 0.0 <= embed_fraction <= 1.0:
+            raise ValueError("embed_fraction must be between 0 and 1.")
+        self.evaluator = evaluator
+        self.label_metric = label_metric
+        self.embed_fraction = embed_fraction
+        # Rows scored so far, and how many of them were embedded
+        self.scored = 0
+        self.embedded = 0
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.on_batch = on_batch
+        self.batches = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._results: List[Dict[str, Any]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._pending = 0
+        self._idle = threading.Condition()
+
+    def start(self) -> 'ScoringStage':
+        self._thread = threading.Thread(target=self._run, name="scoring-stage", daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, row: Dict[str, Any]) -> None:
+        """Queues a result row for scoring."""
+        with self._idle:
+            self._pending += 1
+        self._queue.put(row)
+
+    def wait(self) -> None:
+        """Blocks until every submitted row has been scored and passed to ``on_batch``."""
+        with self._idle:
+            self._idle.wait_for(lambda: self._pending == 0)
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Flushes outstanding rows and returns every scored row."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        return self._results
+
+    def __enter__(self) -> 'ScoringStage':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.batch_size:
+                try:
+                    row = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            try:
+                self._score(batch)
+            except Exception as e:
+                # Keep the thread alive: a dead stage would leave wait() blocked forever.
+                logger.error(f"Scoring batch of {len(batch)} rows failed: {e}")
+                self._fail(batch, e)
+            finally:
+                with self._idle:
+                    self._pending -= len(batch)
+                    self._idle.notify_all()
+
+    def _fail(self, batch: List[Dict[str, Any]], error: Exception) -> None:
+        """Keeps an unscorable batch as "failed" rows; they skip ``on_batch`` and the checkpoint."""
+        for row in batch:
+            row['vector_distance'] = math.nan
+            row['status'] = "failed"
+            row['error'] = f"{type(error).__name__}: {error}"
+        self._results.extend(batch)
+
+    def _sampled(self, row: Dict[str, Any]) -> bool:
+        key = str(row.get('unit_key') or row['model_output'])
+        return zlib.crc32(key.encode()) < self.embed_fraction * 2 ** 32
+
+    def _score(self, batch: List[Dict[str, Any]]) -> None:
+        embed = batch
+        if self.label_metric is not None:
+            try:
+                labels = self.label_metric.calculate_batch_distances(
+                    [row['model_output'] for row in batch],
+                    [row.get('label') or row['ground_truth'] for row in batch],
+                )
+            except Exception as e:
+                # Unlabelled rows all fall through to the embedding tier.
+                logger.error(f"Label scoring failed: {e}")
+                labels = [math.nan] * len(batch)
+            embed = []
+            for row, label in zip(batch, labels, strict=True):
+                label = math.nan if label is None else float(label)
+                row['label_distance'] = label
+                row['vector_distance'] = row['ambiguous_vector_distance'] = math.nan
+                if math.isnan(label) or self._sampled(row):
+                    embed.append(row)
+        if embed:
+            self._embed(embed)
+            if self.label_metric is not None:
+                self._split_ambiguous(embed)
+        self.scored += len(batch)
+        self.embedded += len(embed)
+        self._results.extend(batch)
+        self.batches += 1
+        if self.on_batch is not None:
+            try:
+                self.on_batch(batch)
+            except Exception as e:
+                logger.error(f"Scored batch callback failed: {e}")
+
+    def _split_ambiguous(self, embedded: List[Dict[str, Any]]) -> None:
+        """Copies ambiguous rows' distances to ``ambiguous_vector_distance``."""
+        for row in embedded:
+            if math.isnan(row['label_distance']):
+                row['ambiguous_vector_distance'] = row['vector_distance']
+                if not self._sampled(row):
+                    # Outside the sample, so kept out of vector_distance and its statistics
+                    row['vector_distance'] = math.nan
+
+    def _embed(self, batch: List[Dict[str, Any]]) -> None:
+        predictions = [row['model_output'] for row in batch]
+        references = [row['ground_truth'] for row in batch]
+        try:
+            if hasattr(self.evaluator, 'calculate_batch_distances'):
+                distances = self.evaluator.calculate_batch_distances(predictions, references)
+            else:
+                distances = [self.evaluator.evaluate(p, r)
+                             for p, r in zip(predictions, references, strict=True)]
+            distances = list(distances)
+            if len(distances) != len(batch):
+                raise ValueError(f"Expected {len(batch)} distances, got {len(distances)}.")
+        except Exception as e:
+            logger.error(f"Batch scoring failed, scoring rows individually: {e}")
+            distances = [self._score_one(p, r)
+                         for p, r in zip(predictions, references, strict=True)]
+
+        for row, distance in zip(batch, distances, strict=True):
+            row['vector_distance'] = distance
+
+    def _score_one(self, prediction: str, reference: str) -> float:
+        try:
+            return self.evaluator.evaluate(prediction, reference)
+        except Exception as e:
+            logger.error(f"Scoring failed: {e}")
+            return math.nan
@@ -0,0 +1,167 @@
+"""
+Bootstrap confidence intervals and paired permutation tests between strategies.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from typing import TYPE_CHECKING, Callable, List, Optional, Sequence, Tuple
+
+from src.utils.lazy import lazy_imports, resolve
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+__getattr__ = lazy_imports(__name__, np="numpy", pd="pandas")
+
+# Rows that stand for the same item under every strategy.
+PAIR_ON = ("model", "question")
+# Entries per resampling matrix (8 MB of indices); larger chunks are slower, not faster.
+CHUNK_ELEMENTS = 1_000_000
+
+
+def _resample(values: 'np.ndarray', n_resamples: int,
+              draw: Callable[['np.random.Generator', int, int], 'np.ndarray'],
+              seed: int, chunk_size: Optional[int], workers: Optional[int]) -> 'np.ndarray':
+    """
+    Evaluates ``draw(rng, rows, n)`` over chunks of resamples and concatenates the results.
+
+    Each chunk has its own generator spawned from the seed, so results do not
+    depend on the number of workers. NumPy releases the GIL while drawing and
+    gathering, so chunks run in parallel on threads.
+    """
+    np, = resolve(__name__, "np")
+    n = len(values)
+    chunk_size = chunk_size or max(1, CHUNK_ELEMENTS // max(n, 1))
+    sizes = [min(chunk_size, n_resamples - start) for start in range(0, n_resamples, chunk_size)]
+    rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(len(sizes))]
+    workers = min(workers or os.cpu_count() or 1, len(sizes))
+    if workers <= 1:
+        return np.concatenate([draw(rng, rows, n) for rng, rows in zip(rngs, sizes, strict=True)])
+    with ThreadPoolExecutor(workers) as pool:
+        return np.concatenate(list(pool.map(draw, rngs, sizes, [n] * len(sizes))))
+
+
+def bootstrap_means(values: Sequence[float], n_resamples: int = 10_000, seed: int = 0,
+                    chunk_size: Optional[int] = None, workers: Optional[int] = 1) -> 'np.ndarray':
+    """Means of ``n_resamples`` bootstrap resamples, each drawn as one row of an index matrix."""
+    np, = resolve(__name__, "np")
+    values = np.asarray(values, dtype=float)
+
+    def draw(rng, rows, n):
+        return values[rng.integers(0, n, size=(rows, n))].mean(axis=1)
+
+    return _resample(values, n_resamples, draw, seed, chunk_size, workers)
+
+
+def bootstrap_ci(values: Sequence[float], confidence: float = 0.95, n_resamples: int = 10_000,
+                 seed: int = 0, chunk_size: Optional[int] = None,
+                 workers: Optional[int] = 1) -> Tuple[float, float, float]:
+    """Mean and percentile bootstrap confidence interval of the mean; NaNs without values."""
+    np, = resolve(__name__, "np")
+    values = np.asarray(values, dtype=float)
+    if not len(values):
+        return (np.nan, np.nan, np.nan)
+    means = bootstrap_means(values, n_resamples, seed, chunk_size, workers)
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(means, [alpha, 1 - alpha])
+    return float(values.mean()), float(low), float(high)
+
+
+def permutation_test(differences: Sequence[float], n_resamples: int = 10_000, seed: int = 0,
+                     chunk_size: Optional[int] = None, workers: Optional[int] = 1) -> float:
+    """
+    Two-sided p-value of a zero mean paired difference.
+
+    Under the null hypothesis the two strategies are exchangeable on each
+    item, so every difference keeps its size but may flip its sign. Each
+    resample is a row of a random sign matrix.
+    """
+    np, = resolve(__name__, "np")
+    differences = np.asarray(differences, dtype=float)
+    if not len(differences):
+        return float("nan")
+    total = differences.sum()
+    observed = abs(total)
+
+    def draw(rng, rows, n):
+        # A signed sum is twice the sum of the kept differences, minus the total.
+        kept = rng.integers(0, 2, size=(rows, n), dtype=np.int8)
+        return np.abs(2 * (kept @ differences) - total)
+
+    flipped = _resample(differences, n_resamples, draw, seed, chunk_size, workers)
+    # The observed assignment counts as one of the permutations, so p is never zero.
+    extreme = np.count_nonzero(flipped >= observed - 1e-12 * max(observed, 1.0))
+    return float((extreme + 1) / (n_resamples + 1))
+
+
+def holm(p_values: Sequence[float]) -> List[float]:
+    """Holm-Bonferroni adjusted p-values for a family of tests."""
+    np, = resolve(__name__, "np")
+    p = np.asarray(p_values, dtype=float)
+    order = np.argsort(p)
+    adjusted = np.maximum.accumulate(p[order] * (len(p) - np.arange(len(p))))
+    result = np.empty_like(p)
+    result[order] = np.minimum(adjusted, 1.0)
+    return result.tolist()
+
+
+def paired_items(df: 'pd.DataFrame', metric: str,
+                 pair_on: Sequence[str] = PAIR_ON) -> 'pd.DataFrame':
+    """
+    Successful rows as an item x strategy matrix of the metric.
+
+    Repeated items (equal ``pair_on`` values) are averaged; cells of items a
+    strategy did not score are NaN.
+    """
+    keys = [c for c in pair_on if c in df.columns]
+    if not keys:
+        raise ValueError(
+            f"Results need one of the columns {list(pair_on)} to pair strategies on items."
+        )
+    if 'status' in df.columns:
+        df = df[df['status'] != "failed"]
+    df = df.assign(**{key: df[key].fillna("") for key in keys})
+    return df.pivot_table(index=keys, columns='strategy', values=metric, aggfunc='mean')
+
+
+def confidence_intervals(df: 'pd.DataFrame', metric: str, confidence: float = 0.95,
+                         n_resamples: int = 10_000, seed: int = 0,
+                         workers: Optional[int] = 1) -> 'pd.DataFrame':
+    """Per strategy: mean, bootstrap CI bounds and row count of the successful rows."""
+    pd, = resolve(__name__, "pd")
+    if 'status' in df.columns:
+        df = df[df['status'] != "failed"]
+    rows = {}
+    for strategy, values in df.groupby('strategy')[metric]:
+        values = values.dropna().to_numpy(dtype=float)
+        mean, low, high = bootstrap_ci(values, confidence, n_resamples, seed, workers=workers)
+        rows[strategy] = {"mean": mean, "ci_low": low, "ci_high": high, "n": len(values)}
+    table = pd.DataFrame.from_dict(rows, orient="index", columns=["mean", "ci_low", "ci_high", "n"])
+    table.index.name = "strategy"
+    return table.sort_values("mean")
+
+
+def pairwise_tests(df: 'pd.DataFrame', metric: str, confidence: float = 0.95,
+                   n_resamples: int = 10_000, seed: int = 0,
+                   workers: Optional[int] = 1) -> 'pd.DataFrame':
+    """
+    Paired comparisons of every two strategies on the items both scored.
+
+    ``mean_diff`` is the mean of (a - b) with its bootstrap CI, ``p_value``
+    comes from a sign-flip permutation test and ``p_holm`` corrects it for
+    the number of pairs compared.
+    """
+    pd, = resolve(__name__, "pd")
+    columns = ["strategy_a", "strategy_b", "n_pairs", "mean_diff",
+               "ci_low", "ci_high", "p_value", "p_holm"]
+    items = paired_items(df, metric)
+    rows = []
+    for a, b in combinations(sorted(items.columns), 2):
+        differences = (items[a] - items[b]).dropna().to_numpy(dtype=float)
+        mean, low, high = bootstrap_ci(differences, confidence, n_resamples, seed, workers=workers)
+        p_value = permutation_test(differences, n_resamples, seed, workers=workers)
+        rows.append([a, b, len(differences), mean, low, high, p_value])
+    table = pd.DataFrame(rows, columns=columns[:-1])
+    table["p_holm"] = holm(table["p_value"]) if rows else []
+    return table.sort_values("p_value", ignore_index=True)
@@ -0,0 +1,263 @@
+"""
+Streaming, mergeable statistics of result metrics.
+"""
+import copy
+import math
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Sequence, Tuple
+
+from src.utils.lazy import lazy_imports, resolve
+from src.utils.summary import SUMMARY_COLUMNS
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+__getattr__ = lazy_imports(__name__, np="numpy", pd="pandas")
+
+# Numeric result columns tracked per strategy.
+STATS_METRICS = ("vector_distance", "label_distance", "ambiguous_vector_distance", "latency",
+                 "ttft", "inter_token_latency", "tokens_per_sec", "prompt_eval_duration")
+# Sketch accuracy: about 3k values are kept and the rank error is roughly 1.7/k.
+SKETCH_K = 200
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang & Liberty, 2016).
+
+    Values enter level 0. A level over its capacity is sorted and every other
+    value moves up a level, where it stands for twice as many values. Memory
+    stays bounded whatever the stream length, sketches of disjoint streams
+    merge by concatenating their levels, and quantiles are exact until the
+    first compaction.
+    """
+
+    def __init__(self, k: int = SKETCH_K, seed: int = 0):
+        np, = resolve(__name__, "np")
+        self.k = k
+        self.levels: List['np.ndarray'] = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def count(self) -> int:
+        """Number of values summarized."""
+        return sum(len(level) << i for i, level in enumerate(self.levels))
+
+    def _capacity(self, level: int) -> int:
+        # Lower levels get geometrically less room than the top one.
+        depth = len(self.levels) - 1 - level
+        return max(8, math.ceil(self.k * (2 / 3) ** depth))
+
+    def update(self, values: Iterable[float]) -> 'KLLSketch':
+        """Adds a batch of values; NaNs are skipped."""
+        np, = resolve(__name__, "np")
+        values = np.asarray(values, dtype=float)
+        self.levels[0] = np.concatenate([self.levels[0], values[~np.isnan(values)]])
+        self._compress()
+        return self
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """Folds in a sketch of other values."""
+        np, = resolve(__name__, "np")
+        self.levels += [np.empty(0)] * (len(other.levels) - len(self.levels))
+        for i, level in enumerate(other.levels):
+            self.levels[i] = np.concatenate([self.levels[i], level])
+        self._compress()
+        return self
+
+    def _compress(self) -> None:
+        np, = resolve(__name__, "np")
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd value out stays behind; a random half of the rest is promoted.
+                odd = len(items) % 2
+                promoted = items[odd + int(self.rng.integers(2))::2]
+                self.levels[level] = items[:odd]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantiles(self, qs: Sequence[float]) -> 'np.ndarray':
+        """Approximate quantiles, interpolated like ``numpy.quantile``; NaN when empty."""
+        np, = resolve(__name__, "np")
+        values = np.concatenate(self.levels)
+        if not len(values):
+            return np.full(len(qs), np.nan)
+        weights = np.concatenate([np.full(len(level), float(1 << i))
+                                  for i, level in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        values, weights = values[order], weights[order]
+        # Each value covers the ranks from its start up to the next value's start.
+        starts = np.cumsum(weights) - weights
+        return np.interp(np.asarray(qs, dtype=float) * (weights.sum() - 1), starts, values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"k": self.k, "levels": [level.tolist() for level in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'KLLSketch':
+        np, = resolve(__name__, "np")
+        sketch = cls(data["k"])
+        sketch.levels = [np.asarray(level, dtype=float) for level in data["levels"]]
+        return sketch
+
+
+class RunningStats:
+    """Count, mean, M2, min and max of one metric, updated in batches, with a quantile sketch."""
+
+    def __init__(self, k: int = SKETCH_K):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = KLLSketch(k)
+
+    def update(self, values: Iterable[float]) -> 'RunningStats':
+        """Adds a batch of values; NaNs are skipped."""
+        np, = resolve(__name__, "np")
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            mean = float(values.mean())
+            self._combine(len(values), mean, float(((values - mean) ** 2).sum()),
+                          float(values.min()), float(values.max()))
+            self.sketch.update(values)
+        return self
+
+    def merge(self, other: 'RunningStats') -> 'RunningStats':
+        """Folds in the statistics of other values."""
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def _combine(self, count: int, mean: float, m2: float, lo: float, hi: float) -> None:
+        # Welford's update, generalized to batches (Chan et al.): exact for any split of the values.
+        if not count:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        self.min, self.max = min(self.min, lo), max(self.max, hi)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2,
+                "min": self.min, "max": self.max, "sketch": self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RunningStats':
+        stats = cls()
+        stats.count, stats.mean, stats.m2 = data["count"], data["mean"], data["m2"]
+        stats.min, stats.max = data["min"], data["max"]
+        stats.sketch = KLLSketch.from_dict(data["sketch"])
+        return stats
+
+
+class StatsAccumulator:
+    """
+    Per-strategy statistics of result rows, built without keeping the rows.
+
+    ``update`` folds in rows as they are written; ``merge`` combines
+    accumulators of disjoint rows (shards, models or runs) into what one
+    pass over all of them would give. Successful rows feed the metric
+    statistics; every row counts towards its strategy's status counts.
+    """
+
+    def __init__(self, metrics: Sequence[str] = STATS_METRICS, by: str = "strategy",
+                 k: int = SKETCH_K):
+        self.metrics = tuple(metrics)
+        self.by = by
+        self.k = k
+        self.stats: Dict[Tuple[str, str], RunningStats] = {}
+        self.counts: Dict[str, Counter] = {}
+
+    @property
+    def groups(self) -> List[str]:
+        return sorted(set(self.counts) | {group for group, _ in self.stats})
+
+    def update(self, df: 'pd.DataFrame') -> 'StatsAccumulator':
+        """Adds a frame of result rows, one vectorized batch per (group, metric)."""
+        pd, = resolve(__name__, "pd")
+        if df.empty or self.by not in df.columns:
+            return self
+        status = df['status'] if 'status' in df.columns else pd.Series("ok", index=df.index)
+        for (group, value), n in status.groupby(df[self.by]).value_counts().items():
+            self.counts.setdefault(str(group), Counter())[str(value)] += int(n)
+
+        metrics = [m for m in self.metrics if m in df.columns]
+        for group, rows in df.loc[status != "failed", [self.by] + metrics].groupby(self.by):
+            for metric in metrics:
+                values = pd.to_numeric(rows[metric], errors="coerce").to_numpy(dtype=float)
+                stats = RunningStats(self.k).update(values)
+                if stats.count:
+                    self.stats.setdefault((str(group), metric), RunningStats(self.k)).merge(stats)
+        return self
+
+    def merge(self, other: 'StatsAccumulator') -> 'StatsAccumulator':
+        """Folds in another accumulator's rows; other is left unchanged."""
+        for key, stats in other.stats.items():
+            if key in self.stats:
+                self.stats[key].merge(stats)
+            else:
+                self.stats[key] = copy.deepcopy(stats)
+        for group, counts in other.counts.items():
+            self.counts.setdefault(group, Counter()).update(counts)
+        return self
+
+    def select(self, groups: Iterable[str]) -> 'StatsAccumulator':
+        """A copy restricted to the given groups."""
+        keep = set(groups)
+        selected = StatsAccumulator(self.metrics, self.by, self.k)
+        selected.stats = {key: copy.deepcopy(s) for key, s in self.stats.items() if key[0] in keep}
+        selected.counts = {group: Counter(c) for group, c in self.counts.items() if group in keep}
+        return selected
+
+    def drop(self, groups: Iterable[str]) -> 'StatsAccumulator':
+        """Forgets the given groups, e.g. before their rows are rewritten."""
+        return self.select(set(self.groups) - set(groups))
+
+    def summary(self) -> 'pd.DataFrame':
+        """Moments indexed by (group, metric), in the format of ``src.utils.summary``."""
+        pd, = resolve(__name__, "pd")
+        keys = sorted(self.stats)
+        index = pd.MultiIndex.from_tuples(keys, names=[self.by, "metric"]) if keys else \
+            pd.MultiIndex.from_arrays([[], []], names=[self.by, "metric"])
+        rows = [[getattr(self.stats[key], column) for column in SUMMARY_COLUMNS] for key in keys]
+        return pd.DataFrame(rows, index=index, columns=list(SUMMARY_COLUMNS))
+
+    def quantiles(self, metric: str, qs: Sequence[float]) -> 'pd.DataFrame':
+        """Approximate quantiles of one metric, one row per group and one column per quantile."""
+        pd, = resolve(__name__, "pd")
+        groups = [group for group, name in sorted(self.stats) if name == metric]
+        rows = [self.stats[(group, metric)].sketch.quantiles(qs) for group in groups]
+        return pd.DataFrame(rows, index=pd.Index(groups, name=self.by), columns=list(qs))
+
+    def status_counts(self) -> 'pd.DataFrame':
+        """Rows per group and status."""
+        pd, = resolve(__name__, "pd")
+        counts = pd.DataFrame.from_dict(self.counts, orient="index").fillna(0).astype(int)
+        counts.index.name = self.by
+        return counts.sort_index()
+
+    def to_dict(self) -> Dict[str, Any]:
+        stats: Dict[str, Dict[str, Any]] = {}
+        for (group, metric), s in sorted(self.stats.items()):
+            stats.setdefault(group, {})[metric] = s.to_dict()
+        counts = {group: dict(c) for group, c in sorted(self.counts.items())}
+        return {"by": self.by, "metrics": list(self.metrics), "k": self.k,
+                "stats": stats, "counts": counts}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StatsAccumulator':
+        acc = cls(data["metrics"], data["by"], data["k"])
+        acc.stats = {(group, metric): RunningStats.from_dict(s)
+                     for group, metrics in data["stats"].items() for metric, s in metrics.items()}
+        acc.counts = {group: Counter(c) for group, c in data["counts"].items()}
+        return acc
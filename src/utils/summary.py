@@ -0,0 +1,19 @@
+"""
+Tables of per-strategy metric summaries.
+"""
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Per (group, metric) moments, as produced by ``StatsAccumulator.summary``.
+SUMMARY_COLUMNS = ("count", "mean", "m2", "min", "max")
+
+
+def summary_table(summary: 'pd.DataFrame', metric: str) -> 'pd.DataFrame':
+    """Mean, var, std, min, max and count of one metric per group, best (lowest) mean first."""
+    table = summary.xs(metric, level="metric").copy()
+    table["var"] = table["m2"] / (table["count"] - 1)
+    table["std"] = table["var"] ** 0.5
+    table["count"] = table["count"].astype(int)
+    return table[["mean", "var", "std", "min", "max", "count"]].sort_values("mean")
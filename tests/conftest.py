@@ -0,0 +1,163 @@
+"""
+Shared pytest fixtures.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    """
+    Minimal stand-in for the Ollama HTTP API (``/api/generate`` and ``/api/tags``).
+
+    Prompt evaluation is modelled as a single KV-cache slot: only the words
+    after the prefix shared with the previous request are counted (1 ms each).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, delay: float = 0.0, port: int = 0):
+        super().__init__(("127.0.0.1", port), _FakeOllamaHandler)
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.kv_slot = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def reply(self, body: dict) -> str:
+        return f"Yes. Echo: {body.get('prompt', '')[:40]}"
+
+    def prompt_eval(self, body: dict) -> int:
+        """Words evaluated for this request after reusing the slot's cached prefix."""
+        tokens = f"{body.get('system') or ''} {body.get('prompt', '')}".split()
+        with self.lock:
+            shared = 0
+            # Only the shared prefix matters, so the shorter sequence ends the comparison.
+            for cached, token in zip(self.kv_slot, tokens, strict=False):
+                if cached != token:
+                    break
+                shared += 1
+            self.kv_slot = tokens
+        return len(tokens) - shared
+
+
+class _FakeOllamaHandler(BaseHTTPRequestHandler):
+
+    def _send_json(self, payload: dict) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, reply: str, final: dict) -> None:
+        """Sends the reply word by word as newline-delimited JSON, then the stats chunk."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for word in reply.split(" "):
+            chunk = {"model": final["model"], "created_at": final["created_at"],
+                     "response": word + " ", "done": False}
+            self.wfile.write(json.dumps(chunk).encode() + b"\n")
+            self.wfile.flush()
+        self.wfile.write(json.dumps({**final, "response": ""}).encode() + b"\n")
+        self.close_connection = True
+
+    def do_GET(self):
+        self._send_json({"models": [{"name": "fake-model", "model": "fake-model"}]})
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        with server.lock:
+            server.requests.append(body)
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            if server.delay:
+                time.sleep(server.delay)
+            reply = server.reply(body)
+            evaluated = server.prompt_eval(body)
+            final = {
+                "model": body.get("model", "fake-model"),
+                "created_at": "2024-01-01T00:00:00Z",
+                "response": reply,
+                "done": True,
+                "prompt_eval_count": evaluated,
+                "prompt_eval_duration": evaluated * 1_000_000,
+                "eval_count": len(reply.split()),
+                "eval_duration": 500_000_000,
+            }
+            if body.get("stream"):
+                self._send_stream(reply, final)
+            else:
+                self._send_json(final)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_ollama_server(port: int = 0) -> FakeOllamaServer:
+    server = FakeOllamaServer(port=port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stop_fake_ollama_server(server: FakeOllamaServer) -> None:
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fake_ollama_server():
+    server = start_fake_ollama_server()
+    yield server
+    stop_fake_ollama_server(server)
+
+
+@pytest.fixture
+def fake_ollama_cluster():
+    servers = [start_fake_ollama_server() for _ in range(3)]
+    yield servers
+    for server in servers:
+        if server.socket.fileno() != -1:
+            stop_fake_ollama_server(server)
+
+
+@pytest.fixture(autouse=True)
+def isolated_checkpoints(tmp_path, monkeypatch):
+    """Keeps run checkpoints written by tests out of the working tree."""
+    from src.config.config import config
+    monkeypatch.setattr(config.paths, 'checkpoints', tmp_path / "runs")
+    return tmp_path / "runs"
+
+
+@pytest.fixture(autouse=True)
+def isolated_results(tmp_path, monkeypatch):
+    """Keeps saved results and figures written by tests out of the working tree."""
+    from src.config.config import config
+    monkeypatch.setattr(config.paths, 'results', tmp_path / "results" / "experiments.csv")
+    monkeypatch.setattr(config.paths, 'figures', tmp_path / "results" / "figures")
+    return tmp_path / "results"
+
+
+@pytest.fixture(autouse=True)
+def empty_embedding_pool():
+    """Tests patch SentenceTransformer, so no loaded model may leak between them."""
+    from src.utils.metrics import embedding_model_pool
+    embedding_model_pool.clear()
+    yield embedding_model_pool
+    embedding_model_pool.clear()
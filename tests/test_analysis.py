@@ -3,7 +3,8 @@ from unittest.mock import patch
 import pandas as pd
 import pytest
 
-from src.analysis import ResultAnalyzer
+from src.analysis import FIGURES, PLOT_QUANTILES, PREVIEW_DPI, ResultAnalyzer
+from src.utils.results_store import ResultStore
 
 
 class TestResultAnalyzer:
@@ -25,7 +26,8 @@ class TestResultAnalyzer:
         dummy_results = tmp_path / "results.csv"
         dummy_results.touch()
         
-        analyzer = ResultAnalyzer(results_path=dummy_results)
+        # Render in-process so the patched plotting modules are used
+        analyzer = ResultAnalyzer(results_path=dummy_results, workers=1)
         # Override output dir to tmp_path
         analyzer.output_dir = tmp_path
         
@@ -34,15 +36,134 @@ class TestResultAnalyzer:
         # Verify CSV loading
         mock_read_csv.assert_called_once()
         
-        # Verify Plots
+        # Verify Plots, drawn from aggregates rather than raw rows
         assert mock_plt.figure.call_count == 2
-        assert mock_sns.barplot.call_count == 1
-        assert mock_sns.violinplot.call_count == 1
+        assert mock_plt.bar.call_count == 1
+        assert mock_plt.gca.return_value.bxp.call_count == 1
         assert mock_plt.savefig.call_count == 2
+        mock_sns.barplot.assert_not_called()
         
         # Verify stats csv saved
         assert (tmp_path / "summary_stats.csv").exists()
 
+    @patch('src.analysis.plt')
+    @patch('src.analysis.sns')
+    def test_figure_data_from_aggregates(self, mock_sns, mock_plt, mock_df):
+        distances = mock_df.groupby('strategy')['vector_distance']
+        summary = distances.agg(['mean', 'std']).sort_values('mean')
+        quantiles = distances.quantile(list(PLOT_QUANTILES)).unstack()
+        data = ResultAnalyzer.figure_data(summary, quantiles)
+        assert set(data) == set(FIGURES)
+        assert data["mean_distance_comparison.png"]["mean"] == pytest.approx([0.15, 0.55])
+        assert data["distance_distribution.png"]["quantiles"][0][2] == pytest.approx(0.15)
+
+    @patch('src.analysis.render_mean_plot')
+    @patch('src.analysis.render_distribution_plot')
+    def test_unchanged_figures_are_not_redrawn(self, mock_distribution, mock_mean, mock_df,
+                                               tmp_path):
+        def draw(data, path, dpi):
+            path.write_bytes(b"png")
+
+        mock_mean.side_effect = draw
+        mock_distribution.side_effect = draw
+        figures = {"mean_distance_comparison.png": {"mean": [0.1]},
+                   "distance_distribution.png": {"q": [0.2]}}
+        with patch.dict('src.analysis.FIGURES', {"mean_distance_comparison.png": mock_mean,
+                                                 "distance_distribution.png": mock_distribution}):
+            analyzer = ResultAnalyzer(results_path=tmp_path / "r.csv", workers=1)
+            analyzer.output_dir = tmp_path
+            assert len(analyzer.render_figures(figures)) == 2
+            assert analyzer.render_figures(figures) == []
+
+            figures["distance_distribution.png"] = {"q": [0.3]}
+            assert analyzer.render_figures(figures) == ["distance_distribution.png"]
+
+            preview = ResultAnalyzer(results_path=tmp_path / "r.csv", workers=1, preview=True)
+            preview.output_dir = tmp_path
+            assert len(preview.render_figures(figures)) == 2
+        assert mock_mean.call_args.args[2] == PREVIEW_DPI
+
+    def test_figures_render_in_worker_processes(self, mock_df, tmp_path):
+        results = tmp_path / "results.csv"
+        mock_df.to_csv(results, index=False)
+        analyzer = ResultAnalyzer(results_path=results, preview=True, workers=2)
+        analyzer.output_dir = tmp_path
+
+        analyzer.generate_report()
+
+        for name in FIGURES:
+            assert (tmp_path / name).read_bytes().startswith(b"\x89PNG")
+
+    @patch('src.analysis.ResultAnalyzer.render_figures')
+    def test_report_from_store_reads_statistics_only(self, mock_render, tmp_path):
+        store = ResultStore(tmp_path / "experiments")
+        store.write(pd.DataFrame({
+            'run_id': 'run-1', 'model': 'llama3', 'strategy': ['A', 'A', 'B', 'B'],
+            'vector_distance': [0.1, 0.3, 0.5, None], 'status': ['ok', 'ok', 'ok', 'failed'],
+        }))
+        # Intervals and tests are opt-in, so the default report never scans rows
+        analyzer = ResultAnalyzer(results_path=store.root, workers=1)
+        analyzer.output_dir = tmp_path
+
+        with patch.object(ResultStore, 'load', side_effect=AssertionError("scanned rows")):
+            analyzer.generate_report()
+
+        summary = pd.read_csv(tmp_path / "summary_stats.csv", index_col='strategy')
+        assert summary['count'].to_dict() == {'A': 2, 'B': 1}
+        assert summary.loc['A', 'mean'] == pytest.approx(0.2)
+        figures = mock_render.call_args.args[0]
+        assert figures["distance_distribution.png"]["quantiles"][0][2] == pytest.approx(0.2)
+
+    @patch('src.analysis.ResultAnalyzer.render_figures')
+    def test_report_adds_intervals_and_pairwise_tests(self, mock_render, tmp_path):
+        questions = [f"q{i}" for i in range(30)]
+        rows = pd.DataFrame({
+            'model': 'llama3', 'question': questions * 2, 'strategy': ['A'] * 30 + ['B'] * 30,
+            'vector_distance': ([0.1 + i / 100 for i in range(30)]
+                                + [0.4 + i / 100 for i in range(30)]),
+        })
+        results = tmp_path / "results.parquet"
+        rows.to_parquet(results)
+        analyzer = ResultAnalyzer(results_path=results, workers=1, resamples=500,
+                                  significance=True)
+        analyzer.output_dir = tmp_path
+
+        analyzer.generate_report()
+
+        summary = pd.read_csv(tmp_path / "summary_stats.csv", index_col='strategy')
+        assert (summary['ci_low'] < summary['mean']).all()
+        assert (summary['mean'] < summary['ci_high']).all()
+        tests = pd.read_csv(tmp_path / "pairwise_tests.csv")
+        assert tests.loc[0, ['strategy_a', 'strategy_b', 'n_pairs']].tolist() == ['A', 'B', 30]
+        assert tests.loc[0, 'mean_diff'] == pytest.approx(-0.3)
+        assert tests.loc[0, 'p_value'] < 0.01
+
+    @patch('src.analysis.ResultAnalyzer.render_figures')
+    def test_tiered_report_adds_label_distance_tables(self, mock_render, tmp_path, capsys):
+        questions = [f"q{i}" for i in range(20)]
+        rows = pd.DataFrame({
+            'model': 'llama3', 'question': questions * 2, 'strategy': ['A'] * 20 + ['B'] * 20,
+            'label_distance': [0.0] * 18 + [None, None] + [1.0] * 10 + [0.0] * 10,
+            'vector_distance': [0.1, None] * 10 + [0.4, None] * 10,
+        })
+        results = tmp_path / "results.parquet"
+        rows.to_parquet(results)
+        analyzer = ResultAnalyzer(results_path=results, workers=1, resamples=200,
+                                  significance=True)
+        analyzer.output_dir = tmp_path
+
+        analyzer.generate_report()
+
+        labels = pd.read_csv(tmp_path / "summary_stats_label_distance.csv", index_col='strategy')
+        assert labels['count'].to_dict() == {'A': 18, 'B': 20}
+        assert labels.loc['B', 'mean'] == pytest.approx(0.5)
+        assert {'ci_low', 'ci_high'} <= set(labels.columns)
+        tests = pd.read_csv(tmp_path / "pairwise_tests_label_distance.csv")
+        assert tests.loc[0, 'n_pairs'] == 18
+        vectors = pd.read_csv(tmp_path / "summary_stats.csv", index_col='strategy')
+        assert vectors['count'].to_dict() == {'A': 10, 'B': 10}
+        assert "uniform hash sample" in capsys.readouterr().out
+
     def test_load_results_not_found(self, tmp_path):
         non_existent = tmp_path / "fake.csv"
         analyzer = ResultAnalyzer(results_path=non_existent)
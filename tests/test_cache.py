@@ -0,0 +1,263 @@
+import asyncio
+import json
+import multiprocessing
+import sqlite3
+import threading
+
+import pytest
+
+from src.core.interfaces import CacheBackend
+from src.core.registry import cache_registry
+from src.utils.cache import AppendLogCache, LRUCache, SQLiteCache, TieredCache
+
+
+def _append_entries(cache_dir, prefix, count):
+    cache = AppendLogCache(cache_dir)
+    for i in range(count):
+        cache.set(f"{prefix}-{i}", f"value-{i}")
+
+
+@pytest.mark.parametrize("backend", ["log", "sqlite"])
+class TestCacheBackends:
+
+    def test_registered(self, backend, tmp_path):
+        cache = cache_registry.create(backend, cache_dir=tmp_path)
+        assert isinstance(cache, CacheBackend)
+
+    def test_get_set_roundtrip(self, backend, tmp_path):
+        cache = cache_registry.create(backend, cache_dir=tmp_path)
+        assert cache.get("missing") is None
+        cache.set("k", "v")
+        cache.set("k", "v2")
+        assert cache.get("k") == "v2"
+        assert "k" in cache
+        assert len(cache) == 1
+
+    def test_persists_across_instances(self, backend, tmp_path):
+        cache_registry.create(backend, cache_dir=tmp_path).set("k", "v")
+        assert cache_registry.create(backend, cache_dir=tmp_path).get("k") == "v"
+
+    def test_migrates_legacy_json(self, backend, tmp_path):
+        (tmp_path / "llm_cache.json").write_text(json.dumps({"old": "answer"}))
+        cache = cache_registry.create(backend, cache_dir=tmp_path)
+        assert cache.get("old") == "answer"
+
+    def test_concurrent_threads(self, backend, tmp_path):
+        cache = cache_registry.create(backend, cache_dir=tmp_path)
+
+        def worker(n):
+            for i in range(50):
+                cache.set(f"{n}-{i}", str(i))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        reopened = cache_registry.create(backend, cache_dir=tmp_path)
+        assert len(reopened) == 200
+        assert reopened.get("3-49") == "49"
+
+
+class TestAppendLogCache:
+
+    def test_loads_lazily(self, tmp_path):
+        cache = AppendLogCache(tmp_path)
+        assert cache._loaded is False
+        cache.get("k")
+        assert cache._loaded is True
+
+    def test_skips_torn_record(self, tmp_path):
+        cache = AppendLogCache(tmp_path)
+        cache.set("good", "v")
+        with open(cache.path, 'ab') as f:
+            f.write(b'{"k": "torn", "v": "par')
+
+        reopened = AppendLogCache(tmp_path)
+        assert reopened.get("good") == "v"
+        assert reopened.get("torn") is None
+
+        reopened.set("after", "crash")
+        assert AppendLogCache(tmp_path).get("after") == "crash"
+
+    def test_compaction_drops_superseded_records(self, tmp_path):
+        cache = AppendLogCache(tmp_path, compact_min_records=10**9)
+        for i in range(10):
+            cache.set("k", str(i))
+        cache.set("other", "x")
+        assert cache._records == 11
+
+        cache.compact()
+        assert cache._records == 2
+        assert cache.get("k") == "9"
+        assert len(cache.path.read_text().splitlines()) == 2
+
+    def test_background_compaction_triggers(self, tmp_path):
+        cache = AppendLogCache(tmp_path, compact_ratio=2.0, compact_min_records=5)
+        for i in range(5):
+            cache.set("k", str(i))
+        cache.close()
+        assert cache._records == 1
+        assert cache.get("k") == "4"
+
+    def test_compaction_by_other_instance_moves_offsets(self, tmp_path):
+        first = AppendLogCache(tmp_path, compact_min_records=10**9)
+        for i in range(5):
+            first.set("k", str(i))
+        first.set("other", "x")
+        assert first.get("other") == "x"
+
+        AppendLogCache(tmp_path, compact_min_records=10**9).compact()
+        assert first.get("other") == "x" and first.get("k") == "4"
+        assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+    def test_record_for_another_key_is_a_miss_and_rescans(self, tmp_path):
+        cache = AppendLogCache(tmp_path)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        # Same inode and size, records swapped, as if rewritten in place.
+        lines = cache.path.read_bytes().splitlines(keepends=True)
+        with open(cache.path, 'r+b') as f:
+            f.write(lines[1] + lines[0])
+        assert cache.get("a") == "1" and cache.get("b") == "2"
+
+    def test_sees_appends_from_other_instances(self, tmp_path):
+        first = AppendLogCache(tmp_path)
+        second = AppendLogCache(tmp_path)
+        first.get("warm-up")
+        second.set("shared", "value")
+        assert first.get("shared") == "value"
+
+    def test_concurrent_processes(self, tmp_path):
+        ctx = multiprocessing.get_context("spawn")
+        procs = [ctx.Process(target=_append_entries, args=(tmp_path, f"p{n}", 25))
+                 for n in range(3)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        assert all(p.exitcode == 0 for p in procs)
+
+        cache = AppendLogCache(tmp_path)
+        assert len(cache) == 75
+        assert cache.get("p2-24") == "value-24"
+
+
+class TestSQLiteCache:
+
+    def test_uses_wal(self, tmp_path):
+        cache = SQLiteCache(tmp_path)
+        cache.set("k", "v")
+        mode = cache._connection().execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode.lower() == "wal"
+        cache.compact()
+        cache.close()
+
+    def test_close_releases_every_thread_connection(self, tmp_path):
+        cache = SQLiteCache(tmp_path)
+        connections = []
+
+        def worker(i):
+            cache.set(f"k{i}", "v")
+            connections.append(cache._connection())
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        connections.append(cache._connection())
+        assert len(set(map(id, connections))) == 5
+
+        cache.close()
+        for conn in connections:
+            with pytest.raises(sqlite3.ProgrammingError, match="closed database"):
+                conn.execute("SELECT 1")
+        assert cache.get("k0") == "v"
+        cache.close()
+
+
+class TestLRUCache:
+
+    def test_evicts_by_entry_count(self):
+        cache = LRUCache(max_entries=2, max_bytes=None)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")  # "b" becomes least recently used
+        cache.set("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.stats.evictions == 1
+
+    def test_evicts_by_bytes(self):
+        cache = LRUCache(max_entries=None, max_bytes=10)
+        cache.set("a", "12345")
+        cache.set("b", "12345")
+        cache.set("c", "1")
+        assert "a" not in cache
+        assert cache.current_bytes == 6
+
+    def test_oversized_value_not_cached(self):
+        cache = LRUCache(max_bytes=4)
+        cache.set("a", "too large")
+        assert len(cache) == 0
+
+    def test_ttl_expiry(self):
+        now = [0.0]
+        cache = LRUCache(ttl_seconds=5, clock=lambda: now[0])
+        cache.set("a", "1")
+        now[0] = 4.0
+        assert cache.get("a") == "1"
+        now[0] = 10.0
+        assert cache.get("a") is None
+        assert cache.stats.expirations == 1
+        assert cache.stats.to_dict()["hit_rate"] == 0.5
+
+
+class TestTieredCache:
+
+    def test_falls_back_to_backend_and_promotes(self, tmp_path):
+        backend = AppendLogCache(tmp_path)
+        backend.set("k", "v")
+        tiered = TieredCache(backend, LRUCache(max_entries=10))
+
+        assert tiered.get("k") == "v"
+        assert tiered.get("k") == "v"
+        assert tiered.get("missing") is None
+        stats = tiered.stats.to_dict()
+        assert stats["hits"] == 1
+        assert stats["backend_hits"] == 1
+        assert stats["backend_misses"] == 1
+
+    def test_evicted_entries_still_served_from_backend(self, tmp_path):
+        tiered = TieredCache(AppendLogCache(tmp_path), LRUCache(max_entries=1))
+        tiered.set("a", "1")
+        tiered.set("b", "2")
+        assert tiered.stats.evictions == 1
+        assert tiered.get("a") == "1"
+        assert tiered.stats.backend_hits == 1
+
+    def test_async_access_runs_backend_io_off_the_loop(self, tmp_path):
+        backend = AppendLogCache(tmp_path)
+        backend_threads = []
+        for name in ("get", "set"):
+            method = getattr(backend, name)
+
+            def traced(*args, _method=method):
+                backend_threads.append(threading.get_ident())
+                return _method(*args)
+            setattr(backend, name, traced)
+        tiered = TieredCache(backend, LRUCache(max_entries=10))
+
+        async def scenario():
+            await tiered.aset("a", "1")
+            missing = await tiered.aget("missing")
+            # Served from the memory tier, without touching the backend
+            return missing, await tiered.aget("a"), threading.get_ident()
+
+        missing, value, loop_thread = asyncio.run(scenario())
+        assert (missing, value) == (None, "1")
+        assert len(backend_threads) == 2
+        assert loop_thread not in backend_threads
+        assert tiered.stats.backend_misses == 1
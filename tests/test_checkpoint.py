@@ -0,0 +1,69 @@
+import os
+import time
+
+import pytest
+
+from src.utils.checkpoint import RunCheckpoint, new_run_id, unit_key
+from src.utils.results_store import ResultStore
+
+
+class TestUnitKey:
+
+    def test_deterministic_and_order_independent(self):
+        a = unit_key("CoT", {'question': 'q', 'answer': 'a'})
+        b = unit_key("CoT", {'answer': 'a', 'question': 'q'})
+        assert a == b
+        assert a != unit_key("Few-Shot", {'question': 'q', 'answer': 'a'})
+        assert a != unit_key("CoT", {'question': 'q2', 'answer': 'a'})
+        item = {'question': 'q'}
+        assert unit_key("CoT", item, "llama3") != unit_key("CoT", item, "mistral")
+
+
+class TestRunCheckpoint:
+
+    def test_append_and_load(self, tmp_path):
+        checkpoint = RunCheckpoint(tmp_path, "run")
+        checkpoint.append([{'unit_key': 'k1', 'value': 1.0}])
+        checkpoint.append([{'unit_key': 'k2', 'value': float('nan')}])
+
+        reopened = RunCheckpoint(tmp_path, "run")
+        assert [row['unit_key'] for row in reopened.load()] == ['k1', 'k2']
+        assert reopened.completed_keys() == {'k1', 'k2'}
+
+    def test_ignores_torn_tail(self, tmp_path):
+        checkpoint = RunCheckpoint(tmp_path, "run")
+        checkpoint.append([{'unit_key': 'k1'}])
+        with open(checkpoint.path, 'a') as f:
+            f.write('{"unit_key": "k2"')
+        assert checkpoint.completed_keys() == {'k1'}
+
+        # A resumed run's first row survives the torn line left before it.
+        checkpoint.append([{'unit_key': 'k3'}])
+        assert checkpoint.completed_keys() == {'k1', 'k3'}
+
+    def test_appended_batches_reach_the_run_statistics(self, tmp_path):
+        store = ResultStore(tmp_path / "store")
+        checkpoint = RunCheckpoint(tmp_path / "runs", "run", store)
+        row = {'run_id': 'run', 'model': 'llama3', 'strategy': 'A', 'status': 'ok'}
+        checkpoint.append([{**row, 'unit_key': 'k1', 'vector_distance': 0.2}])
+        # A crashed run is resumed by a new process, which keeps adding to the same statistics.
+        RunCheckpoint(tmp_path / "runs", "run", store).append(
+            [{**row, 'unit_key': 'k2', 'vector_distance': 0.4}]
+        )
+
+        summary = store.stats(run_ids=["run"]).summary().loc[('A', 'vector_distance')]
+        assert summary['count'] == 2 and summary['mean'] == pytest.approx(0.3)
+
+    def test_missing_file_is_empty(self, tmp_path):
+        assert RunCheckpoint(tmp_path, "run").load() == []
+
+    def test_latest(self, tmp_path):
+        assert RunCheckpoint.latest(tmp_path) is None
+        RunCheckpoint(tmp_path, "old").append([{'unit_key': 'a'}])
+        RunCheckpoint(tmp_path, "new").append([{'unit_key': 'b'}])
+        past = time.time() - 60
+        os.utime(tmp_path / "old.jsonl", (past, past))
+        assert RunCheckpoint.latest(tmp_path).run_id == "new"
+
+    def test_new_run_ids_are_unique(self):
+        assert new_run_id() != new_run_id()
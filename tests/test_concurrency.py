@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.utils.concurrency import AdaptiveLimiter, AIMDController, AsyncAdaptiveLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run_window(controller, clock, latency, duration=1.0):
+    """Completes one full window of requests at the current limit."""
+    clock.now += duration
+    for _ in range(controller.limit):
+        limit = controller.record(latency)
+    return limit
+
+
+class TestAIMDController:
+
+    def test_increases_once_per_window_while_latency_holds(self):
+        clock = FakeClock()
+        controller = AIMDController(initial=2, max_limit=4, clock=clock)
+
+        controller.record(1.0)
+        assert controller.limit == 2
+        assert run_window(controller, clock, 1.0) == 3
+        assert run_window(controller, clock, 1.1) == 4
+        assert run_window(controller, clock, 1.0) == 4  # capped at max_limit
+        assert [s.reason for s in controller.history] == ["increase"] * 3
+
+    def test_backs_off_when_latency_climbs(self):
+        clock = FakeClock()
+        controller = AIMDController(initial=8, latency_tolerance=2.0, clock=clock)
+
+        run_window(controller, clock, 1.0)
+        assert controller.limit == 9
+        assert run_window(controller, clock, 2.5) == 4
+        assert controller.history[-1].reason == "latency"
+
+    def test_error_burst_backs_off_once(self):
+        clock = FakeClock()
+        controller = AIMDController(initial=8, min_limit=2, clock=clock)
+
+        for _ in range(5):
+            controller.record(0.0, ok=False)
+        assert controller.limit == 4
+        assert [s.reason for s in controller.history] == ["error"]
+
+        # Once a window's worth of requests has completed, a new failure backs off again.
+        for _ in range(8):
+            controller.record(1.0)
+        controller.record(0.0, ok=False)
+        controller.record(0.0, ok=False)
+        controller.record(0.0, ok=False)
+        assert controller.limit == 2  # min_limit
+
+    def test_knee_is_limit_with_best_throughput(self):
+        clock = FakeClock()
+        controller = AIMDController(initial=1, clock=clock)
+
+        run_window(controller, clock, 1.0, duration=1.0)  # 1 req/s at 1
+        run_window(controller, clock, 1.0, duration=0.5)  # 4 req/s at 2
+        run_window(controller, clock, 1.5, duration=1.0)  # 3 req/s at 3
+        assert controller.limit == 4
+        assert controller.knee() == 2
+
+    def test_rejects_invalid_bounds(self):
+        with pytest.raises(ValueError):
+            AIMDController(min_limit=4, max_limit=2)
+        with pytest.raises(ValueError):
+            AIMDController(backoff=1.0)
+
+
+class TestAdaptiveLimiter:
+
+    def test_blocks_beyond_limit(self):
+        limiter = AdaptiveLimiter(AIMDController(initial=2, max_limit=2))
+        limiter.acquire()
+        limiter.acquire()
+
+        acquired = threading.Event()
+
+        def third():
+            limiter.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=third)
+        thread.start()
+        assert not acquired.wait(0.05)
+        limiter.release(latency=0.1)
+        assert acquired.wait(1.0)
+        thread.join()
+        assert limiter.peak_in_flight == 2
+
+    def test_release_without_latency_skips_sample(self):
+        controller = AIMDController(initial=1)
+        limiter = AdaptiveLimiter(controller)
+        limiter.acquire()
+        limiter.release()
+        assert controller.history == []
+
+    def test_async_limiter_follows_controller(self):
+        controller = AIMDController(initial=1, max_limit=8)
+
+        async def worker(limiter):
+            await limiter.acquire()
+            await asyncio.sleep(0.001)
+            await limiter.release(latency=0.001)
+
+        async def run():
+            limiter = AsyncAdaptiveLimiter(controller)
+            await asyncio.gather(*(worker(limiter) for _ in range(20)))
+            return limiter
+
+        start = time.perf_counter()
+        limiter = asyncio.run(run())
+        assert time.perf_counter() - start < 5
+        assert limiter.in_flight == 0
+        assert controller.limit > 1
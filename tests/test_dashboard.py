@@ -14,20 +14,26 @@ class TestDashboard:
              patch('streamlit.markdown'), \
              patch('streamlit.header'), \
              patch('streamlit.subheader'), \
-             patch('streamlit.sidebar') as mock_sidebar, \
+             patch('streamlit.sidebar.header'), \
+             patch('streamlit.sidebar.multiselect') as mock_multiselect, \
+             patch('streamlit.sidebar.selectbox') as mock_selectbox, \
              patch('streamlit.dataframe'), \
-             patch('streamlit.pyplot'), \
+             patch('streamlit.image'), \
              patch('streamlit.columns', return_value=[MagicMock(), MagicMock()]), \
              patch('pandas.read_csv') as mock_read_csv, \
-             patch('src.config.config.config.paths.results') as mock_results_path, \
+             patch('src.utils.results_store.results_location') as mock_location, \
              patch('matplotlib.pyplot.subplots', return_value=(MagicMock(), MagicMock())), \
              patch('seaborn.barplot'), \
              patch('seaborn.violinplot'):
 
+            mock_results_path = mock_location.return_value
             mock_results_path.exists.return_value = True
+            mock_results_path.is_dir.return_value = False
+            mock_results_path.suffix = ".csv"
             
             # Mock selectbox return value for metric selection
-            mock_sidebar.selectbox.return_value = "vector_distance"
+            mock_selectbox.return_value = "vector_distance"
+            mock_multiselect.side_effect = lambda label, options, default: default
 
             # Mock Data
             df = pd.DataFrame({
@@ -44,15 +50,68 @@ class TestDashboard:
             # Execute the script
             runpy.run_module('src.dashboard', run_name="__main__")
 
+    def test_dashboard_caches_runs_across_reruns(self, tmp_path):
+        from src.utils.results_store import ResultStore
+
+        store = ResultStore(tmp_path / "experiments")
+        for run_id, distance in (("run-1", 0.1), ("run-2", 0.7)):
+            store.write(pd.DataFrame({
+                'run_id': [run_id] * 2, 'model': ['llama3'] * 2, 'strategy': ['A', 'B'],
+                'vector_distance': [distance] * 2, 'status': ['ok', 'failed'],
+            }))
+
+        with patch('streamlit.set_page_config'), \
+             patch('streamlit.title'), \
+             patch('streamlit.markdown'), \
+             patch('streamlit.header'), \
+             patch('streamlit.subheader'), \
+             patch('streamlit.warning') as mock_warning, \
+             patch('streamlit.sidebar.header'), \
+             patch('streamlit.sidebar.multiselect') as mock_multiselect, \
+             patch('streamlit.sidebar.selectbox') as mock_selectbox, \
+             patch('streamlit.dataframe') as mock_dataframe, \
+             patch('streamlit.image') as mock_image, \
+             patch('streamlit.columns', return_value=[MagicMock(), MagicMock()]), \
+             patch('streamlit.checkbox', return_value=True), \
+             patch('streamlit.info'), \
+             patch('streamlit.download_button'), \
+             patch('src.utils.results_store.results_location', return_value=store.root), \
+             patch('src.utils.results_store.ResultStore.load', autospec=True,
+                   side_effect=ResultStore.load) as mock_load, \
+             patch('matplotlib.pyplot.subplots',
+                   return_value=(MagicMock(), MagicMock())) as mock_subplots:
+            mock_multiselect.side_effect = lambda label, options, default: default
+            mock_selectbox.return_value = "vector_distance"
+
+            for _ in range(2):  # a widget change reruns the whole script
+                if 'src.dashboard' in sys.modules:
+                    del sys.modules['src.dashboard']
+                runpy.run_module('src.dashboard', run_name="__main__")
+
+        runs_select = mock_multiselect.call_args_list[0]
+        assert runs_select.args[1] == ['run-1', 'run-2']
+        assert runs_select.kwargs['default'] == ['run-2']
+        summary, intervals, tests, raw = (c.args[0] for c in mock_dataframe.call_args_list[:4])
+        assert list(summary.index) == ['A']
+        assert intervals.loc['A', 'mean'] == 0.7 and intervals.loc['A', 'n'] == 1
+        assert tests.empty  # a single strategy has no pairs
+        assert summary.loc['A', 'mean'] == 0.7 and summary.loc['A', 'count'] == 1
+        assert list(raw['run_id']) == ['run-2'] and 'model' in raw.columns
+        assert mock_warning.call_count == 2
+        # Statistics come from the store without a scan; resampled and raw rows are read once each,
+        # figures are rendered once.
+        assert mock_load.call_count == 2
+        assert mock_subplots.return_value[1].bxp.call_count == 1 and mock_image.call_count == 4
+
     def test_dashboard_no_results(self):
          with patch('streamlit.error') as mock_error, \
               patch('streamlit.stop') as mock_stop, \
               patch('streamlit.set_page_config'), \
               patch('streamlit.title'), \
               patch('streamlit.markdown'), \
-              patch('src.config.config.config.paths.results') as mock_results_path:
+              patch('src.utils.results_store.results_location') as mock_location:
             
-            mock_results_path.exists.return_value = False
+            mock_location.return_value.exists.return_value = False
             mock_stop.side_effect = SystemExit # Simulate stop
             
             if 'src.dashboard' in sys.modules:
@@ -1,4 +1,13 @@
-from src.utils.data_generator import SyllogismGenerator
+import random
+
+import pytest
+
+from src.utils.data_generator import (
+    GeneratedDataset,
+    SyllogismGenerator,
+    dataset_length,
+    iter_dataset_chunks,
+)
 
 
 def test_dataset_structure():
@@ -24,3 +33,48 @@ def test_invalid_syllogism_format():
     gen = SyllogismGenerator()
     item = gen.generate_invalid_syllogism()
     assert item['label'] == "No"
+
+def test_same_seed_is_reproducible_and_independent_of_global_random():
+    random.seed(0)
+    first = SyllogismGenerator(seed=7).generate_dataset(size=50)
+    random.seed(123)
+    random.random()
+    assert SyllogismGenerator(seed=7).generate_dataset(size=50) == first
+    assert SyllogismGenerator(seed=8).generate_dataset(size=50) != first
+
+def test_chunks_are_balanced_and_lazy():
+    gen = SyllogismGenerator(seed=1)
+    chunks = gen.iter_chunks(size=1_000_000, chunk_size=100)
+    chunk = next(chunks)
+    assert len(chunk) == 100
+    assert sum(item['label'] == "Yes" for item in chunk) == 50
+
+def test_generated_dataset_replays_the_same_items():
+    dataset = GeneratedDataset(SyllogismGenerator(seed=4), size=30, chunk_size=8)
+    first = list(dataset)
+    assert len(first) == len(dataset) == 30
+    assert len(GeneratedDataset(SyllogismGenerator(), size=10_000, unique=True)) == 360
+    assert list(dataset) == first
+    assert first == list(SyllogismGenerator(seed=4).iter_items(30, chunk_size=8))
+
+def test_unique_dataset_has_no_duplicates_and_caps_at_capacity():
+    gen = SyllogismGenerator(seed=3)
+    dataset = gen.generate_dataset(size=10_000, unique=True)
+    assert len(dataset) == 2 * gen.capacity
+    assert len({item['question'] for item in dataset}) == len(dataset)
+
+@pytest.mark.parametrize("suffix", ["jsonl", "parquet", "json"])
+def test_write_and_stream_back(tmp_path, suffix):
+    path = tmp_path / f"dataset.{suffix}"
+    gen = SyllogismGenerator(seed=5)
+    assert gen.write_dataset(path, size=25, chunk_size=10) == 24
+
+    chunks = list(iter_dataset_chunks(path, chunk_size=10))
+    assert [len(c) for c in chunks] == [10, 10, 4]
+    expected = list(SyllogismGenerator(seed=5).iter_items(24, chunk_size=10))
+    assert [item for c in chunks for item in c] == expected
+    assert dataset_length(path) == (24 if suffix == "parquet" else None)
+
+def test_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        SyllogismGenerator().write_dataset(tmp_path / "dataset.txt", size=4)
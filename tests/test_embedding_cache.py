@@ -0,0 +1,53 @@
+import numpy as np
+
+from src.utils.embedding_cache import EmbeddingCache, EmbeddingStore, embedding_key
+
+
+def test_embedding_key_depends_on_model():
+    assert embedding_key("a", "text") != embedding_key("b", "text")
+    assert embedding_key("a", "text") == embedding_key("a", "text")
+
+
+class TestEmbeddingStore:
+
+    def test_flush_and_reload_memory_mapped(self, tmp_path):
+        store = EmbeddingStore(tmp_path, flush_size=100)
+        store.put("k1", np.array([1.0, 2.0]))
+        store.put("k2", np.array([3.0, 4.0]))
+        assert store.get("k1") is not None  # served from pending
+        store.flush()
+        assert len(list(tmp_path.glob("chunk-*.npy"))) == 1
+
+        reopened = EmbeddingStore(tmp_path)
+        np.testing.assert_array_equal(reopened.get("k2"), [3.0, 4.0])
+        assert isinstance(next(iter(reopened._chunks.values())), np.memmap)
+        assert len(reopened) == 2
+
+    def test_auto_flush(self, tmp_path):
+        store = EmbeddingStore(tmp_path, flush_size=2)
+        store.put("a", np.zeros(3))
+        store.put("b", np.zeros(3))
+        assert len(list(tmp_path.glob("chunk-*.npy"))) == 1
+
+    def test_ignores_incomplete_chunk(self, tmp_path):
+        (tmp_path / "chunk-1-1-deadbeef.keys.json").write_text('["orphan"]')
+        store = EmbeddingStore(tmp_path)
+        assert store.get("orphan") is None
+
+
+class TestEmbeddingCache:
+
+    def test_lru_bound(self):
+        cache = EmbeddingCache("m", max_entries=2)
+        cache.put_many(["a", "b", "c"], [np.zeros(2)] * 3)
+        found = cache.get_many(["a", "b", "c"])
+        assert found[0] is None
+        assert found[1] is not None and found[2] is not None
+        assert cache.hits == 2 and cache.misses == 1
+
+    def test_falls_back_to_store(self, tmp_path):
+        cache = EmbeddingCache("org/model", max_entries=1, directory=tmp_path)
+        cache.put_many(["a", "b"], [np.ones(2), np.zeros(2)])
+        cache.flush()
+        assert (tmp_path / "org_model").is_dir()
+        np.testing.assert_array_equal(cache.get_many(["a"])[0], [1.0, 1.0])
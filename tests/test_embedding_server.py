@@ -0,0 +1,129 @@
+import threading
+
+import numpy as np
+import pytest
+
+from src.utils.embedding_server import EmbeddingClient, EmbeddingServer, EmbeddingServerError
+from src.utils.metrics import SimilarityEvaluator
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def encode(self, texts, batch_size=None):
+        with self.lock:
+            self.calls.append(list(texts))
+        return np.array([[len(t), ord(t[0]), 1.0] for t in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def fake_model():
+    return FakeModel()
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return str(tmp_path / "emb.sock")
+
+
+class TestEmbeddingServer:
+
+    def test_round_trip(self, fake_model, socket_path):
+        with EmbeddingServer(socket_path, loader=lambda name: fake_model):
+            client = EmbeddingClient(socket_path, "m")
+            vectors = client.encode(["ab", "xyz"])
+            client.close()
+
+        np.testing.assert_array_equal(vectors, [[2, ord("a"), 1], [3, ord("x"), 1]])
+        assert vectors.dtype == np.float32
+
+    def test_batches_concurrent_callers(self, fake_model, socket_path):
+        server = EmbeddingServer(socket_path, loader=lambda name: fake_model, max_wait=0.2)
+        with server:
+            client = EmbeddingClient(socket_path, "m", max_connections=8)
+            barrier = threading.Barrier(8)
+            results = {}
+
+            def call(i):
+                barrier.wait()
+                results[i] = client.encode([f"t{i}", f"u{i}"])
+
+            threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            client.close()
+
+        assert server.requests == 8
+        assert len(fake_model.calls) < 8
+        for i in range(8):
+            np.testing.assert_array_equal(results[i][:, 1], [ord("t"), ord("u")])
+            assert results[i][0, 0] == len(f"t{i}")
+
+    def test_arena_grows_for_large_results(self, fake_model, socket_path):
+        with EmbeddingServer(socket_path, loader=lambda name: fake_model, arena_bytes=64):
+            client = EmbeddingClient(socket_path, "m")
+            big = client.encode([f"text-{i}" for i in range(100)])
+            small = client.encode(["a"])
+            client.close()
+
+        assert big.shape == (100, 3)
+        assert big[99, 0] == len("text-99")
+        np.testing.assert_array_equal(small, [[1, ord("a"), 1]])
+
+    def test_results_survive_later_requests(self, fake_model, socket_path):
+        with EmbeddingServer(socket_path, loader=lambda name: fake_model):
+            client = EmbeddingClient(socket_path, "m", max_connections=1)
+            first = client.encode(["aaaa"])
+            client.encode(["b"])
+            client.close()
+        assert first[0, 0] == 4
+
+    def test_close_also_closes_checked_out_connections(self, socket_path):
+        started, release = threading.Event(), threading.Event()
+
+        class SlowModel(FakeModel):
+            def encode(self, texts, batch_size=None):
+                started.set()
+                release.wait(5)
+                return super().encode(texts, batch_size)
+
+        with EmbeddingServer(socket_path, loader=lambda name: SlowModel()):
+            client = EmbeddingClient(socket_path, "m", max_connections=1)
+            worker = threading.Thread(target=client.encode, args=(["a"],))
+            worker.start()
+            assert started.wait(5)
+            in_flight, = client._live
+            client.close()
+            release.set()
+            worker.join(5)
+
+            assert in_flight.sock.fileno() == -1
+            assert client._idle.get_nowait() is None
+            # The client stays usable and opens a fresh connection
+            np.testing.assert_array_equal(client.encode(["b"]), [[1, ord("b"), 1]])
+            client.close()
+
+    def test_model_errors_reach_client(self, socket_path):
+        def loader(name):
+            raise RuntimeError("no such model")
+
+        with EmbeddingServer(socket_path, loader=loader):
+            client = EmbeddingClient(socket_path, "missing")
+            with pytest.raises(EmbeddingServerError, match="no such model"):
+                client.encode(["a"])
+            client.close()
+
+    def test_similarity_evaluator_uses_server(self, fake_model, socket_path, empty_embedding_pool):
+        with EmbeddingServer(socket_path, loader=lambda name: fake_model):
+            evaluator = SimilarityEvaluator(model_name="m", server_socket=socket_path)
+            distances = evaluator.calculate_batch_distances(["ab", "ab"], ["ab", "zz"])
+            evaluator.close()
+
+        assert "m" not in empty_embedding_pool
+        assert fake_model.calls
+        assert distances[0] == pytest.approx(0.0, abs=1e-6)
+        assert distances[1] > 0
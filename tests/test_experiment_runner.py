@@ -1,10 +1,16 @@
+import json
+import math
 from unittest.mock import MagicMock, patch
 
 import pandas as pd
 import pytest
 
+from src.config.config import config
 from src.core.registry import strategy_registry
 from src.experiment_runner import ExperimentRunner
+from src.utils.checkpoint import RunCheckpoint
+from src.utils.data_generator import SyllogismGenerator
+from src.utils.llm_client import LLMConnectionError, OllamaClient
 
 
 class TestExperimentRunner:
@@ -20,6 +26,10 @@ class TestExperimentRunner:
             {'question': 'q1', 'answer': 'a1'},
             {'question': 'q2', 'answer': 'a2'}
         ]
+        # The runner streams its dataset; tests set the items through generate_dataset
+        mock_generator.iter_items.side_effect = (
+            lambda *args, **kwargs: iter(mock_generator.generate_dataset.return_value)
+        )
         
         return mock_llm, mock_evaluator, mock_generator
 
@@ -30,15 +40,16 @@ class TestExperimentRunner:
         assert runner.llm == llm
         assert runner.evaluator == evaluator
         assert runner.generator == generator
-        assert len(runner.dataset) == 2
-        # Verify few shot examples were also generated
-        assert generator.generate_dataset.call_count == 2 
+        # The dataset streams from the generator; only the few-shot examples are built up front
+        assert runner.dataset is None
+        generator.generate_dataset.assert_called_once_with(size=4)
+        assert len(list(runner._dataset_source)) == 2
 
     def test_run_all_experiments(self, mock_deps):
         llm, evaluator, generator = mock_deps
         # Mock responses
         llm.generate.return_value = "Model Response"
-        evaluator.evaluate.return_value = 0.1
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.1] * len(preds)
         
         runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator)
         
@@ -53,17 +64,404 @@ class TestExperimentRunner:
             assert len(df) == 2 * num_strategies
             assert "vector_distance" in df.columns
             assert "latency" in df.columns
+            assert (df['vector_distance'] == 0.1).all()
             mock_save.assert_called_once()
+            # Scoring happens in batches rather than one evaluate() call per response
+            evaluator.evaluate.assert_not_called()
+
+    def test_run_all_experiments_async(self, mock_deps, fake_ollama_server, tmp_path):
+        _, evaluator, generator = mock_deps
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.2] * len(preds)
+        llm = OllamaClient(model="fake-model", base_url=fake_ollama_server.url,
+                           cache_dir=str(tmp_path))
+
+        runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator)
+        with patch.object(runner, '_save_results'):
+            df = runner.run_all_experiments(mode="async", max_in_flight=8)
+
+        num_strategies = len(strategy_registry.list_all())
+        assert len(df) == 2 * num_strategies
+        assert set(df['strategy']) == set(strategy_registry.list_all())
+        assert df['model_output'].str.startswith("Yes. Echo").all()
+        assert (df['vector_distance'] == 0.2).all()
+
+    def test_run_stats(self, mock_deps):
+        llm, evaluator, generator = mock_deps
+        llm.generate.return_value = "Model Response"
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.1] * len(preds)
+        runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator)
+
+        with patch.object(runner, '_save_results'):
+            runner.run_all_experiments(max_workers=2)
+
+        stats = runner.run_stats
+        assert stats['capacity'] == 2
+        assert 0.0 <= stats['utilization'] <= 1.0
+        assert set(stats['per_strategy']) == set(strategy_registry.list_all())
+        assert all(s['completed'] == 2 and s['failed'] == 0 for s in stats['per_strategy'].values())
+
+    def test_streams_dataset_file_in_chunks(self, mock_deps, tmp_path, monkeypatch):
+        llm, evaluator, generator = mock_deps
+        llm.generate.return_value = "Model Response"
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.1] * len(preds)
+        path = tmp_path / "items.jsonl"
+        SyllogismGenerator(seed=1).write_dataset(path, size=6)
+        monkeypatch.setattr(config, 'experiment',
+                            config.experiment.model_copy(update={'dataset_chunk_size': 4}))
+
+        runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator,
+                                  strategies=["Basic Prompting"], dataset=path)
+        assert runner.dataset is None
+        with patch.object(runner, '_build_work_units', wraps=runner._build_work_units) as build, \
+                patch.object(runner, '_save_results'):
+            df = runner.run_all_experiments(run_id="stream")
+
+        assert [len(call.args[2]) for call in build.call_args_list] == [4, 2]
+        assert len(df) == 6 and df['unit_key'].is_unique
+        assert runner.run_stats['per_strategy']["Basic Prompting"]['completed'] == 6
+
+        llm.generate.reset_mock()
+        with patch.object(runner, '_save_results'):
+            assert len(runner.run_all_experiments(run_id="stream", resume=True)) == 6
+        llm.generate.assert_not_called()
+
+    def test_generated_dataset_streams_without_a_list(self, mock_deps, monkeypatch):
+        llm, evaluator, _ = mock_deps
+        llm.generate.return_value = "Model Response"
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.1] * len(preds)
+        monkeypatch.setattr(config, 'experiment', config.experiment.model_copy(
+            update={'dataset_size': 10, 'dataset_chunk_size': 4}))
+        generator = SyllogismGenerator(seed=5)
+
+        with patch.object(generator, 'generate_dataset', wraps=generator.generate_dataset) as build:
+            runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator,
+                                      strategies=["Basic Prompting"])
+            with patch.object(runner, '_build_work_units',
+                              wraps=runner._build_work_units) as units, \
+                    patch.object(runner, '_save_results'):
+                df = runner.run_all_experiments(run_id="generated")
+                llm.generate.reset_mock()
+                resumed = runner.run_all_experiments(run_id="generated", resume=True)
+
+        build.assert_called_once_with(size=4)
+        assert runner.dataset is None
+        assert [len(call.args[2]) for call in units.call_args_list][:3] == [4, 4, 2]
+        assert len(df) == 10
+        # Every pass replays the same items, so resuming finds them all checkpointed
+        llm.generate.assert_not_called()
+        assert sorted(resumed['unit_key']) == sorted(df['unit_key'])
+
+    def test_early_stopping_drops_dominated_strategies(self, mock_deps, monkeypatch):
+        llm, evaluator, generator = mock_deps
+        llm.generate.side_effect = (
+            lambda prompt, **kwargs: "good" if "step by step" in prompt else "bad"
+        )
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [
+            (0.1 if pred == "good" else 0.5) + (i % 5) / 100 for i, pred in enumerate(preds)
+        ]
+        monkeypatch.setattr(config, 'experiment', config.experiment.model_copy(update={
+            'early_stopping_round_size': 10, 'early_stopping_min_items': 10,
+            'dataset_chunk_size': 10,
+        }))
+        items = SyllogismGenerator(seed=3).generate_dataset(size=100)
+        strategies = ["Baseline (Zero-Shot)", "Basic Prompting", "Chain of Thought"]
+        runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator,
+                                  strategies=strategies, dataset=items)
+        chunks = runner._dataset_chunks
+        read = []
+
+        def counted_chunks():
+            for chunk in chunks():
+                read.append(chunk)
+                yield chunk
+
+        with patch.object(runner, '_save_results'), \
+                patch.object(runner, '_dataset_chunks', counted_chunks):
+            df = runner.run_all_experiments(run_id="race", early_stopping=True)
+
+        # One round settles the race, so the remaining 90 items are never generated,
+        # and the dataset is not read past the round that found nothing left to run.
+        assert len(df) == 30 and llm.generate.call_count == 30
+        assert len(read) == 2
+        report = runner.run_stats['early_stopping']
+        assert report['rounds'] == 1 and list(report['active']) == ["Chain of Thought"]
+        assert set(report['eliminated']) == {"Baseline (Zero-Shot)", "Basic Prompting"}
+        assert report['units_saved'] == report['llm_calls_saved'] == 270
+
+        # Resuming replays the race from the checkpoint without generating anything.
+        llm.generate.reset_mock()
+        with patch.object(runner, '_save_results'):
+            df = runner.run_all_experiments(run_id="race", resume=True, early_stopping=True)
+        assert len(df) == 30
+        llm.generate.assert_not_called()
+
+    def test_tiered_scoring_records_both_metrics(self, mock_deps, monkeypatch):
+        llm, evaluator, generator = mock_deps
+        llm.generate.side_effect = (
+            lambda prompt, **kwargs: "Answer: Yes" if "step by step" in prompt else "maybe"
+        )
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.2] * len(preds)
+        monkeypatch.setattr(config, 'experiment', config.experiment.model_copy(update={
+            'scoring': "tiered", 'embedding_sample': 0.0,
+        }))
+        items = [{"question": f"q{i}", "answer": "Yes, it follows.", "label": "Yes"}
+                 for i in range(4)]
+        runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator,
+                                  strategies=["Basic Prompting", "Chain of Thought"], dataset=items)
+
+        with patch.object(runner, '_save_results'):
+            df = runner.run_all_experiments(run_id="tiered")
+
+        cot = df[df['strategy'] == "Chain of Thought"]
+        assert (cot['label_distance'] == 0.0).all() and cot['vector_distance'].isna().all()
+        basic = df[df['strategy'] == "Basic Prompting"]
+        assert basic['label_distance'].isna().all() and basic['vector_distance'].isna().all()
+        assert (basic['ambiguous_vector_distance'] == 0.2).all()
+        assert runner.run_stats['scoring'] == {"scored": 8, "embedded": 4}
+
+    def test_results_checkpointed_and_resumed(self, mock_deps, isolated_checkpoints):
+        llm, evaluator, generator = mock_deps
+        llm.generate.return_value = "Model Response"
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.1] * len(preds)
+        runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator)
+
+        with patch.object(runner, '_save_results'):
+            df = runner.run_all_experiments(run_id="run-1")
+
+        checkpoint = RunCheckpoint(isolated_checkpoints, "run-1")
+        rows = checkpoint.load()
+        assert len(rows) == len(df) == 10
+        assert {row['run_id'] for row in rows} == {"run-1"}
+        assert df['unit_key'].is_unique
+
+        # Simulate a crash: keep three rows and a torn fourth line.
+        lines = checkpoint.path.read_text().splitlines(keepends=True)
+        kept = [json.loads(line) for line in lines[:3]]
+        for row in kept:
+            row['model_output'] = "Before crash"
+        checkpoint.path.write_text("".join(json.dumps(row) + "\n" for row in kept) + lines[3][:10])
+
+        llm.generate.reset_mock()
+        resumed = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator)
+        with patch.object(resumed, '_save_results'):
+            df = resumed.run_all_experiments(resume=True)
+
+        assert resumed.run_id == "run-1"
+        assert len(df) == 10 and df['unit_key'].is_unique
+        assert (df['model_output'] == "Before crash").sum() == 3
+        assert llm.generate.called
+
+    def test_resume_with_another_model_reruns_every_unit(self, mock_deps):
+        llm, evaluator, generator = mock_deps
+        llm.generate.return_value = "Yes"
+        llm.model = "llama3"
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.1] * len(preds)
+        runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator)
+        with patch.object(runner, '_save_results'):
+            runner.run_all_experiments(run_id="run-3")
+        first_calls = llm.generate.call_count
+
+        llm.generate.reset_mock()
+        llm.model = "mistral"
+        with patch.object(runner, '_save_results'):
+            df = runner.run_all_experiments(resume=True)
+        assert len(df) == 10 and set(df['model']) == {"mistral"}
+        assert llm.generate.call_count == first_calls
+
+    def test_resume_complete_run_generates_nothing(self, mock_deps):
+        llm, evaluator, generator = mock_deps
+        llm.generate.return_value = "Yes"
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.1] * len(preds)
+        runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator)
+        with patch.object(runner, '_save_results'):
+            runner.run_all_experiments(run_id="run-2")
+
+        llm.generate.reset_mock()
+        with patch.object(runner, '_save_results'):
+            df = runner.run_all_experiments(run_id="run-2", resume=True)
+        assert len(df) == 10
+        llm.generate.assert_not_called()
+
+    def test_failed_units_counted(self, mock_deps):
+        llm, evaluator, generator = mock_deps
+        llm.generate.side_effect = RuntimeError("down")
+        runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator)
+
+        with patch.object(runner, '_save_results'):
+            df = runner.run_all_experiments()
+
+        assert (df['status'] == "failed").all()
+        assert (df['error'] == "RuntimeError: down").all()
+        assert df['model_output'].isna().all() and df['vector_distance'].isna().all()
+        evaluator.calculate_batch_distances.assert_not_called()
+        assert all(s['failed'] == 2 for s in runner.run_stats['per_strategy'].values())
+
+    def test_failed_units_are_not_checkpointed(self, mock_deps):
+        llm, evaluator, generator = mock_deps
+
+        def generate(prompt, **kwargs):
+            if "q2" in prompt:
+                raise LLMConnectionError("unreachable")
+            return "Yes"
+
+        llm.generate.side_effect = generate
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.1] * len(preds)
+        runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator,
+                                  strategies=["Chain of Thought"])
+
+        with patch.object(runner, '_save_results'):
+            df = runner.run_all_experiments()
+
+        assert dict(zip(df['question'], df['status'], strict=True)) == {'q1': "ok", 'q2': "failed"}
+        assert df.loc[df['status'] == "ok", 'vector_distance'].tolist() == [0.1]
+        checkpointed = RunCheckpoint(config.paths.checkpoints, runner.run_id).load()
+        assert [row['question'] for row in checkpointed] == ['q1']
+
+    @pytest.mark.parametrize("order", ["interleaved", "strategy", "prefix"])
+    def test_build_work_units_covers_matrix(self, mock_deps, order):
+        llm, evaluator, generator = mock_deps
+        runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator)
+        strategies = runner._create_strategies()
+
+        items = generator.generate_dataset.return_value
+        units = runner._build_work_units(strategies, order, items)
+        assert len(units) == len(strategies) * len(items)
+        assert len({(u.strategy_name, u.item['question']) for u in units}) == len(units)
+
+    def test_build_work_units_orderings(self, mock_deps):
+        llm, evaluator, generator = mock_deps
+        runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator)
+        strategies = runner._create_strategies()
+        names = [name for name, _ in strategies]
+        items = generator.generate_dataset.return_value
+
+        grouped = runner._build_work_units(strategies, "strategy", items)
+        assert [u.strategy_name for u in grouped[:2]] == [names[0], names[0]]
+
+        interleaved = runner._build_work_units(strategies, "interleaved", items)
+        assert [u.strategy_name for u in interleaved[:len(names)]] == names
+
+        by_prefix = runner._build_work_units(strategies, "prefix", items)
+        few_shot = [i for i, u in enumerate(by_prefix) if u.strategy_name == "Few-Shot"]
+        assert few_shot == list(range(few_shot[0], few_shot[0] + len(few_shot)))
+
+        with pytest.raises(ValueError):
+            runner._build_work_units(strategies, "random", items)
+
+    def test_build_lanes_groups_static_prefix(self, mock_deps, monkeypatch):
+        llm, evaluator, generator = mock_deps
+        generator.generate_dataset.return_value = [{'question': f'q{i}', 'answer': 'a'}
+                                                   for i in range(5)]
+        monkeypatch.setattr(config.experiment, 'prefix_lane_size', 2)
+        runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator)
+        units = runner._build_work_units(runner._create_strategies(), "prefix",
+                                         generator.generate_dataset.return_value)
+
+        lanes = runner._build_lanes(units, "prefix")
+        few_shot = [lane for lane in lanes if lane[0].strategy_name == "Few-Shot"]
+        assert [len(lane) for lane in few_shot] == [2, 2, 1]
+        assert all(len({u.strategy_name for u in lane}) == 1 for lane in lanes)
+        assert all(len(lane) == 1 for lane in lanes if lane[0].strategy_name == "Chain of Thought")
+        assert sum(len(lane) for lane in lanes) == len(units)
+
+        assert all(len(lane) == 1 for lane in runner._build_lanes(units, "interleaved"))
+
+    @pytest.mark.parametrize("mode", ["thread", "async"])
+    def test_prefix_lanes_reduce_prompt_eval(self, mock_deps, fake_ollama_server, tmp_path, mode):
+        _, evaluator, generator = mock_deps
+        generator.generate_dataset.return_value = [
+            {'question': f'Is puzzle {i} valid?', 'answer': 'Yes'} for i in range(8)
+        ]
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.2] * len(preds)
+
+        def prompt_eval(order, cache_dir):
+            llm = OllamaClient(base_url=fake_ollama_server.url, cache_dir=str(cache_dir),
+                               keep_alive="5m")
+            runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator,
+                                      strategies=["Few-Shot", "Chain of Thought"])
+            with patch.object(runner, '_save_results'):
+                df = runner.run_all_experiments(max_workers=1, max_in_flight=1, mode=mode,
+                                                order=order)
+            return df.loc[df['strategy'] == "Few-Shot", 'prompt_eval_count'].sum()
+
+        interleaved = prompt_eval("interleaved", tmp_path / "a")
+        prefix = prompt_eval("prefix", tmp_path / "b")
+        assert prefix < interleaved / 2
+        assert fake_ollama_server.requests[-1]['keep_alive'] == "5m"
+
+    @pytest.mark.parametrize("mode", ["thread", "async"])
+    def test_adaptive_concurrency_grows_while_latency_holds(self, mock_deps, fake_ollama_server,
+                                                            tmp_path, mode):
+        _, evaluator, generator = mock_deps
+        generator.generate_dataset.return_value = [{'question': f'q{i}', 'answer': 'a'}
+                                                   for i in range(12)]
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.1] * len(preds)
+        fake_ollama_server.delay = 0.02
+
+        llm = OllamaClient(base_url=fake_ollama_server.url, cache_dir=str(tmp_path))
+        runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator,
+                                  strategies=["Basic Prompting", "Chain of Thought"])
+        with patch.object(runner, '_save_results'):
+            df = runner.run_all_experiments(max_workers=1, max_in_flight=1, mode=mode,
+                                            adaptive=True)
+
+        assert len(df) == 24
+        concurrency = runner.run_stats['concurrency']
+        assert concurrency['history'][0]['limit'] == 1
+        assert concurrency['final'] > 1
+        assert fake_ollama_server.peak_in_flight > 1
+        assert runner.run_stats['capacity'] == config.experiment.max_concurrency
+
+    def test_async_fallback_keeps_generation_stats(self, mock_deps, fake_ollama_server,
+                                                   tmp_path):
+        _, evaluator, generator = mock_deps
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.2] * len(preds)
+        llm = OllamaClient(base_url=fake_ollama_server.url, cache_dir=str(tmp_path), stream=True)
+
+        class OpaqueStrategy:
+            """No build_prompt or aexecute, so async mode runs it on the blocking client."""
+            name = "Opaque"
+
+            def execute(self, item, llm_client):
+                return llm_client.generate(item['question'])
+
+        with patch.dict(strategy_registry._registry, {"Opaque": OpaqueStrategy}):
+            runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator,
+                                      strategies=["Opaque"])
+            with patch.object(runner, '_save_results'):
+                df = runner.run_all_experiments(mode="async", max_in_flight=2)
+
+        assert len(df) == 2
+        assert df['ttft'].notna().all() and df['tokens_per_sec'].notna().all()
+
+    def test_generation_metric_columns(self, mock_deps, fake_ollama_server, tmp_path):
+        _, evaluator, generator = mock_deps
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.2] * len(preds)
+        llm = OllamaClient(base_url=fake_ollama_server.url, cache_dir=str(tmp_path), stream=True)
+
+        runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator)
+        with patch.object(runner, '_save_results'):
+            df = runner.run_all_experiments(max_workers=2)
+
+        for column in ("ttft", "inter_token_latency", "tokens_per_sec", "prompt_eval_duration"):
+            assert column in df.columns
+        assert df['ttft'].notna().all()
+        assert (df['ttft'] <= df['latency']).all()
+
+    def test_run_all_experiments_invalid_mode(self, mock_deps):
+        llm, evaluator, generator = mock_deps
+        runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator)
+        with pytest.raises(ValueError):
+            runner.run_all_experiments(mode="fibers")
 
-    def test_process_single_item(self, mock_deps):
+    def test_generate_single_item(self, mock_deps):
         llm, evaluator, generator = mock_deps
         runner = ExperimentRunner(llm_client=llm, evaluator=evaluator, generator=generator)
         
         mock_strategy = MagicMock()
         mock_strategy.execute.return_value = "Output"
-        evaluator.evaluate.return_value = 0.5
         
-        result = runner._process_single_item(
+        result = runner._generate_single_item(
             {'question': 'q', 'answer': 'a'},
             "TestStrategy",
             mock_strategy
@@ -71,5 +469,7 @@ class TestExperimentRunner:
         
         assert result['strategy'] == "TestStrategy"
         assert result['model_output'] == "Output"
-        assert result['vector_distance'] == 0.5
+        # Scoring is left to the batched ScoringStage
+        assert math.isnan(result['vector_distance'])
+        evaluator.evaluate.assert_not_called()
         mock_strategy.execute.assert_called_once()
\ No newline at end of file
@@ -23,9 +23,10 @@ def mock_llm_client():
 def mock_evaluator():
     evaluator = MagicMock(spec=SimilarityEvaluator)
     evaluator.evaluate.return_value = 0.1
+    evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.1] * len(preds)
     return evaluator
 
-def test_full_experiment_workflow(mock_llm_client, mock_evaluator):
+def test_full_experiment_workflow(mock_llm_client, mock_evaluator, isolated_results):
     """
     Test the complete workflow from experiment execution to result generation.
     """
@@ -48,7 +49,10 @@ def test_full_experiment_workflow(mock_llm_client, mock_evaluator):
         
         # Verify interactions
         assert mock_llm_client.generate.called
-        assert mock_evaluator.evaluate.called
+        assert mock_evaluator.calculate_batch_distances.called
+
+        # Results are saved under the test's temporary directory, not the repo's results/
+        assert any(isolated_results.iterdir())
         
     finally:
         config.experiment.dataset_size = original_size
@@ -1,8 +1,20 @@
+import asyncio
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.utils.llm_client import OllamaClient, start_ollama_server
+from src.utils.llm_client import (
+    AsyncOllamaClient,
+    AsyncRequestScheduler,
+    LLMConnectionError,
+    LLMError,
+    LLMTimeoutError,
+    ModelNotFoundError,
+    OllamaClient,
+    last_generation_stats,
+    start_ollama_server,
+)
+from src.utils.resilience import CircuitOpenError
 
 
 class TestOllamaClient:
@@ -23,10 +35,13 @@ class TestOllamaClient:
         # The code does: self.client = ollama.Client(host=base_url)
         # So we can check that.
 
-    @patch.object(OllamaClient, '_load_cache', return_value={})
-    @patch.object(OllamaClient, '_save_cache')
-    def test_generate_success(self, mock_save, mock_load, mock_ollama_client):
-        client = OllamaClient()
+    def test_init_falls_back_to_module_client(self, tmp_path):
+        with patch('src.utils.llm_client.ollama.Client', side_effect=RuntimeError("bad host")):
+            client = OllamaClient(cache_dir=str(tmp_path))
+        assert client.client.__name__ == "ollama"
+
+    def test_generate_success(self, mock_ollama_client, tmp_path):
+        client = OllamaClient(cache_dir=str(tmp_path))
         # Mock the internal client's generate method
         client.client.generate.return_value = {'response': 'Test response'}
         
@@ -39,14 +54,143 @@ class TestOllamaClient:
         assert args['system'] == "Sys"
         assert args['options']['temperature'] == 0.0
 
-    @patch.object(OllamaClient, '_load_cache', return_value={})
-    def test_generate_failure(self, mock_load, mock_ollama_client):
-        client = OllamaClient()
+    def test_generate_uses_cache(self, mock_ollama_client, tmp_path):
+        client = OllamaClient(cache_dir=str(tmp_path))
+        client.client.generate.return_value = {'response': 'Cached response'}
+
+        assert client.generate("Hello") == "Cached response"
+        assert client.generate("Hello") == "Cached response"
+        client.client.generate.assert_called_once()
+
+        # A fresh client over the same directory sees the persisted entry.
+        reopened = OllamaClient(cache_dir=str(tmp_path))
+        assert reopened.generate("Hello") == "Cached response"
+        reopened.client.generate.assert_called_once()
+
+    def test_seeded_samples_cached_separately(self, mock_ollama_client, tmp_path):
+        client = OllamaClient(cache_dir=str(tmp_path))
+        client.client.generate.side_effect = [{'response': 'A'}, {'response': 'B'}]
+
+        assert client.generate("Hello", temperature=0.7, seed=1) == "A"
+        assert client.generate("Hello", temperature=0.7, seed=2) == "B"
+        assert client.generate("Hello", temperature=0.7, seed=1) == "A"
+        assert client.client.generate.call_count == 2
+        options = client.client.generate.call_args[1]['options']
+        assert options == {'temperature': 0.7, 'seed': 2}
+
+    def test_cache_stats(self, mock_ollama_client, tmp_path):
+        client = OllamaClient(cache_dir=str(tmp_path), cache_max_entries=1)
+        client.client.generate.return_value = {'response': 'R'}
+        client.generate("a")
+        client.generate("b")
+        client.generate("b")
+
+        stats = client.cache_stats()
+        assert stats["hits"] == 1
+        assert stats["evictions"] == 1
+        assert stats["backend_misses"] == 2
+
+    def test_generate_records_eval_stats(self, mock_ollama_client, tmp_path):
+        client = OllamaClient(cache_dir=str(tmp_path))
+        client.client.generate.return_value = {
+            'response': 'R', 'eval_count': 50, 'eval_duration': 2_000_000_000,
+            'prompt_eval_count': 10, 'prompt_eval_duration': 100_000_000,
+        }
+        client.generate("Hello")
+
+        stats = client.last_generation_stats()
+        assert stats.tokens_per_sec == 25.0
+        assert stats.prompt_eval_duration == 0.1
+        assert stats.ttft is None
+        assert stats.cached is False
+
+        client.generate("Hello")
+        assert client.last_generation_stats().cached is True
+
+    def test_generate_stream(self, mock_ollama_client, tmp_path):
+        client = OllamaClient(cache_dir=str(tmp_path))
+        client.client.generate.return_value = iter([
+            {'response': 'Yes', 'done': False},
+            {'response': ', it', 'done': False},
+            {'response': '', 'done': True, 'eval_count': 2, 'eval_duration': 1_000_000_000},
+        ])
+
+        tokens = list(client.generate_stream("Hello"))
+        assert tokens == ['Yes', ', it']
+        assert client.client.generate.call_args[1]['stream'] is True
+
+        stats = client.last_generation_stats()
+        assert stats.ttft is not None and stats.ttft >= 0
+        assert stats.inter_token_latency is not None
+        assert stats.tokens_per_sec == 2.0
+        # The assembled text is cached
+        assert client.generate("Hello") == "Yes, it"
+
+    def test_streaming_client_against_fake_server(self, fake_ollama_server, tmp_path):
+        client = OllamaClient(base_url=fake_ollama_server.url, cache_dir=str(tmp_path), stream=True)
+        assert client.generate("one two").startswith("Yes. Echo: one two")
+        assert fake_ollama_server.requests[0]['stream'] is True
+        assert client.last_generation_stats().eval_count == 4
+
+    def test_generate_failure(self, mock_ollama_client, tmp_path):
+        client = OllamaClient(cache_dir=str(tmp_path))
         client.client.generate.side_effect = Exception("API Error")
-        
-        response = client.generate("Hello")
-        assert "Failed to generate response" in response
-        assert "API Error" in response
+
+        with pytest.raises(LLMError, match="API Error") as excinfo:
+            client.generate("Hello")
+        assert not excinfo.value.retryable
+        client.client.generate.assert_called_once()
+        assert client.cache.get(client._get_cache_key("Hello", None)) is None
+
+    def test_generate_retries_transient_errors(self, mock_ollama_client, tmp_path):
+        client = OllamaClient(cache_dir=str(tmp_path), retry_backoff=0.001)
+        client.client.generate.side_effect = [ConnectionError("Failed to connect"),
+                                              {'response': 'OK'}]
+
+        assert client.generate("Hello") == "OK"
+        assert client.client.generate.call_count == 2
+
+    def test_generate_gives_up_after_retries(self, mock_ollama_client, tmp_path):
+        client = OllamaClient(cache_dir=str(tmp_path), max_retries=2, retry_backoff=0.001)
+        client.client.generate.side_effect = TimeoutError("read timed out")
+
+        with pytest.raises(LLMTimeoutError):
+            client.generate("Hello")
+        assert client.client.generate.call_count == 3
+
+    def test_model_not_found_is_not_retried(self, mock_ollama_client, tmp_path):
+        import ollama
+
+        client = OllamaClient(model="ghost", cache_dir=str(tmp_path), retry_backoff=0.001)
+        client.client.generate.side_effect = ollama.ResponseError("model 'ghost' not found", 404)
+
+        with pytest.raises(ModelNotFoundError, match="ollama pull ghost"):
+            client.generate("Hello")
+        client.client.generate.assert_called_once()
+
+    def test_circuit_breaker_fails_fast(self, mock_ollama_client, tmp_path):
+        client = OllamaClient(cache_dir=str(tmp_path), max_retries=0, circuit_failure_threshold=2,
+                              circuit_reset_seconds=60)
+        client.client.generate.side_effect = ConnectionError("Failed to connect")
+
+        for _ in range(2):
+            with pytest.raises(LLMConnectionError, match="ollama serve"):
+                client.generate("Hello")
+        with pytest.raises(CircuitOpenError):
+            client.generate("Hello")
+        assert client.client.generate.call_count == 2
+
+    def test_stream_failure_raises(self, mock_ollama_client, tmp_path):
+        client = OllamaClient(cache_dir=str(tmp_path), stream=True, max_retries=0)
+        client.client.generate.side_effect = ConnectionError("Failed to connect")
+
+        with pytest.raises(LLMConnectionError):
+            client.generate("Hello")
+
+    def test_timeout_reaches_http_client(self, tmp_path):
+        with patch('src.utils.llm_client.ollama.Client') as mock_client_cls:
+            OllamaClient(cache_dir=str(tmp_path), timeout=12.5)
+        assert mock_client_cls.call_args.kwargs['timeout'] == 12.5
 
     def test_check_connection_success(self, mock_ollama_client):
         client = OllamaClient()
@@ -90,3 +234,153 @@ class TestOllamaClient:
         
         result = start_ollama_server(max_retries=1)
         assert result is False
+
+
+class TestAsyncRequestScheduler:
+
+    def test_limits_in_flight(self):
+        async def scenario():
+            scheduler = AsyncRequestScheduler(max_in_flight=3)
+
+            async def work(i):
+                await asyncio.sleep(0.01)
+                return i
+
+            results = await asyncio.gather(*[scheduler.submit("m", lambda i=i: work(i))
+                                             for i in range(20)])
+            await scheduler.aclose()
+            return results, scheduler.peak_in_flight
+
+        results, peak = asyncio.run(scenario())
+        assert results == list(range(20))
+        assert peak == 3
+
+    def test_per_model_limit(self):
+        async def scenario():
+            scheduler = AsyncRequestScheduler(max_in_flight=10, per_model_limit=1)
+            active = {"a": 0, "b": 0}
+            peaks = {"a": 0, "b": 0}
+
+            async def work(model):
+                active[model] += 1
+                peaks[model] = max(peaks[model], active[model])
+                await asyncio.sleep(0.01)
+                active[model] -= 1
+
+            await asyncio.gather(*[scheduler.submit(m, lambda m=m: work(m)) for m in "abab"])
+            await scheduler.aclose()
+            return peaks, scheduler.peak_in_flight
+
+        peaks, overall = asyncio.run(scenario())
+        assert peaks == {"a": 1, "b": 1}
+        assert overall == 2
+
+    def test_propagates_exceptions(self):
+        async def scenario():
+            scheduler = AsyncRequestScheduler(max_in_flight=2)
+
+            async def boom():
+                raise RuntimeError("boom")
+
+            try:
+                await scheduler.submit("m", boom)
+            finally:
+                await scheduler.aclose()
+
+        with pytest.raises(RuntimeError, match="boom"):
+            asyncio.run(scenario())
+
+    def test_cancel_pending_and_running(self):
+        async def scenario():
+            scheduler = AsyncRequestScheduler(max_in_flight=1)
+
+            async def slow():
+                await asyncio.sleep(10)
+
+            futures = [asyncio.ensure_future(scheduler.submit("m", slow)) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            cancelled = scheduler.cancel("m")
+            outcomes = await asyncio.gather(*futures, return_exceptions=True)
+            await scheduler.aclose()
+            return cancelled, outcomes
+
+        cancelled, outcomes = asyncio.run(scenario())
+        assert cancelled == 3
+        assert all(isinstance(o, asyncio.CancelledError) for o in outcomes)
+
+    def test_invalid_limit(self):
+        with pytest.raises(ValueError):
+            AsyncRequestScheduler(max_in_flight=0)
+
+
+class TestAsyncOllamaClient:
+
+    def test_generate_against_fake_server(self, fake_ollama_server):
+        fake_ollama_server.delay = 0.05
+
+        async def scenario():
+            client = AsyncOllamaClient(model="fake-model", base_url=fake_ollama_server.url,
+                                       max_in_flight=5)
+            try:
+                return await asyncio.gather(*[client.generate(f"prompt {i}") for i in range(20)])
+            finally:
+                await client.aclose()
+
+        responses = asyncio.run(scenario())
+        assert len(responses) == 20
+        assert responses[3] == "Yes. Echo: prompt 3"
+        assert fake_ollama_server.peak_in_flight <= 5
+        assert fake_ollama_server.peak_in_flight > 1
+        assert fake_ollama_server.requests[0]["options"]["temperature"] == 0.0
+
+    def test_shares_cache_with_sync_client(self, fake_ollama_server, tmp_path):
+        sync_client = OllamaClient(model="fake-model", base_url=fake_ollama_server.url,
+                                   cache_dir=str(tmp_path))
+        assert sync_client.generate("cached prompt") == "Yes. Echo: cached prompt"
+
+        async def scenario():
+            client = AsyncOllamaClient.from_client(sync_client)
+            try:
+                return await client.generate("cached prompt")
+            finally:
+                await client.aclose()
+
+        assert asyncio.run(scenario()) == "Yes. Echo: cached prompt"
+        assert len(fake_ollama_server.requests) == 1
+
+    def test_streaming_records_ttft(self, fake_ollama_server):
+        async def scenario():
+            client = AsyncOllamaClient(base_url=fake_ollama_server.url, stream=True)
+            try:
+                text = await client.generate("stream me")
+                return text, last_generation_stats()
+            finally:
+                await client.aclose()
+
+        text, stats = asyncio.run(scenario())
+        assert text.startswith("Yes. Echo: stream me")
+        assert stats.ttft is not None
+        assert stats.tokens_per_sec == 8.0
+
+    def test_generate_failure_raises_typed_error(self):
+        async def scenario():
+            client = AsyncOllamaClient(base_url="http://127.0.0.1:9", retry_backoff=0.001)
+            try:
+                return await client.generate("Hello")
+            finally:
+                await client.aclose()
+
+        with pytest.raises(LLMConnectionError, match="Could not connect"):
+            asyncio.run(scenario())
+
+    def test_from_client_shares_circuit_breaker(self, tmp_path):
+        sync_client = OllamaClient(cache_dir=str(tmp_path), timeout=5, max_retries=1)
+
+        async def scenario():
+            client = AsyncOllamaClient.from_client(sync_client)
+            await client.aclose()
+            return client
+
+        client = asyncio.run(scenario())
+        assert client.breaker is sync_client.breaker
+        assert client.retry_policy == sync_client.retry_policy
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from collections import Counter
+
+import pytest
+
+from src.utils.llm_client import AsyncOllamaClient, OllamaClient
+from src.utils.load_balancer import EndpointPool, HashRing
+from tests.conftest import start_fake_ollama_server, stop_fake_ollama_server
+
+
+def balanced_client(servers, tmp_path, **kwargs):
+    return OllamaClient(base_urls=[s.url for s in servers], cache_dir=str(tmp_path), **kwargs)
+
+
+def served(servers):
+    return [len(s.requests) for s in servers]
+
+
+class TestHashRing:
+
+    def test_losing_a_node_only_remaps_its_keys(self):
+        nodes = ["a", "b", "c"]
+        full = HashRing(nodes)
+        reduced = HashRing(["a", "b"])
+        keys = [f"key-{i}" for i in range(300)]
+
+        moved = [k for k in keys if full.nodes_for(k)[0] != reduced.nodes_for(k)[0]]
+        assert moved and all(full.nodes_for(k)[0] == "c" for k in moved)
+        assert Counter(full.nodes_for(k)[0] for k in keys).keys() == set(nodes)
+        assert sorted(full.nodes_for("key-0")) == nodes
+
+
+class TestEndpointPool:
+
+    def test_least_outstanding_prefers_idle_host(self):
+        pool = EndpointPool(["http://a", "http://b", "http://c"], lambda url: None,
+                            policy="least_outstanding")
+        a, b, _ = pool.endpoints
+        pool.begin(a)
+        pool.begin(b)
+        assert pool.candidates()[0].url == "http://c"
+
+    def test_down_host_is_tried_last_until_retry(self):
+        pool = EndpointPool(["http://a", "http://b"], lambda url: None, health_check_interval=60)
+        pool.mark_down(pool.endpoints[0], ConnectionError("refused"))
+        assert [e.url for e in pool.candidates()] == ["http://b", "http://a"]
+        assert [e.url for e in pool.candidates()] == ["http://b", "http://a"]
+        assert pool.stats()["http://a"] == {"healthy": False, "outstanding": 0, "requests": 0,
+                                            "failures": 1}
+
+    def test_rejects_unknown_policy(self):
+        with pytest.raises(ValueError):
+            EndpointPool(["http://a"], lambda url: None, policy="random")
+
+
+class TestBalancedClient:
+
+    def test_round_robin_spreads_requests(self, fake_ollama_cluster, tmp_path):
+        client = balanced_client(fake_ollama_cluster, tmp_path)
+        for i in range(6):
+            client.generate(f"question {i}")
+        assert served(fake_ollama_cluster) == [2, 2, 2]
+
+    def test_consistent_hash_keeps_prompt_on_one_host(self, fake_ollama_cluster, tmp_path):
+        for run in range(3):
+            # A fresh response cache per client, so every call reaches a host.
+            client = balanced_client(fake_ollama_cluster, tmp_path / str(run),
+                                     balancing="consistent_hash")
+            client.generate("same question")
+        assert sorted(served(fake_ollama_cluster)) == [0, 0, 3]
+
+        for i in range(30):
+            client.generate(f"question {i}")
+        assert all(n > 0 for n in served(fake_ollama_cluster))
+
+    def test_failover_skips_dead_host_and_probes_it_back(self, fake_ollama_cluster, tmp_path):
+        client = balanced_client(fake_ollama_cluster, tmp_path, health_check_interval=0.2)
+        dead = fake_ollama_cluster[0]
+        port = dead.server_address[1]
+        stop_fake_ollama_server(dead)
+
+        outputs = [client.generate(f"question {i}") for i in range(6)]
+        assert all(o.startswith("Yes. Echo") for o in outputs)
+        assert served(fake_ollama_cluster[1:]) == [3, 3]
+        assert client.host_stats()[dead.url]["healthy"] is False
+
+        revived = start_fake_ollama_server(port)
+        try:
+            time.sleep(0.25)
+            for i in range(6):
+                client.generate(f"later {i}")
+            assert len(revived.requests) == 2
+            assert client.client.check_health() == {s.url: True for s in fake_ollama_cluster}
+        finally:
+            stop_fake_ollama_server(revived)
+
+    def test_stream_fails_over_before_first_chunk(self, fake_ollama_cluster, tmp_path):
+        client = balanced_client(fake_ollama_cluster[:2], tmp_path, stream=True)
+        stop_fake_ollama_server(fake_ollama_cluster[0])
+
+        assert client.generate("question").startswith("Yes. Echo")
+        assert len(fake_ollama_cluster[1].requests) == 1
+
+    def test_bad_multi_host_setup_raises(self, tmp_path):
+        with pytest.raises(ValueError):
+            OllamaClient(base_urls=["http://a:11434", "http://b:11434"], balancing="random",
+                         cache_dir=str(tmp_path))
+
+    def test_single_host_keeps_plain_client(self, fake_ollama_server, tmp_path):
+        client = OllamaClient(base_urls=[fake_ollama_server.url], cache_dir=str(tmp_path))
+        assert client.base_url == fake_ollama_server.url
+        assert client.host_stats() == {}
+
+    def test_async_client_balances_hosts(self, fake_ollama_cluster, tmp_path):
+        sync_client = balanced_client(fake_ollama_cluster, tmp_path, balancing="least_outstanding")
+
+        async def run():
+            client = AsyncOllamaClient.from_client(sync_client)
+            try:
+                return await asyncio.gather(*(client.generate(f"question {i}") for i in range(9)))
+            finally:
+                await client.aclose()
+
+        outputs = asyncio.run(run())
+        assert len(set(outputs)) == 9
+        assert sum(served(fake_ollama_cluster)) == 9
+        assert all(n > 0 for n in served(fake_ollama_cluster))
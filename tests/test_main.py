@@ -1,12 +1,30 @@
-from unittest.mock import patch
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
 
+import pandas as pd
 import pytest
 
-from src.main import main
+from src.config.config import config
+from src.main import main, parse_args
 
 
 class TestMain:
 
+    @pytest.fixture(autouse=True)
+    def headless_deps(self, monkeypatch):
+        """Avoids loading the embedding model and writing results; keeps an interactive stdin."""
+        # CLI flags mutate the global config; give each test its own copy.
+        for section in ('llm', 'experiment', 'cache', 'analysis', 'paths'):
+            monkeypatch.setattr(config, section, getattr(config, section).model_copy())
+        stdin = MagicMock()
+        stdin.isatty.return_value = True
+        with patch('src.utils.metrics.SimilarityEvaluator'), \
+                patch('src.main.save_results') as mock_save, \
+                patch('src.main.sys.stdin', stdin):
+            yield mock_save
+
     @patch('src.main.OllamaClient')
     @patch('src.main.ExperimentRunner')
     @patch('src.main.ResultAnalyzer')
@@ -20,6 +38,7 @@ class TestMain:
         client_instance.list_models.return_value = ['llama3']
         
         mock_input.return_value = "1" # Select first model
+        mock_runner.return_value.run_all_experiments.return_value = pd.DataFrame()
         
         main()
         
@@ -49,6 +68,7 @@ class TestMain:
         # "Invalid input. Using default model." or "Invalid selection. Using default model."
         
         mock_input.return_value = "99" # Invalid selection
+        mock_runner.return_value.run_all_experiments.return_value = pd.DataFrame()
         
         main()
         
@@ -67,6 +87,7 @@ class TestMain:
         client_instance.list_models.return_value = ['llama3']
         
         mock_input.return_value = "" # Default
+        mock_runner.return_value.run_all_experiments.return_value = pd.DataFrame()
         
         main()
         
@@ -109,3 +130,76 @@ class TestMain:
         
         with pytest.raises(SystemExit):
             main()
+
+    @patch('src.main.OllamaClient')
+    @patch('src.main.ExperimentRunner')
+    @patch('src.main.ResultAnalyzer')
+    @patch('builtins.input')
+    def test_main_headless_batch(self, mock_input, mock_analyzer, mock_runner, mock_client,
+                                 headless_deps):
+        client_instance = mock_client.return_value
+        client_instance.check_connection.return_value = True
+        client_instance.list_models.return_value = ['llama3:latest', 'mistral:latest']
+        mock_runner.return_value.run_all_experiments.side_effect = [
+            pd.DataFrame({'strategy': ['CoT'], 'model': ['llama3']}),
+            pd.DataFrame({'strategy': ['CoT'], 'model': ['mistral']}),
+        ]
+
+        main([
+            '--model', 'llama3', '--model', 'mistral', '--strategies', 'Chain of Thought',
+            '--dataset-size', '3', '--workers', '2', '--output-format', 'parquet', '--no-report',
+            '--adaptive-concurrency', '--host', 'http://gpu-1:11434', '--host', 'http://gpu-2:11434',
+        ])
+
+        mock_input.assert_not_called()
+        mock_analyzer.return_value.generate_report.assert_not_called()
+        assert mock_runner.call_count == 2
+        assert mock_runner.call_args.kwargs['strategies'] == ['Chain of Thought']
+        assert mock_runner.return_value.run_all_experiments.call_args.kwargs['max_workers'] == 2
+        assert config.experiment.dataset_size == 3
+        assert config.experiment.adaptive_concurrency is True
+        assert mock_client.call_args.kwargs['base_urls'] == ['http://gpu-1:11434', 'http://gpu-2:11434']
+        df, _, fmt = headless_deps.call_args.args
+        assert list(df['model']) == ['llama3', 'mistral']
+        assert fmt == 'parquet'
+
+    @patch('src.main.OllamaClient')
+    @patch('src.main.ExperimentRunner')
+    @patch('builtins.input')
+    def test_main_non_interactive_uses_configured_model(self, mock_input, mock_runner, mock_client):
+        client_instance = mock_client.return_value
+        client_instance.check_connection.return_value = True
+        client_instance.list_models.return_value = ['llama3']
+        mock_runner.return_value.run_all_experiments.return_value = pd.DataFrame()
+
+        main(['--non-interactive', '--no-report'])
+
+        mock_input.assert_not_called()
+        assert client_instance.model == config.llm.model
+
+    @patch('src.main.OllamaClient')
+    def test_main_unknown_model(self, mock_client):
+        client_instance = mock_client.return_value
+        client_instance.check_connection.return_value = True
+        client_instance.list_models.return_value = ['llama3']
+
+        with pytest.raises(SystemExit):
+            main(['--model', 'missing', '--no-report'])
+
+    def test_parse_args_rejects_unknown_strategy(self):
+        with pytest.raises(SystemExit):
+            parse_args(['--strategies', 'Telepathy'])
+
+    def test_parse_args_resume_single_model(self):
+        assert parse_args(['--resume']).resume == 'latest'
+        with pytest.raises(SystemExit):
+            parse_args(['--resume', '-m', 'a', '-m', 'b'])
+
+
+def test_cli_import_defers_heavy_dependencies():
+    """Importing the CLI must not load torch, pandas, plotting or the ollama client."""
+    heavy = ("torch", "sentence_transformers", "pandas", "matplotlib", "seaborn", "ollama")
+    code = f"import sys, src.main; print([m for m in {heavy!r} if m in sys.modules])"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=Path(__file__).resolve().parent.parent)
+    assert out.stdout.strip() == "[]"
@@ -1,9 +1,11 @@
+import math
 from unittest.mock import patch
 
 import numpy as np
 import pytest
 
-from src.utils.metrics import SimilarityEvaluator
+from src.core.registry import metric_registry
+from src.utils.metrics import LabelMatchEvaluator, SimilarityEvaluator, rowwise_cosine_distance
 
 
 class TestSimilarityEvaluator:
@@ -14,6 +16,18 @@ class TestSimilarityEvaluator:
         mock_st.assert_called_with("test-model")
         assert evaluator.model == mock_st.return_value
 
+    @patch('src.utils.metrics.SentenceTransformer')
+    def test_evaluators_share_pooled_model(self, mock_st, empty_embedding_pool):
+        first = SimilarityEvaluator(model_name="test-model")
+        second = SimilarityEvaluator(model_name="test-model")
+        mock_st.assert_called_once_with("test-model")
+        assert first.model is second.model
+        assert empty_embedding_pool.stats()["test-model"]["refs"] == 2
+
+        first.close()
+        first.close()
+        assert empty_embedding_pool.stats()["test-model"]["refs"] == 1
+
     @patch('src.utils.metrics.SentenceTransformer')
     def test_init_failure(self, mock_st):
         mock_st.side_effect = Exception("Load failed")
@@ -59,8 +73,73 @@ class TestSimilarityEvaluator:
         dists = evaluator.calculate_batch_distances(["a"], ["a"])
         assert dists == [0.0]
 
+    @patch('src.utils.metrics.SentenceTransformer')
+    def test_calculate_batch_distances_single_encode(self, mock_st):
+        evaluator = SimilarityEvaluator(batch_size=16)
+        # predictions first, then references
+        # unique texts, predictions first: "a", "b", "c"
+        mock_st.return_value.encode.return_value = np.array([[1, 0], [1, 0], [0, 1]])
+
+        dists = evaluator.calculate_batch_distances(["a", "", "b"], ["a", "x", "c"])
+        assert dists == [0.0, 1.0, 1.0]
+        mock_st.return_value.encode.assert_called_once_with(["a", "b", "c"], batch_size=16)
+
+    @patch('src.utils.metrics.SentenceTransformer')
+    def test_reference_embeddings_cached(self, mock_st):
+        evaluator = SimilarityEvaluator()
+        mock_st.return_value.encode.side_effect = lambda texts, batch_size: np.ones((len(texts), 2))
+
+        evaluator.calculate_batch_distances(["p1", "p2"], ["ref", "ref"])
+        evaluator.calculate_distance("p3", "ref")
+
+        calls = [c.args[0] for c in mock_st.return_value.encode.call_args_list]
+        assert calls == [["p1", "p2", "ref"], ["p3"]]
+        assert evaluator.embedding_cache.hits == 1
+
+    @patch('src.utils.metrics.SentenceTransformer')
+    def test_embeddings_persist_across_instances(self, mock_st, tmp_path):
+        mock_st.return_value.encode.side_effect = lambda texts, batch_size: np.ones((len(texts), 2))
+        first = SimilarityEvaluator(model_name="m", cache_dir=tmp_path)
+        first.encode(["ref"])
+        first.flush_cache()
+
+        second = SimilarityEvaluator(model_name="m", cache_dir=tmp_path)
+        np.testing.assert_array_equal(second.encode(["ref"]), [[1.0, 1.0]])
+        assert mock_st.return_value.encode.call_count == 1
+
+    @patch('src.utils.metrics.SentenceTransformer')
+    def test_calculate_batch_distances_empty(self, mock_st):
+        evaluator = SimilarityEvaluator()
+        assert evaluator.calculate_batch_distances([], []) == []
+        mock_st.return_value.encode.assert_not_called()
+
+    def test_rowwise_cosine_distance(self):
+        a = np.array([[1.0, 0.0], [1.0, 1.0], [0.0, 0.0]])
+        b = np.array([[0.0, 1.0], [2.0, 2.0], [1.0, 0.0]])
+        np.testing.assert_allclose(rowwise_cosine_distance(a, b), [1.0, 0.0, 1.0], atol=1e-12)
+
     @patch('src.utils.metrics.SentenceTransformer')
     def test_calculate_batch_distances_mismatch(self, mock_st):
         evaluator = SimilarityEvaluator()
         with pytest.raises(ValueError):
-            evaluator.calculate_batch_distances(["a"], ["b", "c"])
\ No newline at end of file
+            evaluator.calculate_batch_distances(["a"], ["b", "c"])
+
+
+class TestLabelMatchEvaluator:
+
+    def test_registered(self):
+        assert isinstance(metric_registry.create("Label Match"), LabelMatchEvaluator)
+
+    def test_scores_labels(self):
+        evaluator = LabelMatchEvaluator()
+        distances = evaluator.calculate_batch_distances(
+            ["Answer: Yes", "No, it does not follow.", "Maybe yes, maybe no.", "Yes"],
+            ["Yes", "Yes, all men are mortal.", "No", "The premises are unclear."],
+        )
+        assert distances[:2] == [0.0, 1.0]
+        # Ambiguous answers and references without a label are left for the embedding metric.
+        assert math.isnan(distances[2]) and math.isnan(distances[3])
+
+    def test_calculate_batch_distances_mismatch(self):
+        with pytest.raises(ValueError):
+            LabelMatchEvaluator().calculate_batch_distances(["Yes"], [])
@@ -0,0 +1,76 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.utils.model_pool import ModelPool
+
+
+class TestModelPool:
+
+    def test_loads_once_and_counts_references(self):
+        loader = MagicMock(side_effect=lambda name: f"model:{name}")
+        pool = ModelPool(loader)
+
+        assert pool.acquire("a") == "model:a"
+        assert pool.acquire("a") == "model:a"
+        loader.assert_called_once_with("a")
+        stats = pool.stats()["a"]
+        assert stats["refs"] == 2 and stats["acquisitions"] == 2
+        assert stats["load_seconds"] >= 0
+
+        pool.release("a")
+        assert pool.stats()["a"]["refs"] == 1
+
+    def test_concurrent_acquire_loads_once(self):
+        calls = []
+
+        def loader(name):
+            calls.append(name)
+            time.sleep(0.05)
+            return object()
+
+        pool = ModelPool(loader)
+        models = []
+        threads = [threading.Thread(target=lambda: models.append(pool.acquire("a")))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert calls == ["a"]
+        assert len({id(m) for m in models}) == 1
+
+    def test_idle_models_stay_warm_until_evicted(self):
+        loader = MagicMock(side_effect=lambda name: object())
+        pool = ModelPool(loader)
+        pool.acquire("a")
+        pool.release("a")
+        pool.acquire("b")
+
+        assert "a" in pool
+        assert pool.evict_idle() == ["a"]
+        assert "a" not in pool and "b" in pool
+
+    def test_preloaded_models_are_pinned(self):
+        pool = ModelPool(lambda name: object())
+        pool.preload(["a"])
+        assert pool.stats()["a"]["pinned"]
+        assert pool.evict_idle() == []
+
+    def test_failed_load_is_not_cached(self):
+        loader = MagicMock(side_effect=[RuntimeError("boom"), "model"])
+        pool = ModelPool(loader)
+        with pytest.raises(RuntimeError):
+            pool.acquire("a")
+        assert pool.acquire("a") == "model"
+
+    def test_unbalanced_release_is_ignored(self):
+        pool = ModelPool(lambda name: object())
+        pool.release("missing")
+        pool.acquire("a")
+        pool.release("a")
+        pool.release("a")
+        assert pool.stats()["a"]["refs"] == 0
@@ -0,0 +1,54 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.utils.racing import StrategyRace
+
+
+def rows(strategy, values, status="ok"):
+    return [{"strategy": strategy, "vector_distance": v, "status": status} for v in values]
+
+
+class TestStrategyRace:
+
+    def test_dominated_strategy_is_dropped(self):
+        rng = np.random.default_rng(0)
+        race = StrategyRace(["good", "bad", "close"], min_items=20)
+        for _ in range(3):
+            race.update(rows("good", rng.normal(0.2, 0.05, 20)))
+            race.update(rows("bad", rng.normal(0.6, 0.05, 20)))
+            race.update(rows("close", rng.normal(0.21, 0.05, 20)))
+            race.end_round()
+
+        assert race.active == ["good", "close"] and not race.settled
+        assert race.eliminated["bad"]["round"] == 1
+        summary = race.summary()
+        assert summary["eliminated"]["bad"]["items"] == 20
+        assert summary["active"]["good"]["low"] < 0.2 < summary["active"]["good"]["high"]
+
+    def test_no_elimination_before_min_items(self):
+        race = StrategyRace(["a", "b"], min_items=30)
+        race.update(rows("a", [0.1] * 10) + rows("b", [0.9] * 10))
+        assert race.end_round() == []
+        assert race.bounds()["a"][1] == -math.inf
+
+    def test_failed_rows_and_unknown_strategies_are_ignored(self):
+        race = StrategyRace(["a"], min_items=2)
+        race.update(rows("a", [0.3, 0.5]) + rows("a", [math.nan], status="failed")
+                    + rows("z", [0.1]))
+        assert race.stats["a"].count == 2 and race.settled
+        assert race.bounds()["a"][0] == pytest.approx(0.4)
+
+    def test_bounds_widen_as_the_error_budget_is_spent(self):
+        race = StrategyRace(["a", "b"], min_items=2)
+        race.update(rows("a", [0.1, 0.3, 0.2]))
+        race.rounds = 1
+        early = race.bounds()["a"]
+        race.rounds = 50
+        late = race.bounds()["a"]
+        assert late[2] - late[1] > early[2] - early[1]
+
+    def test_invalid_delta(self):
+        with pytest.raises(ValueError):
+            StrategyRace(["a"], delta=0)
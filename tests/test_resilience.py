@@ -0,0 +1,131 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.utils.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    aretry_call,
+    retry_call,
+)
+
+
+class Transient(Exception):
+    retryable = True
+
+
+class Permanent(Exception):
+    retryable = False
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def identity(error: Exception) -> Exception:
+    return error
+
+
+class TestRetryPolicy:
+
+    def test_backoff_doubles_up_to_cap(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=3.0, jitter=0.0)
+        assert [policy.delay(a) for a in range(4)] == [1.0, 2.0, 3.0, 3.0]
+
+    def test_jitter_stays_in_bounds(self):
+        policy = RetryPolicy(base_delay=1.0, jitter=0.1)
+        assert all(0.9 <= policy.delay(0) <= 1.1 for _ in range(50))
+
+
+class TestRetryCall:
+
+    def test_retries_transient_then_succeeds(self):
+        call = MagicMock(side_effect=[Transient("blip"), Transient("blip"), "ok"])
+        sleeps = []
+        policy = RetryPolicy(max_retries=2, jitter=0.0)
+        result = retry_call(call, identity, policy, sleep=sleeps.append)
+        assert result == "ok"
+        assert sleeps == [0.5, 1.0]
+
+    def test_raises_classified_error_after_last_attempt(self):
+        call = MagicMock(side_effect=ValueError("raw"))
+
+        def classify(error):
+            return Transient(f"typed: {error}")
+
+        with pytest.raises(Transient, match="typed: raw") as excinfo:
+            retry_call(call, classify, RetryPolicy(max_retries=1), sleep=lambda _: None)
+        assert call.call_count == 2
+        assert isinstance(excinfo.value.__cause__, ValueError)
+
+    def test_permanent_errors_are_not_retried(self):
+        call = MagicMock(side_effect=Permanent("bad request"))
+        with pytest.raises(Permanent):
+            retry_call(call, identity, RetryPolicy(max_retries=3), sleep=lambda _: None)
+        call.assert_called_once()
+
+    def test_async_variant(self):
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise Transient("blip")
+            return "ok"
+
+        policy = RetryPolicy(max_retries=2, base_delay=0.001)
+        assert asyncio.run(aretry_call(call, identity, policy)) == "ok"
+        assert len(attempts) == 2
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold_and_half_opens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        clock.now = 10
+        assert breaker.state == "half_open"
+        breaker.before_call()  # the single trial call
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+    def test_failed_trial_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+        breaker.record_failure()
+        clock.now = 5
+        breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+    def test_permanent_errors_keep_circuit_closed(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        call = MagicMock(side_effect=Permanent("bad request"))
+        for _ in range(3):
+            with pytest.raises(Permanent):
+                retry_call(call, identity, RetryPolicy(max_retries=0), breaker)
+        assert breaker.state == "closed"
+
+    def test_open_circuit_skips_the_call(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        call = MagicMock(side_effect=Transient("down"))
+        with pytest.raises(Transient):
+            retry_call(call, identity, RetryPolicy(max_retries=0), breaker)
+        with pytest.raises(CircuitOpenError):
+            retry_call(call, identity, RetryPolicy(max_retries=0), breaker)
+        call.assert_called_once()
@@ -0,0 +1,116 @@
+import math
+from unittest.mock import patch
+
+import pandas as pd
+import pyarrow.dataset as ds
+import pytest
+
+from src.analysis import ResultAnalyzer
+from src.experiment_runner import save_results
+from src.utils.results_store import ResultStore, results_location
+
+
+def run_rows(run_id, model="llama3", strategies=("A", "B"), distance=0.1, **extra):
+    rows = [
+        {"run_id": run_id, "model": model, "strategy": s, "vector_distance": distance,
+         "status": "ok", "error": None, **extra}
+        for s in strategies
+    ]
+    return pd.DataFrame(rows)
+
+
+class TestResultStore:
+
+    def test_runs_accumulate_and_catalog_lists_them(self, tmp_path):
+        store = ResultStore(tmp_path / "store")
+        store.write(run_rows("run-1"))
+        store.write(run_rows("run-2", model="mistral:latest", strategies=("Chain of Thought",)))
+
+        assert [run['run_id'] for run in store.runs()] == ["run-1", "run-2"]
+        assert store.runs()[1]['models'] == ["mistral:latest"]
+        assert store.latest_run() == "run-2"
+        assert len(store.load()) == 3
+        assert (tmp_path / "store" / "run_id=run-1" / "model=llama3" / "strategy=A").is_dir()
+
+    def test_load_prunes_partitions_and_columns(self, tmp_path):
+        store = ResultStore(tmp_path)
+        store.write(run_rows("run-1"))
+        store.write(run_rows("run-2", model="mistral", distance=0.5))
+
+        df = store.load(columns=["strategy", "vector_distance", "missing"], run_ids=["run-2"],
+                        strategies=["B"])
+        assert list(df.columns) == ["strategy", "vector_distance"]
+        assert df.to_dict("records") == [{"strategy": "B", "vector_distance": 0.5}]
+        assert store.load(models=["nobody"]).empty
+
+        filtered = store.load(where=ds.field("vector_distance") > 0.2)
+        assert set(filtered['run_id']) == {"run-2"}
+
+    def test_rewriting_a_run_replaces_its_partitions(self, tmp_path):
+        store = ResultStore(tmp_path)
+        store.write(run_rows("run-1", distance=0.1))
+        store.write(run_rows("run-1", distance=0.9))
+
+        df = store.load(run_ids=["run-1"])
+        assert len(df) == 2 and (df['vector_distance'] == 0.9).all()
+        assert len(store.runs()) == 1
+
+    def test_runs_with_different_columns_read_together(self, tmp_path):
+        store = ResultStore(tmp_path)
+        store.write(run_rows("run-1"))
+        failed = run_rows("run-2", distance=math.nan, ttft=0.2).assign(status="failed",
+                                                                       error="boom")
+        store.write(failed)
+
+        df = store.load().sort_values("run_id")
+        assert df['ttft'].isna().tolist() == [True, True, False, False]
+        assert df['error'].tolist()[2:] == ["boom", "boom"]
+        assert store.runs()[1]['failed'] == 2
+
+    def test_stats_follow_writes_without_reading_rows(self, tmp_path):
+        store = ResultStore(tmp_path)
+        store.write(run_rows("run-1", distance=0.1))
+        store.write(run_rows("run-1", strategies=("B",), distance=0.5))
+        store.write(run_rows("run-1", model="mistral", strategies=("A",), distance=0.3))
+        store.write(run_rows("run-2", distance=0.9))
+
+        with patch.object(ResultStore, 'load', side_effect=AssertionError("scanned rows")):
+            summary = store.stats(run_ids=["run-1"]).summary().xs("vector_distance", level="metric")
+            assert summary['count'].tolist() == [2, 1]
+            assert summary['mean'].tolist() == pytest.approx([0.2, 0.5])
+            assert store.stats(run_ids=["run-1"], models=["mistral"]).groups == ["A"]
+            assert store.stats().summary()['count'].sum() == 5
+
+    def test_stats_of_older_runs_are_rebuilt_once(self, tmp_path):
+        store = ResultStore(tmp_path)
+        store.write(run_rows("run-1", distance=0.4))
+        store._stats_path("run-1").unlink()
+
+        assert store.stats().summary()['mean'].tolist() == [0.4, 0.4]
+        assert store._stats_path("run-1").exists()
+
+    def test_missing_store_raises(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            ResultStore(tmp_path / "absent").load()
+
+
+class TestSaveToStore:
+
+    def test_save_results_dataset_format(self, tmp_path):
+        path = save_results(run_rows("run-1"), tmp_path / "experiments.csv", "dataset")
+        assert path == tmp_path / "experiments"
+        assert results_location(tmp_path / "experiments.csv", "dataset") == path
+        assert len(ResultStore(path).load()) == 2
+
+    def test_analyzer_reads_latest_run_only(self, tmp_path):
+        store = ResultStore(tmp_path / "experiments")
+        store.write(run_rows("run-1", distance=0.1))
+        store.write(run_rows("run-2", distance=0.7))
+
+        analyzer = ResultAnalyzer(results_path=store.root)
+        df = analyzer.load_results(columns=["strategy", "vector_distance"])
+        assert list(df.columns) == ["strategy", "vector_distance"]
+        assert (df['vector_distance'] == 0.7).all()
+
+        analyzer.run_ids = ["run-1", "run-2"]
+        assert len(analyzer.load_results()) == 4
@@ -0,0 +1,154 @@
+import math
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.utils.metrics import LabelMatchEvaluator
+from src.utils.scoring import ScoringStage
+
+
+def _row(i):
+    return {"model_output": f"out{i}", "ground_truth": f"ref{i}"}
+
+
+class TestScoringStage:
+
+    def test_scores_in_batches(self):
+        evaluator = MagicMock()
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.5] * len(preds)
+
+        stage = ScoringStage(evaluator, batch_size=4, max_wait=1.0)
+        # Queue everything before the worker starts so batches fill up deterministically.
+        for i in range(10):
+            stage.submit(_row(i))
+        with stage:
+            pass
+        rows = stage.close()
+
+        assert len(rows) == 10
+        assert all(row['vector_distance'] == 0.5 for row in rows)
+        sizes = [len(c.args[0]) for c in evaluator.calculate_batch_distances.call_args_list]
+        assert sizes == [4, 4, 2]
+        assert stage.batches == 3
+
+    def test_overlaps_with_producers(self):
+        evaluator = MagicMock()
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.1] * len(preds)
+
+        with ScoringStage(evaluator, batch_size=8, max_wait=0.01) as stage:
+            producers = [
+                threading.Thread(
+                    target=lambda n=n: [stage.submit(_row(f"{n}-{i}")) for i in range(25)]
+                )
+                for n in range(4)
+            ]
+            for p in producers:
+                p.start()
+            for p in producers:
+                p.join()
+        assert len(stage.close()) == 100
+
+    def test_wait_returns_once_submitted_rows_are_scored(self):
+        evaluator = MagicMock()
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.4] * len(preds)
+        seen = []
+
+        with ScoringStage(evaluator, batch_size=3, max_wait=0.5, on_batch=seen.extend) as stage:
+            for i in range(5):
+                stage.submit(_row(i))
+            stage.wait()
+            assert len(seen) == 5
+            stage.wait()  # nothing pending
+
+    def test_falls_back_to_evaluate(self):
+        evaluator = MagicMock(spec=['evaluate'])
+        evaluator.evaluate.return_value = 0.3
+        with ScoringStage(evaluator, batch_size=2) as stage:
+            stage.submit(_row(1))
+        assert stage.close()[0]['vector_distance'] == 0.3
+
+    def test_batch_failure_scores_rows_individually(self):
+        evaluator = MagicMock()
+        evaluator.calculate_batch_distances.side_effect = RuntimeError("oom")
+        evaluator.evaluate.side_effect = [0.2, RuntimeError("bad row")]
+
+        stage = ScoringStage(evaluator, batch_size=2, max_wait=1.0)
+        stage.submit(_row(1))
+        stage.submit(_row(2))
+        with stage:
+            pass
+        rows = stage.close()
+        assert rows[0]['vector_distance'] == 0.2
+        assert math.isnan(rows[1]['vector_distance'])
+
+    def test_unscorable_batch_is_failed_and_stage_keeps_running(self):
+        evaluator = MagicMock()
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.4] * len(preds)
+        seen = []
+
+        with ScoringStage(evaluator, batch_size=1, max_wait=0.01, on_batch=seen.extend) as stage:
+            stage.submit({"ground_truth": "missing output"})
+            stage.wait()
+            stage.submit(_row(1))
+            stage.wait()
+        broken, ok = stage.close()
+        assert broken['status'] == "failed" and "KeyError" in broken['error']
+        assert ok['vector_distance'] == 0.4 and seen == [ok]
+
+    def test_label_metric_returning_none_counts_as_ambiguous(self):
+        evaluator = MagicMock()
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.4] * len(preds)
+        label_metric = MagicMock()
+        label_metric.calculate_batch_distances.return_value = [None]
+        with ScoringStage(evaluator, label_metric=label_metric, embed_fraction=0.0) as stage:
+            stage.submit(_row(1))
+        row = stage.close()[0]
+        assert math.isnan(row['label_distance']) and row['ambiguous_vector_distance'] == 0.4
+
+    def test_invalid_batch_size(self):
+        with pytest.raises(ValueError):
+            ScoringStage(MagicMock(), batch_size=0)
+
+    def test_tiered_scoring_embeds_ambiguous_rows_and_a_sample(self):
+        evaluator = MagicMock()
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.3] * len(preds)
+        rows = [{"model_output": "Answer: Yes", "ground_truth": "Yes, it follows.", "label": "Yes",
+                 "unit_key": f"k{i}"} for i in range(200)]
+        rows.append({"model_output": "yes or no", "ground_truth": "No, it does not.",
+                     "label": "No", "unit_key": "x"})
+
+        stage = ScoringStage(evaluator, batch_size=64, max_wait=1.0,
+                             label_metric=LabelMatchEvaluator(), embed_fraction=0.1)
+        for row in rows:
+            stage.submit(dict(row))
+        with stage:
+            pass
+        scored = stage.close()
+
+        assert stage.scored == 201 and 1 < stage.embedded < 60
+        assert all(row['label_distance'] == 0.0 for row in scored[:200])
+        ambiguous = scored[200]
+        assert math.isnan(ambiguous['label_distance'])
+        assert ambiguous['ambiguous_vector_distance'] == 0.3
+        assert stage._sampled(ambiguous) == (ambiguous['vector_distance'] == 0.3)
+        # vector_distance holds exactly the hash sample, so a rerun embeds the same rows
+        # and its statistics are not skewed towards ambiguous responses.
+        sampled = [row for row in scored if not math.isnan(row['vector_distance'])]
+        assert sampled == [row for row in scored if stage._sampled(row)]
+        assert stage.embedded == len(sampled) + (not stage._sampled(ambiguous))
+        assert all(math.isnan(row['ambiguous_vector_distance']) for row in scored[:200])
+
+    def test_tiered_scoring_without_sample_embeds_only_ambiguous_rows(self):
+        evaluator = MagicMock()
+        evaluator.calculate_batch_distances.side_effect = lambda preds, refs: [0.3] * len(preds)
+        stage = ScoringStage(evaluator, label_metric=LabelMatchEvaluator(), embed_fraction=0.0)
+        with stage:
+            stage.submit({"model_output": "No.", "ground_truth": "No", "unit_key": "a"})
+        row = stage.close()[0]
+        assert row['label_distance'] == 0.0 and math.isnan(row['vector_distance'])
+        evaluator.calculate_batch_distances.assert_not_called()
+
+    def test_invalid_embed_fraction(self):
+        with pytest.raises(ValueError):
+            ScoringStage(MagicMock(), embed_fraction=1.5)
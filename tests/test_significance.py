@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.significance import (
+    bootstrap_ci,
+    bootstrap_means,
+    confidence_intervals,
+    holm,
+    pairwise_tests,
+    permutation_test,
+)
+
+
+@pytest.fixture
+def paired_results():
+    rng = np.random.default_rng(0)
+    questions = [f"q{i}" for i in range(200)]
+    base = rng.random(200)
+    frames = [
+        pd.DataFrame({'model': 'llama3', 'question': questions, 'strategy': name,
+                      'vector_distance': base + shift + rng.normal(0, 0.05, 200), 'status': 'ok'})
+        for name, shift in (('A', 0.0), ('B', 0.0), ('C', 0.1))
+    ]
+    df = pd.concat(frames, ignore_index=True)
+    df.loc[0, 'status'] = 'failed'
+    return df
+
+
+class TestBootstrap:
+
+    def test_interval_covers_the_mean_and_shrinks_with_more_rows(self):
+        rng = np.random.default_rng(1)
+        small, large = rng.normal(1.0, 1.0, 100), rng.normal(1.0, 1.0, 10_000)
+        mean, low, high = bootstrap_ci(small, n_resamples=2000)
+        assert low < mean < high and mean == pytest.approx(small.mean())
+        _, large_low, large_high = bootstrap_ci(large, n_resamples=2000)
+        assert large_high - large_low < (high - low) / 5
+        assert large_low < 1.0 < large_high
+
+    def test_results_do_not_depend_on_chunking_or_workers(self):
+        values = np.random.default_rng(2).random(1000)
+        serial = bootstrap_means(values, n_resamples=500, seed=7, chunk_size=64, workers=1)
+        threaded = bootstrap_means(values, n_resamples=500, seed=7, chunk_size=64, workers=4)
+        np.testing.assert_array_equal(serial, threaded)
+        assert len(serial) == 500
+        assert np.isnan(bootstrap_ci([])).all()
+
+    def test_permutation_test_separates_shifted_from_equal(self):
+        rng = np.random.default_rng(3)
+        assert permutation_test(rng.normal(0.5, 1.0, 200), n_resamples=2000) < 0.01
+        assert permutation_test(rng.normal(0.0, 1.0, 200), n_resamples=2000) > 0.05
+        # The observed sign assignment is one of the permutations, so p never reaches zero.
+        p_value = permutation_test(np.full(50, 1.0), n_resamples=999)
+        assert p_value == pytest.approx(1 / 1000, abs=1e-3)
+
+    def test_holm_adjustment(self):
+        assert holm([0.01, 0.04, 0.03]) == pytest.approx([0.03, 0.06, 0.06])
+        assert holm([0.5, 0.9]) == pytest.approx([1.0, 1.0])
+
+
+class TestStrategyComparisons:
+
+    def test_confidence_intervals_per_strategy(self, paired_results):
+        table = confidence_intervals(paired_results, 'vector_distance', n_resamples=1000)
+        assert list(table.columns) == ['mean', 'ci_low', 'ci_high', 'n']
+        assert table.loc['A', 'n'] == 199 and table.loc['B', 'n'] == 200
+        assert (table['ci_low'] < table['mean']).all() and (table['mean'] < table['ci_high']).all()
+
+    def test_pairwise_tests_pair_rows_on_items(self, paired_results):
+        tests = pairwise_tests(paired_results, 'vector_distance', n_resamples=2000)
+        pairs = {(a, b): row for a, b, row in zip(tests['strategy_a'], tests['strategy_b'],
+                                                  tests.itertuples(), strict=True)}
+        assert set(pairs) == {('A', 'B'), ('A', 'C'), ('B', 'C')}
+        # Paired on items, the shared per-item difficulty cancels out.
+        assert pairs[('A', 'C')].n_pairs == 199
+        assert pairs[('A', 'C')].mean_diff == pytest.approx(-0.1, abs=0.02)
+        assert pairs[('A', 'C')].ci_high < 0 and pairs[('A', 'C')].p_holm < 0.01
+        assert pairs[('A', 'B')].p_value > 0.05
+        assert (tests['p_holm'] >= tests['p_value']).all()
+
+    def test_pairing_needs_an_item_column(self, paired_results):
+        with pytest.raises(ValueError):
+            pairwise_tests(paired_results.drop(columns=['model', 'question']), 'vector_distance')
@@ -0,0 +1,96 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.stats import KLLSketch, StatsAccumulator
+from src.utils.summary import summary_table
+
+
+@pytest.fixture
+def results():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'strategy': rng.choice(['A', 'B', 'C'], 3000),
+        'vector_distance': rng.random(3000),
+        'latency': rng.exponential(2.0, 3000),
+        'status': 'ok',
+    })
+    df.loc[::11, 'status'] = 'failed'
+    df.loc[::7, 'latency'] = np.nan
+    return df
+
+
+class TestKLLSketch:
+
+    def test_quantiles_are_exact_before_compaction(self):
+        values = np.random.default_rng(1).random(150)
+        sketch = KLLSketch(k=200).update(values)
+        qs = [0.05, 0.5, 0.95]
+        assert sketch.quantiles(qs) == pytest.approx(np.quantile(values, qs))
+
+    def test_rank_error_is_bounded_on_long_streams(self):
+        values = np.random.default_rng(2).normal(size=200_000)
+        sketch = KLLSketch(k=200)
+        for chunk in np.array_split(values, 40):
+            sketch.update(chunk)
+        assert sketch.count == len(values)
+        assert sum(len(level) for level in sketch.levels) < 1000
+        qs = np.array([0.01, 0.25, 0.5, 0.75, 0.99])
+        ranks = np.searchsorted(np.sort(values), sketch.quantiles(qs)) / len(values)
+        assert np.abs(ranks - qs).max() < 0.02
+
+    def test_merged_shards_match_one_stream(self):
+        values = np.random.default_rng(3).random(50_000)
+        merged = KLLSketch()
+        for shard in np.array_split(values, 5):
+            merged.merge(KLLSketch().update(shard))
+        assert merged.count == len(values)
+        assert merged.quantiles([0.5])[0] == pytest.approx(0.5, abs=0.02)
+        assert np.isnan(KLLSketch().quantiles([0.5])).all()
+
+
+class TestStatsAccumulator:
+
+    def test_summary_matches_pandas_on_successful_rows(self, results):
+        stats = StatsAccumulator(metrics=['vector_distance', 'latency']).update(results)
+        ok = results[results['status'] != 'failed']
+        for metric in ('vector_distance', 'latency'):
+            expected = ok.groupby('strategy')[metric].agg(
+                ['mean', 'var', 'std', 'min', 'max', 'count']
+            )
+            pd.testing.assert_frame_equal(summary_table(stats.summary(), metric),
+                                          expected.sort_values('mean'), check_dtype=False)
+        assert stats.status_counts()['failed'].sum() == (results['status'] == 'failed').sum()
+
+    def test_merging_shards_equals_one_pass(self, results):
+        metrics = ['vector_distance', 'latency']
+        merged = StatsAccumulator(metrics)
+        for shard in (results.iloc[:10], results.iloc[10:11], results.iloc[11:]):
+            merged.merge(StatsAccumulator(metrics).update(shard))
+        whole = StatsAccumulator(metrics).update(results)
+        pd.testing.assert_frame_equal(merged.summary(), whole.summary())
+        pd.testing.assert_frame_equal(merged.status_counts(), whole.status_counts())
+        table = summary_table(merged.summary(), 'latency')
+        expected = summary_table(whole.summary(), 'latency')['var'].tolist()
+        assert table['var'].tolist() == pytest.approx(expected)
+
+    def test_quantiles_select_and_round_trip(self, results):
+        stats = StatsAccumulator().update(results)
+        quantiles = stats.quantiles('vector_distance', (0.25, 0.5, 0.75))
+        assert list(quantiles.index) == ['A', 'B', 'C']
+        assert quantiles.loc['A', 0.5] == pytest.approx(0.5, abs=0.05)
+
+        assert stats.select(['B']).groups == ['B'] and stats.drop(['B']).groups == ['A', 'C']
+        restored = StatsAccumulator.from_dict(json.loads(json.dumps(stats.to_dict())))
+        pd.testing.assert_frame_equal(restored.summary(), stats.summary())
+        pd.testing.assert_frame_equal(restored.quantiles('vector_distance', (0.5,)),
+                                      stats.quantiles('vector_distance', (0.5,)))
+
+    def test_rows_without_metrics_only_count(self):
+        df = pd.DataFrame({'strategy': ['A', 'A'], 'status': ['failed', 'failed'],
+                           'latency': [1.0, 2.0]})
+        stats = StatsAccumulator().update(df)
+        assert stats.summary().empty
+        assert stats.status_counts().loc['A', 'failed'] == 2
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.strategies.definitions import SelfConsistencyStrategy
+from src.utils.labels import extract_label, parse_label
+
+
+class TestExtractLabel:
+
+    @pytest.mark.parametrize("text, expected", [
+        ("Yes, Socrates is mortal.", "Yes"),
+        ("no.", "No"),
+        ("If yes were true... Answer: No", "No"),
+        ("The answer is **yes**", "Yes"),
+        ("I cannot tell.", None),
+        ("", None),
+    ])
+    def test_extract_label(self, text, expected):
+        assert extract_label(text) == expected
+
+    @pytest.mark.parametrize("text, expected", [
+        ("Yes, Socrates is mortal.", "Yes"),
+        ("If yes were true... Answer: No", "No"),
+        ("Yes. It is yes.", "Yes"),
+        ("Yes or no? Hard to say.", None),
+        ("I cannot tell.", None),
+        ("", None),
+    ])
+    def test_parse_label_rejects_ambiguous_answers(self, text, expected):
+        assert parse_label(text) == expected
+
+
+class TestSelfConsistencyStrategy:
+
+    def _llm(self, responses):
+        llm = MagicMock()
+        llm.generate.side_effect = lambda prompt, system, temperature, seed: responses[seed]
+        return llm
+
+    def test_stops_once_majority_is_settled(self):
+        llm = self._llm(["Yes 0", "Yes 1", "Yes 2", "No 3", "No 4"])
+        strategy = SelfConsistencyStrategy(samples=5, temperature=0.7)
+
+        assert strategy.execute({'question': 'Q'}, llm) == "Yes 0"
+        assert llm.generate.call_count == 3
+        seeds = sorted(call.kwargs['seed'] for call in llm.generate.call_args_list)
+        assert seeds == [0, 1, 2]
+        assert all(call.kwargs['temperature'] == 0.7 for call in llm.generate.call_args_list)
+
+    def test_draws_more_samples_on_disagreement(self):
+        llm = self._llm(["Yes", "No", "No", "Yes", "No"])
+        strategy = SelfConsistencyStrategy(samples=5, temperature=0.7)
+
+        assert strategy.execute({'question': 'Q'}, llm) == "No"
+        assert llm.generate.call_count == 5
+
+    def test_item_sample_budget(self):
+        llm = self._llm(["Yes", "No", "No"])
+        strategy = SelfConsistencyStrategy(samples=9, temperature=0.7)
+
+        assert strategy.execute({'question': 'Q', 'sample_budget': 3}, llm) == "No"
+        assert llm.generate.call_count == 3
+
+    def test_unparseable_samples_return_first_response(self):
+        llm = self._llm(["maybe", "unclear", "unknown"])
+        strategy = SelfConsistencyStrategy(samples=3, temperature=0.7)
+
+        assert strategy.execute({'question': 'Q'}, llm) == "maybe"
+
+    def test_samples_drawn_concurrently(self):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def generate(prompt, system, temperature, seed):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return "Yes"
+
+        llm = MagicMock()
+        llm.generate.side_effect = generate
+        SelfConsistencyStrategy(samples=5, temperature=0.7).execute({'question': 'Q'}, llm)
+        assert peak[0] == 3
+
+    def test_aexecute(self):
+        calls = []
+
+        async def generate(prompt, system, temperature, seed):
+            calls.append(seed)
+            return "No" if seed < 3 else "Yes"
+
+        llm = MagicMock()
+        llm.generate = generate
+        strategy = SelfConsistencyStrategy(samples=5, temperature=0.7, base_seed=0)
+        assert asyncio.run(strategy.aexecute({'question': 'Q'}, llm)) == "No"
+        assert sorted(calls) == [0, 1, 2]
+
+    def test_rejects_zero_temperature(self):
+        with pytest.raises(ValueError):
+            SelfConsistencyStrategy(temperature=0.0)
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.stats import StatsAccumulator
+from src.utils.summary import summary_table
+
+
+@pytest.fixture
+def results():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'strategy': rng.choice(['A', 'B', 'C'], 500),
+        'vector_distance': rng.random(500),
+        'latency': rng.random(500) * 3,
+    })
+    df.loc[::7, 'latency'] = np.nan
+    return df
+
+
+class TestSummary:
+
+    def test_table_matches_pandas_groupby(self, results):
+        summary = StatsAccumulator(metrics=['vector_distance', 'latency']).update(results).summary()
+        table = summary_table(summary, 'latency')
+        expected = results.groupby('strategy')['latency'].agg(
+            ['mean', 'var', 'std', 'min', 'max', 'count']
+        )
+        pd.testing.assert_frame_equal(table, expected.sort_values('mean'), check_dtype=False)